@@ -0,0 +1,87 @@
+"""
+Compares parser subsets matching lines by many parsers at once.
+For every number of parsers it prints time of building subset and average time
+of matching single line, which is matched by no parser, by one parser
+and by several parsers. Run from repository root:
+    python scripts/benchmark_parser_subsets.py
+"""
+import random
+import sys
+import timeit
+
+sys.path.insert(0, '.')
+
+from whylog.config.consts import ParserSubsetType  # noqa: E402
+from whylog.config.parser_subset import ParserSubsetFactory  # noqa: E402
+from whylog.config.parsers import RegexParser  # noqa: E402
+
+DATE_REGEX = '(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d)'
+WORDS = [
+    'connection', 'timeout', 'disk', 'failure', 'request', 'user', 'session', 'cache', 'miss',
+    'write', 'read', 'lock'
+]
+PARSERS_COUNTS = [5, 50, 500, 3000]
+MATCHES = 200
+
+
+def create_messages(parsers_count):
+    random.seed(parsers_count)
+    return [
+        '%s code%d' % (' '.join(random.sample(WORDS, 3)), number)
+        for number in range(parsers_count)
+    ]
+
+
+def create_parsers(messages):
+    parsers = [
+        RegexParser(
+            'message%d' % number, '', '^%s %s on (.*)$' % (DATE_REGEX, message), [1], 'bench',
+            {1: 'date'}
+        ) for number, message in enumerate(messages)
+    ]
+    # parsers matching prefixes of lines, so some lines are matched by several parsers
+    parsers.extend(
+        RegexParser(
+            'prefix%d' % number, '', '^%s %s' %
+            (DATE_REGEX, ' '.join(message.split()[:2])), [1], 'bench', {1: 'date'}
+        ) for number, message in enumerate(messages[:3])
+    )
+    return parsers
+
+
+def create_lines(messages):
+    return [
+        ('no match', '2016-04-12 23:54:43 nothing interesting happened on comp2'),
+        ('one match', '2016-04-12 23:54:43 %s on comp2' % messages[-1]),
+        ('several matches', '2016-04-12 23:54:43 %s on comp2' % messages[0]),
+    ]
+
+
+def main():
+    subset_types = [ParserSubsetType.CONCATENATED, ParserSubsetType.REGEX_SET]
+    print('%8s %-16s %-16s %12s' % ('parsers', 'subset', 'line', 'time [us]'))
+    for parsers_count in PARSERS_COUNTS:
+        messages = create_messages(parsers_count)
+        parsers = create_parsers(messages)
+        for parser in parsers:
+            # regexes of single parsers are compiled lazily, so they are compiled before timing
+            parser.regex
+        for subset_type in subset_types:
+            start = timeit.default_timer()
+            parser_subset = ParserSubsetFactory.create(subset_type, parsers, buffer_scanning=False)
+            build_time = timeit.default_timer() - start
+            print(
+                '%8d %-16s %-16s %12.1f' % (parsers_count, subset_type, 'build', build_time * 1e6)
+            )
+            for line_name, line in create_lines(messages):
+                match_time = timeit.timeit(
+                    lambda: parser_subset.get_extracted_parsers_params(line), number=MATCHES
+                ) / MATCHES
+                print(
+                    '%8d %-16s %-16s %12.1f' %
+                    (parsers_count, subset_type, line_name, match_time * 1e6)
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import os.path
 import platform
+import sys
 
 from setuptools import find_packages, setup
 
@@ -7,6 +8,8 @@ with open('requirements.txt') as f:
     required = f.read().splitlines()
     if platform.system().lower().startswith('java'):
         required.remove('regex')
+    if sys.version_info < (2, 7):
+        required.append('ordereddict')
 
 with open('requirements-test.txt') as f:
     required_test = f.read().splitlines()
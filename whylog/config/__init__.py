@@ -9,7 +9,8 @@ from whylog.config.exceptions import UnsupportedConfigType
 from whylog.config.filename_matchers import WildCardFilenameMatcher
 from whylog.config.investigation_plan import LineSource
 from whylog.config.log_type import LogType
-from whylog.config.settings_factory import YamlSettingsFactory
+from whylog.config.settings_factory import SqliteSettingsFactory, YamlSettingsFactory
+from whylog.config.sqlite_config import SqliteConfig
 from whylog.config.yaml_config import YamlConfig
 
 assert WildCardFilenameMatcher
@@ -28,7 +29,8 @@ class SettingsFactorySelector(object):
     HOME_DIR = os.path.expanduser('~')
     ETC_DIR = '/etc'
     ASSISTANTS_DICT = {'regex': RegexAssistant}
-    SUPPORTED_TYPES = {'yaml': YamlConfig}
+    SUPPORTED_TYPES = {'yaml': YamlConfig, 'sqlite': SqliteConfig}
+    SETTINGS_FACTORIES = {'yaml': YamlSettingsFactory, 'sqlite': SqliteSettingsFactory}
     DEFAULT_SETTINGS_FACTORY_TYPE = YamlSettingsFactory
 
     @classmethod
@@ -46,12 +48,21 @@ class SettingsFactorySelector(object):
             return {'config': config_class(**whylog_settings), 'assistant': assistant_class}
 
     @classmethod
-    def get_settings(cls):
+    def get_settings(cls, config_type=None):
+        """
+        :param config_type: type of config created in current directory if no settings are found,
+                            e.g. 'sqlite', default is YamlConfig
+        """
         path = cls._find_path_to_settings()
         if path is not None:
             path_to_settings = os.path.join(path, cls.SETTINGS_FILE)
             return cls.load_settings(path_to_settings)
-        path_to_settings = cls.DEFAULT_SETTINGS_FACTORY_TYPE.create_new_settings_dir(
+        settings_factory = cls.DEFAULT_SETTINGS_FACTORY_TYPE
+        if config_type is not None:
+            settings_factory = cls.SETTINGS_FACTORIES.get(config_type)
+            if settings_factory is None:
+                raise UnsupportedConfigType(config_type)
+        path_to_settings = settings_factory.create_new_settings_dir(
             os.getcwd(), cls.WHYLOG_DIR, cls.SETTINGS_FILE
         )
         return cls.load_settings(path_to_settings)
@@ -1,15 +1,19 @@
 import itertools
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
-from datetime import datetime
 
 import six
+from frozendict import frozendict
 
+from whylog.config.consts import ParserSubsetType, PlanCacheConsts
 from whylog.config.filename_matchers import WildCardFilenameMatcher
-from whylog.config.investigation_plan import Clue, InvestigationPlan, InvestigationStep
+from whylog.config.investigation_plan import (
+    Clue, ClueRetention, InvestigationPlan, InvestigationStep, ReadSizePolicy
+)
 from whylog.config.log_type import LogType
 from whylog.config.parser_name_generator import ParserNameGenerator
-from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parser_subset import ParserSubsetFactory
+from whylog.config.plan_cache import PlanSkeleton, PlanSkeletonCache
 from whylog.config.rule import RegexRuleFactory
 from whylog.config.super_parser import RegexSuperParser
 
@@ -17,6 +21,39 @@ from whylog.config.super_parser import RegexSuperParser
 @six.add_metaclass(ABCMeta)
 class AbstractConfig(object):
     words_count_in_name = 4
+    # tolerances of left bounds of search ranges for primary key types,
+    # e.g. {'date': timedelta(seconds=2)} for logs with slightly unordered timestamps
+    search_range_tolerances = frozendict()
+    # when True, parsers match lines read from logs as bytes and only matched groups
+    # are decoded, what is faster, but patterns like \w match only ASCII characters then
+    bytes_lines_matching = False
+    # when True, lines without literals required by cause parsers are rejected before matching
+    literal_prefilter = True
+    # when True, searchers find lines matched by cause parsers in whole blocks of logs
+    # by single regex call, instead of matching every line separately
+    buffer_scanning = True
+    # maximal number of clues kept for every cause parser, clues with primary keys closest
+    # to the primary key of effect line are kept. None keeps all clues
+    clues_limit = None
+    # maximal numbers of clues kept for single cause parsers, by parser names
+    parser_clues_limits = frozendict()
+    # when set, cached lists of files of log types are refreshed in background every
+    # this number of seconds, instead of checking modification times of log directories
+    # in every investigation
+    file_catalog_refresh_interval = None
+    # sizes of blocks read by backward scans of logs, scans start with small block, so
+    # investigations of causes close to the effect read little
+    read_size_policy = ReadSizePolicy()
+    # read size policies of single log types, by log type names
+    log_type_read_size_policies = frozendict()
+    # maximal number of cached suspected rules and parser subsets of investigations,
+    # by matched effect parsers, so repeated effects don't compile parser subsets again.
+    # 0 disables the cache
+    plan_cache_size = PlanCacheConsts.MAX_SIZE
+    # type of parser subsets matching lines by many parsers at once. ParserSubsetType.REGEX_SET
+    # matches only parsers whose required literals occur in line, what is faster
+    # than ParserSubsetType.CONCATENATED regexes, especially for large sets of parsers
+    parser_subset_type = ParserSubsetType.REGEX_SET
     DEFAULT_NAME = "default"
     DEFAULT_LOG_TYPE = LogType(
         DEFAULT_NAME, [
@@ -26,12 +63,14 @@ class AbstractConfig(object):
 
     def __init__(self):
         self._parsers = self._load_parsers()
-        self._parsers_grouped_by_log_type = self._index_parsers_by_log_type(
-            six.itervalues(self._parsers)
-        )
+        self._parsers_grouped_by_log_type = self._load_parsers_grouped_by_log_type()
         self._parser_name_generator = ParserNameGenerator(self._parsers)
         self._rules = self._load_rules()
         self._log_types = self._load_log_types()
+        self._plan_cache = PlanSkeletonCache(self.plan_cache_size)
+        self._effect_matchers = {}
+        for log_type in six.itervalues(self._log_types):
+            self._start_refreshing_file_catalog(log_type)
 
     @abstractmethod
     def _load_parsers(self):
@@ -45,6 +84,9 @@ class AbstractConfig(object):
     def _load_log_types(self):
         pass
 
+    def _load_parsers_grouped_by_log_type(self):
+        return self._index_parsers_by_log_type(six.itervalues(self._parsers))
+
     @classmethod
     def _index_parsers_by_log_type(cls, parsers):
         grouped_parsers = defaultdict(list)
@@ -52,21 +94,31 @@ class AbstractConfig(object):
             grouped_parsers[parser.log_type].append(parser)
         return grouped_parsers
 
+    def get_parsers_of_log_type(self, log_type_name):
+        return list(self._parsers_grouped_by_log_type.get(log_type_name, []))
+
     def add_rule(self, user_rule_intent):
         created_rule = RegexRuleFactory.create_from_intent(user_rule_intent)
         self._save_rule_definition(created_rule.serialize())
         created_parsers = created_rule.get_new_parsers(self._parser_name_generator)
         self._save_parsers_definition(parser.serialize() for parser in created_parsers)
         self._rules[created_rule.get_effect_name()].append(created_rule)
+        self._plan_cache.clear()
         for parser in created_parsers:
             self._parsers[parser.name] = parser
             self._parsers_grouped_by_log_type[parser.log_type].append(parser)
+            self._effect_matchers.pop(parser.log_type, None)
         self._parser_name_generator = ParserNameGenerator(self._parsers)
 
     def add_log_type(self, log_type):
         for matcher in log_type.filename_matchers:
             self.add_filename_matcher_to_log_type(matcher)
         self._log_types[log_type.name] = log_type
+        self._start_refreshing_file_catalog(log_type)
+
+    def _start_refreshing_file_catalog(self, log_type):
+        if self.file_catalog_refresh_interval is not None:
+            log_type.file_catalog.start_refreshing(self.file_catalog_refresh_interval)
 
     def add_filename_matcher_to_log_type(self, matcher):
         self._save_filename_matcher_definition(matcher.serialize())
@@ -97,13 +149,28 @@ class AbstractConfig(object):
         matching_parsers, effect_params = self._find_matching_parsers(
             front_input.line_content, log_type.name
         )
-        suspected_rules = self._filter_rule_set(matching_parsers)
-        concatenated_parsers = self._create_concatenated_parsers_for_investigation(suspected_rules)
+        skeleton = self._get_plan_skeleton(matching_parsers)
         effect_clues = self._create_effect_clues(effect_params, front_input)
         steps = self._create_steps_in_investigation(
-            concatenated_parsers, suspected_rules, effect_clues
+            skeleton.concatenated_parsers, skeleton.suspected_rules, effect_clues
         )
-        return InvestigationPlan(suspected_rules, steps, effect_clues)
+        return InvestigationPlan(list(skeleton.suspected_rules), steps, effect_clues)
+
+    def _get_plan_skeleton(self, matching_parsers):
+        """
+        returns suspected rules and parser subsets for matched effect parsers,
+        they are created only when they aren't in plan cache
+        """
+        cache_key = self._plan_cache.get_key(matching_parsers)
+        skeleton = self._plan_cache.get(cache_key)
+        if skeleton is None:
+            suspected_rules = self._filter_rule_set(matching_parsers)
+            skeleton = PlanSkeleton(
+                suspected_rules,
+                self._create_concatenated_parsers_for_investigation(suspected_rules)
+            )
+            self._plan_cache.put(cache_key, skeleton)
+        return skeleton
 
     def _create_effect_clues(self, effect_params, front_input):
         effect_clues = {}
@@ -121,14 +188,30 @@ class AbstractConfig(object):
         """
         This method finding all parsers from Config base which matching with effect_line_content
         """
-        matching_parsers = []
-        extracted_params = {}
-        for parser in self._parsers_grouped_by_log_type[log_type_name]:
-            params = parser.get_regex_params(effect_line_content)
-            if params is not None:
-                extracted_params[parser.name] = params
-                matching_parsers.append(parser)
-        return matching_parsers, extracted_params
+        effect_matcher = self._get_effect_matcher(log_type_name)
+        if effect_matcher is None:
+            return [], {}
+        return effect_matcher.get_matching_parsers(effect_line_content)
+
+    def _get_effect_matcher(self, log_type_name):
+        """
+        returns parser subset matching effect lines of log type by all its parsers at once,
+        it's created when log type is investigated for the first time and dropped
+        when parsers are added to log type. None is returned for log type without parsers
+        """
+        effect_matcher = self._effect_matchers.get(log_type_name)
+        if effect_matcher is None:
+            parsers = self._parsers_grouped_by_log_type.get(log_type_name)
+            if not parsers:
+                return None
+            effect_matcher = ParserSubsetFactory.create(
+                self.parser_subset_type,
+                parsers,
+                literal_prefilter=self.literal_prefilter,
+                buffer_scanning=False
+            )
+            self._effect_matchers[log_type_name] = effect_matcher
+        return effect_matcher
 
     def _filter_rule_set(self, parsers_list):
         """
@@ -142,8 +225,7 @@ class AbstractConfig(object):
                 suspected_rules.extend(rules)
         return suspected_rules
 
-    @classmethod
-    def _create_concatenated_parsers_for_investigation(cls, rules):
+    def _create_concatenated_parsers_for_investigation(self, rules):
         """
         Create concatenated parser for all log types which participate in given investigation based
         on suspected rules found by _filter_rule_set
@@ -156,35 +238,73 @@ class AbstractConfig(object):
                     grouped_parsers[parser.log_type].append(parser)
                     inserted_parsers.add(parser.name)
         return dict(
-            (log_type_name, ConcatenatedRegexParser(parsers))
-            for log_type_name, parsers in six.iteritems(grouped_parsers)
+            (
+                log_type_name,
+                ParserSubsetFactory.create(
+                    self.parser_subset_type, parsers, self.bytes_lines_matching,
+                    self.literal_prefilter, self.buffer_scanning
+                )
+            ) for log_type_name, parsers in six.iteritems(grouped_parsers)
         )
 
+    def _create_clue_retention(self, effect_clues):
+        """
+        returns ClueRetention with primary keys of effect line,
+        or None when number of clues is not limited
+        """
+        if self.clues_limit is None and not self.parser_clues_limits:
+            return None
+        effect_keys = {}
+        for parser_name, clue in six.iteritems(effect_clues):
+            parser = self._parsers[parser_name]
+            for group_nr in parser.primary_key_groups:
+                effect_keys.setdefault(
+                    parser.convertions.get(group_nr), clue.regex_parameters[group_nr - 1]
+                )
+        return ClueRetention(effect_keys, self.clues_limit, self.parser_clues_limits)
+
     def _create_steps_in_investigation(self, concatenated_parsers, suspected_rules, effect_clues):
         steps = []
         search_ranges = self._get_search_ranges(suspected_rules, effect_clues)
+        clue_retention = self._create_clue_retention(effect_clues)
         for log_type_name, parser in six.iteritems(concatenated_parsers):
             log_type = self._log_types[log_type_name]
-            investigation_step = InvestigationStep(parser, search_ranges.get(log_type_name, {}))
+            investigation_step = InvestigationStep(
+                parser, search_ranges.get(log_type_name, {}), self.search_range_tolerances,
+                clue_retention,
+                self.log_type_read_size_policies.get(log_type_name, self.read_size_policy)
+            )
             steps.append((investigation_step, log_type))
         return steps
 
     def _get_search_ranges(self, suspected_rules, effect_clues):
-        # TODO: remove mock
-        return {
-            'database': {
-                'date': {
-                    'left_bound': datetime(2016, 4, 12, 23, 53, 3),
-                    'right_bound': datetime(2016, 4, 12, 23, 54, 33)
-                }
-            },
-            'apache': {
-                'date': {
-                    'left_bound': datetime(2016, 4, 12, 23, 54, 33),
-                    'right_bound': datetime(2016, 4, 12, 23, 54, 43)
-                }
-            }
-        }
+        """
+        returns search ranges of primary keys by log type names, derived from time delta
+        constraints between causes and effect of suspected rules. Range of log type covers
+        ranges of all its causes, so log type with any cause without range gets no range
+        and whole its files are searched.
+        """
+        causes_ranges = defaultdict(list)
+        for rule in suspected_rules:
+            effect_clue = effect_clues[rule.get_effect_name()]
+            for cause, cause_range in zip(
+                rule.get_causes_parsers(), rule.get_causes_search_ranges(effect_clue)
+            ):
+                causes_ranges[cause.log_type].append(cause_range)
+        search_ranges = {}
+        for log_type_name, ranges in six.iteritems(causes_ranges):
+            if None in ranges or len(set(key_type for key_type, _, _ in ranges)) != 1:
+                continue
+            left_bounds = [left_bound for _, left_bound, _ in ranges]
+            right_bounds = [right_bound for _, _, right_bound in ranges]
+            type_bounds = {}
+            if None not in left_bounds:
+                type_bounds[InvestigationStep.LEFT_BOUND] = min(left_bounds)
+            if None not in right_bounds:
+                type_bounds[InvestigationStep.RIGHT_BOUND] = max(right_bounds)
+            if type_bounds:
+                search_ranges[log_type_name] = {ranges[0][0]: type_bounds}
+        return search_ranges
 
     def is_free_parser_name(self, parser_name, black_list):
         return self._parser_name_generator.is_free_parser_name(parser_name, black_list)
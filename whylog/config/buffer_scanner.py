@@ -0,0 +1,124 @@
+import re
+
+from whylog.config.consts import LogEncoding
+
+try:
+    import regex
+except ImportError:
+    import re as regex
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+
+class LineLocalityChecker(object):
+    """
+    Checks if regex matching beginning of a line matches also at the same position of buffer
+    in which this line is followed by newline and next lines.
+    It's true for regexes built only of constructs that can't fail because of text after
+    the line: negative assertions, lookbehinds, atomic groups, possessive repeats,
+    conditional groups and anchors of beginning and end of the whole string are not allowed.
+    """
+    ALLOWED_OPERATIONS = frozenset(
+        [
+            sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN,
+            sre_constants.GROUPREF
+        ]
+    )
+    REPEATS = frozenset([sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT])
+    STRING_ANCHORS = frozenset([sre_constants.AT_BEGINNING_STRING, sre_constants.AT_END_STRING])
+
+    @classmethod
+    def is_line_local(cls, regex_str):
+        try:
+            return cls._is_pattern_line_local(sre_parse.parse(regex_str))
+        except (re.error, TypeError, ValueError, OverflowError, RuntimeError):
+            return False
+
+    @classmethod
+    def _is_pattern_line_local(cls, parsed):
+        for operation, argument in parsed:
+            if operation in cls.ALLOWED_OPERATIONS:
+                continue
+            if operation == sre_constants.AT:
+                if argument in cls.STRING_ANCHORS:
+                    return False
+            elif operation == sre_constants.BRANCH:
+                if not all(cls._is_pattern_line_local(branch) for branch in argument[1]):
+                    return False
+            elif operation == sre_constants.SUBPATTERN:
+                if not cls._is_pattern_line_local(argument[-1]):
+                    return False
+            elif operation in cls.REPEATS:
+                if not cls._is_pattern_line_local(argument[2]):
+                    return False
+            elif operation == sre_constants.ASSERT:
+                direction, asserted = argument
+                if direction < 0 or not cls._is_pattern_line_local(asserted):
+                    return False
+            else:
+                return False
+        return True
+
+
+class BufferScanner(object):
+    """
+    Finds lines of a buffer which can be matched by any regex from the set,
+    so python code is run only for found lines, not for every line of buffer.
+    Lines are found by single MULTILINE finditer call, in which regexes are used
+    in zero width lookahead, so matches spanning many lines don't hide next lines.
+    When regexes have required literals (see LiteralPrefilter), only lines containing
+    these literals are found by substring search and matched by the same regex.
+    Every line matched by some regex is found, some of found lines may be not matched
+    by any regex (when regex matches text of few lines).
+    """
+    def __init__(self, lines_regex, bytes_lines=False, prefilter=None):
+        self._lines_regex = lines_regex
+        self._newline = b'\n' if bytes_lines else '\n'
+        self._prefilter = prefilter
+
+    @classmethod
+    def create(cls, regex_strs, bytes_lines=False, prefilter=None):
+        """
+        returns scanner for given regexes, or None when some regex can't be
+        matched against whole buffer with the same result as against single lines
+        """
+        regex_strs = list(regex_strs)
+        if not all(LineLocalityChecker.is_line_local(regex_str) for regex_str in regex_strs):
+            return None
+        alternatives = '|'.join('(?:' + regex_str + ')' for regex_str in regex_strs)
+        lines_regex = '(?m)^(?=%s)' % (alternatives,)
+        if bytes_lines:
+            lines_regex = LogEncoding.encode_pattern(lines_regex)
+        try:
+            return BufferScanner(regex.compile(lines_regex), bytes_lines, prefilter)
+        except (re.error, regex.error, TypeError, ValueError, OverflowError, RuntimeError):
+            return None
+
+    def find_line_starts(self, buffer):
+        """
+        returns ascending positions of beginnings of lines of buffer,
+        which can be matched by some regex. Empty lines may be returned too.
+        """
+        if self._prefilter is None:
+            return [match.start() for match in self._lines_regex.finditer(buffer)]
+        line_starts = set()
+        for literal in self._prefilter.literals:
+            line_starts.update(self._find_lines_containing(buffer, literal))
+        return [
+            line_start
+            for line_start in sorted(line_starts) if self._lines_regex.match(buffer, line_start)
+        ]
+
+    def _find_lines_containing(self, buffer, literal):
+        position = buffer.find(literal)
+        while position != -1:
+            yield buffer.rfind(self._newline, 0, position) + 1
+            line_end = buffer.find(self._newline, position)
+            if line_end == -1:
+                return
+            position = buffer.find(literal, line_end)
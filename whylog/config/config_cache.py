@@ -0,0 +1,88 @@
+import hashlib
+import os
+import tempfile
+
+from six.moves import cPickle as pickle
+
+from whylog.config.consts import ConfigCacheConsts
+
+
+class ConfigCache(object):
+    """
+    Keeps documents loaded from config files in binary files in cache directory, so loading
+    of unchanged config skips parsing of YAML. Cached documents are valid as long as size,
+    modification time and content hash of config file are the same as when they were cached.
+    Hash is needed, because file modified twice in the same tick of mtime clock
+    can keep its size and mtime.
+    """
+    def __init__(self, cache_dir):
+        self._cache_dir = cache_dir
+
+    def get_cache_path(self, path):
+        path_digest = hashlib.sha1(os.path.realpath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self._cache_dir, path_digest + ConfigCacheConsts.FILE_SUFFIX)
+
+    @classmethod
+    def _get_version(cls, path):
+        with open(path, 'rb') as config_file:
+            stat = os.fstat(config_file.fileno())
+            digest = hashlib.sha1(config_file.read()).hexdigest()
+        return stat.st_size, stat.st_mtime, digest
+
+    def load(self, path, load_documents):
+        """
+        returns documents of config file, they are loaded by load_documents(path)
+        and cached only when there are no valid cached documents
+        """
+        version = self._get_version(path)
+        documents = self._load_cached(path, version)
+        if documents is None:
+            documents = load_documents(path)
+            self._save(path, version, documents)
+        return documents
+
+    def _load_cached(self, path, version):
+        try:
+            with open(self.get_cache_path(path), 'rb') as cache_file:
+                cached = pickle.load(cache_file)
+            if cached['format_version'] != ConfigCacheConsts.FORMAT_VERSION or \
+                    tuple(cached['version']) != version:
+                return None
+            return cached['documents']
+        except (
+            IOError, OSError, EOFError, AttributeError, ImportError, IndexError, KeyError,
+            TypeError, ValueError, pickle.UnpicklingError
+        ):
+            # missing, broken or written by other python version cache is just created again
+            return None
+
+    def _save(self, path, version, documents):
+        """
+        returns False when cache can't be saved (e.g. cache directory is read only)
+        """
+        cache_path = self.get_cache_path(path)
+        cached = {
+            'format_version': ConfigCacheConsts.FORMAT_VERSION,
+            'version': version,
+            'documents': documents
+        }
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            # unique temporary file, so processes saving the same cache don't overwrite it
+            descriptor, tmp_path = tempfile.mkstemp(
+                suffix=ConfigCacheConsts.TMP_SUFFIX, dir=self._cache_dir
+            )
+        except (IOError, OSError):
+            return False
+        try:
+            with os.fdopen(descriptor, 'wb') as cache_file:
+                pickle.dump(cached, cache_file, pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            os.rename(tmp_path, cache_path)
+        except (IOError, OSError, TypeError, pickle.PicklingError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
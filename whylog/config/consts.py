@@ -5,3 +5,64 @@ class YamlFileNames(object):
     unix_log_types = 'unix_log_types.yaml'
     windows_log_types = 'windows_log_types.yaml'
     settings = 'settings.yaml'
+
+
+class SqliteFileNames(object):
+    config = 'config.sqlite'
+
+
+class IndexFileConsts(object):
+    # sparse indexes (and their temporary files) are stored next to log files,
+    # so files with this suffix in name are never matched as log files
+    SUFFIX = '.whylog_index'
+
+
+class LogEncoding(object):
+    ENCODING = 'utf-8'
+    DECODING_ERRORS = 'replace'
+
+    @classmethod
+    def encode_pattern(cls, regex_str):
+        return regex_str.encode(cls.ENCODING)
+
+    @classmethod
+    def encode(cls, content):
+        if content is None:
+            return None
+        return content.encode(cls.ENCODING)
+
+    @classmethod
+    def decode(cls, content):
+        if content is None:
+            return None
+        return content.decode(cls.ENCODING, cls.DECODING_ERRORS)
+
+
+class FileCatalogConsts(object):
+    REFRESH_INTERVAL = 5
+    # directories modified within this number of seconds before glob can have
+    # the same mtime after next modification
+    MTIME_RESOLUTION = 1
+
+
+class ReadSizeConsts(object):
+    INITIAL_SIZE = 64 * 1024
+    GROWTH_FACTOR = 4
+    MAX_SIZE = 10 * 1024 * 1024
+
+
+class ConfigCacheConsts(object):
+    # directory of cache in whylog settings directory
+    DIRECTORY_NAME = 'cache'
+    FILE_SUFFIX = '.whylog_cache'
+    TMP_SUFFIX = '.tmp'
+    FORMAT_VERSION = 1
+
+
+class PlanCacheConsts(object):
+    MAX_SIZE = 128
+
+
+class ParserSubsetType(object):
+    CONCATENATED = 'concatenated'
+    REGEX_SET = 'regex_set'
@@ -19,3 +19,11 @@ class UnsupportedConfigType(WhylogConfigError):
 
     def __str__(self):
         return 'This whylog version do not handle %s. Please upgrade Whylog' % self.unsupported_type
+
+
+class UnsupportedParserSubsetType(WhylogConfigError):
+    def __init__(self, unsupported_type):
+        self.unsupported_type = unsupported_type
+
+    def __str__(self):
+        return 'This whylog version do not handle %s. Please upgrade Whylog' % self.unsupported_type
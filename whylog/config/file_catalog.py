@@ -0,0 +1,111 @@
+import glob
+import os
+import threading
+import time
+
+from whylog.config.consts import FileCatalogConsts
+
+
+class CatalogEntry(object):
+    def __init__(self, paths, directories, mtimes, scan_time):
+        self.paths = paths
+        self.directories = directories
+        self.mtimes = mtimes
+        self.scan_time = scan_time
+
+
+class FileCatalog(object):
+    """
+    Caches lists of files matched by path patterns. Set of files matched by glob changes
+    only when some directory listed by glob is modified, so cached list is valid as long as
+    modification times of these directories don't change. Directories modified shortly before
+    the scan are not trusted (file may be added in the same tick of mtime clock after the scan),
+    so their patterns are globbed again.
+    When catalog is refreshed in background, cached lists are validated only
+    by the refreshing thread, so queries don't call even stat.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._refreshing_stopped = None
+
+    @classmethod
+    def _get_listed_directories(cls, path_pattern):
+        """
+        returns directories listed by glob when files matching pattern are searched
+        """
+        directory_pattern = os.path.dirname(path_pattern) or os.curdir
+        if not glob.has_magic(directory_pattern):
+            return [directory_pattern]
+        return cls._get_listed_directories(directory_pattern) + sorted(
+            path for path in glob.glob(directory_pattern) if os.path.isdir(path)
+        )
+
+    @classmethod
+    def _get_mtimes(cls, directories):
+        mtimes = []
+        for directory in directories:
+            try:
+                mtimes.append(os.stat(directory).st_mtime)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    @classmethod
+    def _scan(cls, path_pattern):
+        scan_time = time.time()
+        directories = cls._get_listed_directories(path_pattern)
+        mtimes = cls._get_mtimes(directories)
+        return CatalogEntry(glob.glob(path_pattern), directories, mtimes, scan_time)
+
+    @classmethod
+    def _is_fresh(cls, entry):
+        if cls._get_mtimes(entry.directories) != entry.mtimes:
+            return False
+        return all(
+            mtime is None or mtime < entry.scan_time - FileCatalogConsts.MTIME_RESOLUTION
+            for mtime in entry.mtimes
+        )
+
+    def get_files(self, path_pattern):
+        """
+        returns list of paths of files matching pattern, in order returned by glob
+        """
+        entry = self._entries.get(path_pattern)
+        if entry is None or (self._refreshing_stopped is None and not self._is_fresh(entry)):
+            entry = self._scan(path_pattern)
+            self._entries[path_pattern] = entry
+        return entry.paths
+
+    def refresh(self):
+        """
+        globs again patterns whose cached lists of files are not valid
+        """
+        for path_pattern, entry in list(self._entries.items()):
+            if not self._is_fresh(entry):
+                self._entries[path_pattern] = self._scan(path_pattern)
+
+    def start_refreshing(self, interval=FileCatalogConsts.REFRESH_INTERVAL):
+        """
+        starts thread which refreshes catalog every interval seconds,
+        until stop_refreshing is called
+        """
+        if self._refreshing_stopped is not None:
+            return
+        self._refreshing_stopped = threading.Event()
+        thread = threading.Thread(
+            target=self._refresh_periodically, args=(interval, self._refreshing_stopped)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def stop_refreshing(self):
+        if self._refreshing_stopped is not None:
+            self._refreshing_stopped.set()
+            self._refreshing_stopped = None
+
+    def _refresh_periodically(self, interval, refreshing_stopped):
+        while True:
+            refreshing_stopped.wait(interval)
+            if refreshing_stopped.is_set():
+                return
+            self.refresh()
@@ -1,16 +1,22 @@
 import fnmatch
 import glob
+import os.path
 from abc import ABCMeta, abstractmethod
 
 import six
 
+from whylog.config.consts import IndexFileConsts
 from whylog.config.super_parser import RegexSuperParserFactory
 
 
 @six.add_metaclass(ABCMeta)
 class AbstractFilenameMatcher(object):
     @abstractmethod
-    def get_matched_files(self):
+    def get_matched_files(self, file_catalog=None):
+        """
+        :param file_catalog: FileCatalog caching lists of files of log type,
+                             None means that files are searched every time
+        """
         pass
 
 
@@ -21,13 +27,31 @@ class WildCardFilenameMatcher(AbstractFilenameMatcher):
         self.log_type_name = log_type_name
         self.super_parser = super_parser
 
-    def get_matched_files(self):
+    @classmethod
+    def glob_log_files(cls, path_pattern, file_catalog=None):
+        """
+        returns generator of paths of files matching pattern, without sparse indexes
+        which whylog stores next to log files (e.g. 'app.log.whylog_index' matches 'app.log*')
+        """
+        if file_catalog is None:
+            paths = glob.iglob(path_pattern)
+        else:
+            paths = file_catalog.get_files(path_pattern)
+        return (path for path in paths if IndexFileConsts.SUFFIX not in os.path.basename(path))
+
+    def get_matched_files(self, file_catalog=None):
+        """
+        Files of other hosts are matched by search agents running on these hosts,
+        so for them path pattern is returned instead of matched paths.
+        """
         if self.host_pattern == 'localhost':
-            for path in glob.iglob(self.path_pattern):
+            for path in self.glob_log_files(self.path_pattern, file_catalog):
                 yield 'localhost', path, self.super_parser
-        else:
-            # TODO: finding files in others hosts
+        elif glob.has_magic(self.host_pattern):
+            # TODO: finding hosts matching pattern
             raise NotImplementedError
+        else:
+            yield self.host_pattern, self.path_pattern, self.super_parser
 
     def __contains__(self, line_source):
         return fnmatch.fnmatch(line_source.host, self.host_pattern) and fnmatch.fnmatch(
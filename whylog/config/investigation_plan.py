@@ -1,6 +1,12 @@
+from datetime import timedelta
+
 import six
 
+from whylog.config.consts import ReadSizeConsts
+from whylog.config.parser_subset import ParserSubsetFactory
+from whylog.config.parsers import RegexParserFactory
 from whylog.config.utils import CompareResult
+from whylog.converters import CONVERTION_MAPPING, ConverterType
 
 
 class InvestigationPlan(object):
@@ -34,16 +40,63 @@ class InvestigationStep(object):
     Contains all parsers for single log type that can be matched in actual investigation.
     This class is responsible for finding all possible Clues from parsed logs.
     Also controls searched time range in logs file.
+    Left bounds of search range are widened by tolerances given for primary key types,
+    so lines with slightly unordered primary keys are not omitted.
     """
     LEFT_BOUND, RIGHT_BOUND = 0, 1
 
-    def __init__(self, parser_subset, search_ranges):
+    def __init__(
+        self,
+        parser_subset,
+        search_ranges,
+        tolerances=None,
+        clue_retention=None,
+        read_size_policy=None
+    ):
         self._parser_subset = parser_subset
         self._search_ranges = search_ranges
+        self._tolerances = tolerances or {}
+        self._clue_retention = clue_retention
+        self._read_size_policy = read_size_policy or ReadSizePolicy()
+
+    def _get_bound_value(self, primary_key_type, type_bounds, bound):
+        bound_value = type_bounds.get(bound)
+        tolerance = self._tolerances.get(primary_key_type)
+        if bound == self.LEFT_BOUND and bound_value is not None and tolerance is not None:
+            return bound_value - tolerance
+        return bound_value
 
-    def is_line_in_search_range(self, super_parser_groups):
-        #TODO: delete this deprecated method
-        return True
+    def is_line_before_search_range(self, super_parser_groups):
+        """
+        returns True when line primary key is lower than left bound of search range.
+        Lines without primary key are never before search range.
+        When file is ordered by primary key, backward scan of it can be stopped at such line.
+        """
+        if not super_parser_groups:
+            return False
+        group_type, group_value = super_parser_groups[0]
+        left_bound = self._get_bound_value(
+            group_type, self._search_ranges.get(group_type, {}), self.LEFT_BOUND
+        )
+        return left_bound is not None and group_value < left_bound
+
+    def is_bounded(self, primary_key_type):
+        """
+        returns True when search range for given primary key type is defined,
+        so lines of a file ordered by such primary key can be bisected by compare_with_bound
+        """
+        return primary_key_type in self._search_ranges
+
+    def get_bounds(self, primary_key_type):
+        """
+        returns pair (left bound value, right bound value) of search range for given
+        primary key type, undefined bound is returned as None
+        """
+        type_bounds = self._search_ranges.get(primary_key_type, {})
+        return (
+            self._get_bound_value(primary_key_type, type_bounds, self.LEFT_BOUND),
+            self._get_bound_value(primary_key_type, type_bounds, self.RIGHT_BOUND)
+        )
 
     def compare_with_bound(self, bound, super_parser_groups):
         """
@@ -63,12 +116,16 @@ class InvestigationStep(object):
         When self._search_ranges hasn't defined bounds for given primary key type this method
         return GT/LT when compare with RIGHT_BOUND/LEFT_BOUND.
         This means that InvestigationStep object hasn't information about order in parsed file.
+        When only the other bound of range is defined, the range is unbounded on this side,
+        so line is within it: GT/LT is returned when compare with LEFT_BOUND/RIGHT_BOUND.
         """
         # This implementation assume that super_parser_groups length equals 1 or 0
         # TODO implementation for longer super_parser_groups_list
         group_value, bound_value = self._extract_values_to_compare(bound, super_parser_groups)
-        if bound_value is None:
+        if group_value is None:
             return self._compare_with_undefined_bound(bound)
+        if bound_value is None:
+            return CompareResult.GT if bound == self.LEFT_BOUND else CompareResult.LT
         return self._compare_values(bound_value, group_value)
 
     def _extract_values_to_compare(self, bound, super_parser_groups):
@@ -80,7 +137,7 @@ class InvestigationStep(object):
         type_bounds = self._search_ranges.get(group_type)
         if type_bounds is None:
             return None, None
-        return group_value, type_bounds[bound]
+        return group_value, self._get_bound_value(group_type, type_bounds, bound)
 
     def _compare_with_undefined_bound(self, bound):
         if bound == self.LEFT_BOUND:
@@ -95,26 +152,276 @@ class InvestigationStep(object):
             return CompareResult.GT
         return CompareResult.EQ
 
-    def get_clues(self, line, offset, line_source):
+    @property
+    def bytes_lines(self):
+        """
+        True when lines should be given to get_clues as bytes, not decoded
+        """
+        return self._parser_subset is not None and self._parser_subset.bytes_lines
+
+    @property
+    def clue_retention(self):
+        """
+        ClueRetention limiting number of clues kept for parsers, or None when all clues are kept
+        """
+        return self._clue_retention
+
+    @property
+    def read_size_policy(self):
+        """
+        ReadSizePolicy of blocks read by backward scan of files
+        """
+        return self._read_size_policy
+
+    @property
+    def buffer_scanner(self):
+        """
+        BufferScanner finding lines of buffer in which clues can be found,
+        or None when every line should be given to get_clues
+        """
+        if self._parser_subset is None:
+            return None
+        return self._parser_subset.buffer_scanner
+
+    def get_clues(self, line, offset, line_source, line_loader=None):
+        """
+        returns dict of clues found in line by parsers. When line_loader is given,
+        clues are LazyClues, which convert groups and read line content from log
+        (by line_loader.load_line) only when it's needed.
+        """
+        if line_loader is None:
+            return self._get_converted_clues(line, offset, line_source)
+        return dict(
+            (
+                parser.name,
+                LazyClue(
+                    ConvertedGroups(parser, groups, self.bytes_lines), line_loader, offset,
+                    line_source
+                )
+            ) for parser, groups in self.get_extracted_groups(line)
+        )
+
+    def get_parsers(self):
+        """
+        returns parsers of clues, which can be found in this step
+        """
+        return self._parser_subset.get_parsers()
+
+    def serialize(self):
+        """
+        returns definition of step, which can be dumped to JSON
+        and loaded by InvestigationStepFactory.from_dao
+        """
+        search_ranges = dict(
+            (
+                primary_key_type, [
+                    PrimaryKeyValues.serialize(primary_key_type, type_bounds.get(bound))
+                    for bound in (self.LEFT_BOUND, self.RIGHT_BOUND)
+                ]
+            ) for primary_key_type, type_bounds in six.iteritems(self._search_ranges)
+        )
+        tolerances = dict(
+            (primary_key_type, PrimaryKeyValues.serialize_tolerance(primary_key_type, tolerance))
+            for primary_key_type, tolerance in six.iteritems(self._tolerances)
+        )
+        clue_retention = None
+        if self._clue_retention is not None:
+            clue_retention = self._clue_retention.serialize()
+        return {
+            'parsers': [parser.serialize() for parser in self.get_parsers()],
+            'bytes_lines': self.bytes_lines,
+            'parser_subset_type': self._parser_subset.SUBSET_TYPE,
+            'search_ranges': search_ranges,
+            'tolerances': tolerances,
+            'clue_retention': clue_retention,
+            'read_size_policy': self._read_size_policy.serialize()
+        }
+
+    def get_extracted_groups(self, line):
+        """
+        returns list of pairs (parser, groups extracted from line by this parser),
+        groups are not converted
+        """
+        extracted_params = self._parser_subset.get_extracted_parsers_params(line)
+        return [
+            (self._parser_subset.get_parser(parser_name), groups)
+            for parser_name, groups in six.iteritems(extracted_params)
+        ]
+
+    def _get_converted_clues(self, line, offset, line_source):
         converted_params = self._parser_subset.convert_parsers_groups_from_matched_line(line)
+        if not converted_params:
+            return {}
+        line = self._parser_subset.decode_line(line)
         return dict(
             (parser_name, Clue(converted_groups, line, offset, line_source))
             for parser_name, converted_groups in six.iteritems(converted_params)
         )
 
 
+class ClueRetention(object):
+    """
+    Limits number of clues kept for cause parsers, so chatty parsers don't blow up
+    memory and number of verified clues combinations. Only clues with primary keys
+    closest to the primary key of effect line are kept.
+    """
+    def __init__(self, effect_keys, default_limit=None, parser_limits=None):
+        """
+        :param effect_keys: dict of primary keys of effect line, by primary key types
+        :param default_limit: number of kept clues of every parser, None keeps all clues
+        :param parser_limits: dict of numbers of kept clues, by parser names
+        """
+        self._effect_keys = effect_keys
+        self._default_limit = default_limit
+        self._parser_limits = parser_limits or {}
+
+    def get_limit(self, parser_name):
+        return self._parser_limits.get(parser_name, self._default_limit)
+
+    def get_effect_key(self, primary_key_type):
+        return self._effect_keys.get(primary_key_type)
+
+    def serialize(self):
+        effect_keys = dict(
+            (primary_key_type, PrimaryKeyValues.serialize(primary_key_type, effect_key))
+            for primary_key_type, effect_key in six.iteritems(self._effect_keys)
+        )
+        return {
+            'effect_keys': effect_keys,
+            'default_limit': self._default_limit,
+            'parser_limits': dict(self._parser_limits)
+        }
+
+
+class ReadSizePolicy(object):
+    """
+    Sizes of blocks read by backward scan of log file. Causes usually lie close
+    to the effect line, so scan starts with small block and sizes of next blocks grow
+    geometrically up to max size, so long scans are still done by few big reads.
+    """
+    def __init__(
+        self,
+        initial_size=ReadSizeConsts.INITIAL_SIZE,
+        growth_factor=ReadSizeConsts.GROWTH_FACTOR,
+        max_size=ReadSizeConsts.MAX_SIZE
+    ):
+        self.initial_size = initial_size
+        self.growth_factor = growth_factor
+        self.max_size = max_size
+
+    def block_sizes(self):
+        """
+        an infinite generator of sizes of consecutive blocks
+        """
+        size = min(self.initial_size, self.max_size)
+        while True:
+            yield size
+            size = min(size * self.growth_factor, self.max_size)
+
+    def serialize(self):
+        return {
+            'initial_size': self.initial_size,
+            'growth_factor': self.growth_factor,
+            'max_size': self.max_size
+        }
+
+
+class PrimaryKeyValues(object):
+    """
+    Converts primary key values and tolerances to JSON values and back:
+    dates are kept in ISO format and time tolerances in seconds.
+    """
+    @classmethod
+    def serialize(cls, primary_key_type, value):
+        if value is not None and primary_key_type == ConverterType.TO_DATE:
+            return value.isoformat()
+        return value
+
+    @classmethod
+    def deserialize(cls, primary_key_type, value):
+        if value is not None and primary_key_type == ConverterType.TO_DATE:
+            return CONVERTION_MAPPING[primary_key_type].convert(value)
+        return value
+
+    @classmethod
+    def serialize_tolerance(cls, primary_key_type, tolerance):
+        if primary_key_type == ConverterType.TO_DATE:
+            return tolerance.days * 86400 + tolerance.seconds + tolerance.microseconds / 1e6
+        return tolerance
+
+    @classmethod
+    def deserialize_tolerance(cls, primary_key_type, tolerance):
+        if primary_key_type == ConverterType.TO_DATE:
+            return timedelta(seconds=tolerance)
+        return tolerance
+
+
+class InvestigationStepFactory(object):
+    @classmethod
+    def from_dao(cls, serialized):
+        parsers = []
+        for serialized_parser in serialized['parsers']:
+            serialized_parser = dict(serialized_parser)
+            # JSON object keys are always strings
+            serialized_parser['convertions'] = dict(
+                (int(group), converter)
+                for group, converter in six.iteritems(serialized_parser['convertions'])
+            )
+            parsers.append(RegexParserFactory.from_dao(serialized_parser))
+        search_ranges = {}
+        for primary_key_type, bounds in six.iteritems(serialized['search_ranges']):
+            type_bounds = {}
+            for bound, value in zip(
+                (InvestigationStep.LEFT_BOUND, InvestigationStep.RIGHT_BOUND), bounds
+            ):
+                if value is not None:
+                    type_bounds[bound] = PrimaryKeyValues.deserialize(primary_key_type, value)
+            search_ranges[primary_key_type] = type_bounds
+        tolerances = dict(
+            (primary_key_type, PrimaryKeyValues.deserialize_tolerance(primary_key_type, tolerance))
+            for primary_key_type, tolerance in six.iteritems(serialized['tolerances'])
+        )
+        return InvestigationStep(
+            ParserSubsetFactory.create(
+                serialized['parser_subset_type'], parsers, serialized['bytes_lines']
+            ), search_ranges, tolerances,
+            cls._clue_retention_from_dao(serialized['clue_retention']),
+            ReadSizePolicy(**serialized['read_size_policy'])
+        )
+
+    @classmethod
+    def _clue_retention_from_dao(cls, serialized):
+        if serialized is None:
+            return None
+        effect_keys = dict(
+            (primary_key_type, PrimaryKeyValues.deserialize(primary_key_type, effect_key))
+            for primary_key_type, effect_key in six.iteritems(serialized['effect_keys'])
+        )
+        return ClueRetention(effect_keys, serialized['default_limit'], serialized['parser_limits'])
+
+
 class Clue(object):
     """
     Collects all the data that parser subset can extract from single log line.
     Also, contains parsed line and its source.
     """
+    # many clues are kept during investigation, slots make them smaller
+    __slots__ = ('_regex_parameters', '_line_prefix_content', 'line_offset', 'line_source')
 
     def __init__(self, regex_parameters, line_prefix_content, line_offset, line_source):
-        self.regex_parameters = regex_parameters
-        self.line_prefix_content = line_prefix_content
+        self._regex_parameters = regex_parameters
+        self._line_prefix_content = line_prefix_content
         self.line_offset = line_offset
         self.line_source = line_source
 
+    @property
+    def regex_parameters(self):
+        return self._regex_parameters
+
+    @property
+    def line_prefix_content(self):
+        return self._line_prefix_content
+
     def __repr__(self):
         if all(
             elem is None
@@ -136,6 +443,81 @@ class Clue(object):
         ))  # yapf: disable
 
 
+class LazyClue(Clue):
+    """
+    Clue which keeps only groups extracted from line (converted on demand by ConvertedGroups)
+    and position of line. Line content is read from log file when it's needed
+    for the first time, so clues which aren't part of any investigation result
+    don't keep their lines in memory.
+    """
+    __slots__ = ('_line_loader',)
+
+    def __init__(self, converted_groups, line_loader, line_offset, line_source):
+        super(LazyClue, self).__init__(converted_groups, None, line_offset, line_source)
+        self._line_loader = line_loader
+
+    @property
+    def line_prefix_content(self):
+        if self._line_prefix_content is None:
+            self._line_prefix_content = self._line_loader.load_line(
+                self.line_source.path, self.line_offset
+            )
+        return self._line_prefix_content
+
+
+class ConvertedGroups(object):
+    """
+    Tuple-like sequence of groups extracted from line by parser.
+    Every group is converted by parser when it's accessed for the first time
+    and converted value is memoized, so e.g. dates are parsed only for groups
+    used in constraints verification.
+    """
+    __slots__ = ('_parser', '_raw_groups', '_bytes_groups', '_converted')
+
+    def __init__(self, parser, raw_groups, bytes_groups=False, converted=None):
+        """
+        :param converted: dict of already converted groups, by their indexes
+        """
+        self._parser = parser
+        self._raw_groups = raw_groups
+        self._bytes_groups = bytes_groups
+        self._converted = converted
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._raw_groups)
+        if self._converted is None:
+            self._converted = {}
+        if index not in self._converted:
+            if self._bytes_groups:
+                converted = self._parser.convert_bytes_param(index, self._raw_groups[index])
+            else:
+                converted = self._parser.convert_param(index, self._raw_groups[index])
+            self._converted[index] = converted
+        return self._converted[index]
+
+    def __len__(self):
+        return len(self._raw_groups)
+
+    def __iter__(self):
+        for index in six.moves.range(len(self._raw_groups)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if other is None:
+            return False
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
 class LineSource(object):
     def __init__(self, host, path):
         self.host = host
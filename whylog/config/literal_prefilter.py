@@ -0,0 +1,182 @@
+import re
+from collections import deque
+
+import six
+
+from whylog.config.consts import LogEncoding
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+
+class RequiredLiteralExtractor(object):
+    """
+    Finds fragments of text which appear in every line matched by regex.
+    Regex is parsed by python re module parser, only literals which are not
+    inside of alternations, optional parts and case insensitive parts are taken into account.
+    """
+    REPEATS = frozenset(
+        getattr(sre_constants, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+        if hasattr(sre_constants, name)
+    )
+    GROUPS = frozenset(
+        getattr(sre_constants, name)
+        for name in ('SUBPATTERN', 'ATOMIC_GROUP') if hasattr(sre_constants, name)
+    )
+
+    @classmethod
+    def get_longest_literal(cls, regex_str):
+        """
+        returns the longest text required in lines matched by regex,
+        or None if regex can't be parsed or doesn't require any text
+        """
+        try:
+            parsed = sre_parse.parse(regex_str)
+        except (re.error, TypeError, ValueError, OverflowError, RuntimeError):
+            return None
+        if parsed.state.flags & re.IGNORECASE:
+            return None
+        literals = cls._get_required_literals(parsed)
+        if not literals:
+            return None
+        return max(literals, key=len)
+
+    @classmethod
+    def _get_required_literals(cls, parsed):
+        literals = []
+        current_literal = []
+        for operation, argument in parsed:
+            if operation == sre_constants.LITERAL:
+                current_literal.append(six.unichr(argument))
+                continue
+            if current_literal:
+                literals.append(''.join(current_literal))
+                current_literal = []
+            if operation in cls.GROUPS:
+                literals.extend(cls._get_group_literals(operation, argument))
+            elif operation in cls.REPEATS:
+                min_repeats, _, repeated = argument
+                if min_repeats > 0:
+                    literals.extend(cls._get_required_literals(repeated))
+        if current_literal:
+            literals.append(''.join(current_literal))
+        return literals
+
+    @classmethod
+    def _get_group_literals(cls, operation, argument):
+        if operation != sre_constants.SUBPATTERN:
+            return cls._get_required_literals(argument)
+        # in python 3.6+ argument is (group, add_flags, del_flags, pattern), before (group, pattern)
+        if len(argument) == 4 and argument[1] & re.IGNORECASE:
+            return []
+        return cls._get_required_literals(argument[-1])
+
+
+class LiteralPrefilter(object):
+    """
+    Rejects lines which can't be matched by any regex from the set, without running regexes.
+    Line passes the prefilter when it contains the longest required literal of any regex.
+    Substring search is done by str/bytes 'in' operator which works in C, so for
+    tens of regexes it's faster than an Aho-Corasick automaton written in python.
+    """
+    MIN_LITERAL_LENGTH = 3
+
+    def __init__(self, literals):
+        self._literals = tuple(literals)
+
+    @classmethod
+    def create(cls, regex_strs, bytes_lines=False):
+        """
+        returns prefilter for given regexes, or None when some regex doesn't require
+        literal long enough, so almost every line would pass the prefilter
+        """
+        literals = set()
+        for regex_str in regex_strs:
+            literal = RequiredLiteralExtractor.get_longest_literal(regex_str)
+            if literal is None or len(literal) < cls.MIN_LITERAL_LENGTH:
+                return None
+            literals.add(literal)
+        if bytes_lines:
+            literals = set(LogEncoding.encode_pattern(literal) for literal in literals)
+        return LiteralPrefilter(sorted(literals))
+
+    @property
+    def literals(self):
+        return self._literals
+
+    def may_match(self, line):
+        for literal in self._literals:
+            if literal in line:
+                return True
+        return False
+
+
+class LiteralAutomaton(object):
+    """
+    Aho-Corasick automaton finding which of given literals occur in text,
+    in single pass over text. Its cost doesn't depend on number of literals, so for
+    thousands of literals it's much faster than checking them one by one by 'in' operator.
+    Literals and texts should be both str or both bytes.
+    """
+    ROOT = 0
+
+    def __init__(self, literals):
+        self._transitions = [{}]
+        self._fallbacks = [self.ROOT]
+        self._found_literals = [()]
+        for literal in literals:
+            self._add_literal(literal)
+        self._set_fallbacks()
+
+    def _add_literal(self, literal):
+        state = self.ROOT
+        for symbol in literal:
+            next_state = self._transitions[state].get(symbol)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions.append({})
+                self._fallbacks.append(self.ROOT)
+                self._found_literals.append(())
+                self._transitions[state][symbol] = next_state
+            state = next_state
+        if literal not in self._found_literals[state]:
+            self._found_literals[state] += (literal,)
+
+    def _set_fallbacks(self):
+        """
+        fallback of state is the state of the longest proper suffix of its text,
+        which is a prefix of some literal. States are visited in order of text lengths,
+        so fallbacks of shorter texts are known
+        """
+        states = deque(six.itervalues(self._transitions[self.ROOT]))
+        while states:
+            state = states.popleft()
+            for symbol, next_state in six.iteritems(self._transitions[state]):
+                states.append(next_state)
+                fallback = self._fallbacks[state]
+                while fallback != self.ROOT and symbol not in self._transitions[fallback]:
+                    fallback = self._fallbacks[fallback]
+                fallback = self._transitions[fallback].get(symbol, self.ROOT)
+                self._fallbacks[next_state] = fallback
+                self._found_literals[next_state] += self._found_literals[fallback]
+
+    def find_literals(self, text):
+        """
+        returns set of literals which occur in text
+        """
+        transitions = self._transitions
+        fallbacks = self._fallbacks
+        found_literals = self._found_literals
+        found = set()
+        state = self.ROOT
+        for symbol in text:
+            while state != self.ROOT and symbol not in transitions[state]:
+                state = fallbacks[state]
+            state = transitions[state].get(symbol, self.ROOT)
+            if found_literals[state]:
+                found.update(found_literals[state])
+        return found
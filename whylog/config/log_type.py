@@ -1,5 +1,6 @@
 import itertools
 
+from whylog.config.file_catalog import FileCatalog
 from whylog.config.super_parser import RegexSuperParser
 
 DEFAULT_SUPER_REGEX = RegexSuperParser("", [], {})
@@ -10,23 +11,29 @@ class LogType(object):
     def __init__(self, name, filename_matchers):
         self.name = name
         self.filename_matchers = filename_matchers
+        self.file_catalog = FileCatalog()
 
     def files_to_parse(self, forced_log_type=None):
         """
         Gets all possible distinct tuples (host, file_name, super_parser) belonging to single log type
         It's information which files should be parsed by LogReader. Super parser has a information about
         inner log file structure
+        Lists of files matched by filename matchers are cached in file catalog of log type.
         """
         forced_log_type = forced_log_type or EMPTY_TUPLE
         parsed_files = set()
+        for host, path, super_parser in itertools.chain(
+            self._generate_forced_files(forced_log_type), self._generate_matched_files()
+        ):
+            file_source = (host, path)
+            if file_source not in parsed_files:
+                parsed_files.add(file_source)
+                yield host, path, super_parser
+
+    def _generate_matched_files(self):
         for matcher in self.filename_matchers:
-            for host, path, super_parser in itertools.chain(
-                self._generate_forced_files(forced_log_type), matcher.get_matched_files()
-            ):
-                file_source = (host, path)
-                if file_source not in parsed_files:
-                    parsed_files.add(file_source)
-                    yield host, path, super_parser
+            for matched_file in matcher.get_matched_files(self.file_catalog):
+                yield matched_file
 
     @classmethod
     def _generate_forced_files(cls, forced_log_type):
@@ -26,11 +26,9 @@ def mocked_investigation_plan():
     concatenated = ConcatenatedRegexParser([cause])
     effect_time = datetime(2015, 12, 3, 12, 8, 9)
     search_range = {
-        'default': {
-            'date': {
-                'left_bound': datetime(2015, 12, 3, 12, 8, 8),
-                'right_bound': effect_time
-            }
+        'date': {
+            InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, 8),
+            InvestigationStep.RIGHT_BOUND: effect_time
         }
     }
     default_investigation_step = InvestigationStep(concatenated, search_range)
@@ -1,8 +1,16 @@
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 
 import six
 from frozendict import frozendict
 
+from whylog.config.buffer_scanner import BufferScanner
+from whylog.config.consts import LogEncoding, ParserSubsetType
+from whylog.config.exceptions import UnsupportedParserSubsetType
+from whylog.config.literal_prefilter import (
+    LiteralAutomaton, LiteralPrefilter, RequiredLiteralExtractor
+)
+
 IMPORTED_RE = False
 
 try:
@@ -22,10 +30,94 @@ please install regex module. That will improve whylog performance.
 
 @six.add_metaclass(ABCMeta)
 class AbstractParserSubset(object):
+    # True when parser subset matches lines given as bytes, not decoded
+    bytes_lines = False
+    # BufferScanner finding lines of whole buffer which can be matched by parser subset,
+    # None when lines can be matched only one by one
+    buffer_scanner = None
+
+    def __init__(
+        self, parser_list, bytes_lines=False, literal_prefilter=True, buffer_scanning=True
+    ):
+        self._parsers = parser_list
+        self._parsers_dict = dict((parser.name, parser) for parser in self._parsers)
+        self._numbers_in_list = self._number_in_list()
+        self.bytes_lines = bytes_lines
+        self._prefilter = None
+        if literal_prefilter:
+            self._prefilter = LiteralPrefilter.create(
+                (parser.regex_str for parser in self._parsers), bytes_lines
+            )
+        if buffer_scanning:
+            self.buffer_scanner = BufferScanner.create(
+                (parser.regex_str for parser in self._parsers), bytes_lines, self._prefilter
+            )
+
+    def _number_in_list(self):
+        regex_numbers = {}
+        number = 0
+        for parser in self._parsers:
+            regex_numbers[parser.name] = number
+            number += 1
+        return regex_numbers
+
     @abstractmethod
     def get_extracted_parsers_params(self, line):
         pass
 
+    def get_parser(self, parser_name):
+        return self._parsers_dict[parser_name]
+
+    def get_parsers(self):
+        return self._parsers
+
+    def convert_parsers_groups_from_matched_line(self, line):
+        """
+        Converts extracted parsers groups dict, where groups are strings to dict where groups
+        was converted to proper type, which is defined in parser object.
+        Params come from only one line from logs.
+        Sample convertion:
+            line: "2015-12-03 12:10:10 Commited transaction number 2100. Host name: postgres_db"
+            params_dict : {
+                'commited_transaction' : ('2015-12-03 12:10:10', '2100', 'postgres_db')
+            }
+            return: {
+                'commited_transaction': (datetime(2015, 12, 3, 12, 10, 10), 2100, 'postgres_db')
+            }
+            commited_transaction is sample parser name which matches with line
+        """
+        params_dict = self.get_extracted_parsers_params(line)
+        converted_params = {}
+        for parser_name, params in six.iteritems(params_dict):
+            parser = self._parsers_dict[parser_name]
+            if self.bytes_lines:
+                converted_params[parser_name] = parser.convert_bytes_params(params)
+            else:
+                converted_params[parser_name] = parser.convert_params(params)
+        return converted_params
+
+    def get_matching_parsers(self, line):
+        """
+        Returns list of parsers matching with given line, in order of parsers of subset,
+        and dict of their names to tuples of extracted regex params
+        """
+        params_dict = dict(self.get_extracted_parsers_params(line))
+        matching_parsers = sorted(
+            (self._parsers_dict[parser_name] for parser_name in params_dict),
+            key=lambda parser: self._numbers_in_list[parser.name]
+        )
+        return matching_parsers, params_dict
+
+    def _get_params(self, parser, line):
+        if self.bytes_lines:
+            return parser.get_bytes_regex_params(line)
+        return parser.get_regex_params(line)
+
+    def decode_line(self, line):
+        if self.bytes_lines:
+            return LogEncoding.decode(line)
+        return line
+
 
 class ConcatenatedRegexParser(AbstractParserSubset):
     """
@@ -36,22 +128,34 @@ class ConcatenatedRegexParser(AbstractParserSubset):
     Sample backward concatenated regex: (e)|(d)|(c)|(b)|(a)
     where a, b, c, d, e are subregexes. Subregexes can have own groups
     We need to backward concatenated regex to check that only subregex matches with given line
+    Lines which don't contain required literal of any subregex are rejected
+    by LiteralPrefilter, before any regex is run. The prefilter can be turned off
+    by literal_prefilter flag, e.g. when almost every line contains some of these literals.
+    When buffer_scanning is set, BufferScanner is created, which allows searchers
+    to find candidate lines of whole buffer read from file at once.
+    When bytes_lines is set, regexes are compiled as bytes patterns and match lines read
+    from file without decoding them. Only groups extracted from matched lines are decoded.
     """
+    SUBSET_TYPE = ParserSubsetType.CONCATENATED
     NO_MATCH = frozendict()
 
-    def __init__(self, parser_list):
-        self._parsers = parser_list
-        self._parsers_dict = dict((parser.name, parser) for parser in self._parsers)
+    def __init__(
+        self, parser_list, bytes_lines=False, literal_prefilter=True, buffer_scanning=True
+    ):
+        super(ConcatenatedRegexParser,
+              self).__init__(parser_list, bytes_lines, literal_prefilter, buffer_scanning)
         if IMPORTED_RE:
             return
         forward, backward = self._create_concatenated_regexes()
+        if bytes_lines:
+            forward = LogEncoding.encode_pattern(forward)
+            backward = LogEncoding.encode_pattern(backward)
         self._forward_regex = regex.compile(forward)
         self._backward_regex = regex.compile(backward)
         self._forward_parsers_indexes = self._get_indexes_of_groups_for_parsers(self._parsers)
         self._backward_parsers_indexes = self._get_indexes_of_groups_for_parsers(
             reversed(self._parsers)
         )
-        self._numbers_in_list = self._number_in_list()
         self._forward_group_index_to_regex = self._create_group_index_to_regex_name(
             self._forward_parsers_indexes
         )
@@ -75,41 +179,12 @@ class ConcatenatedRegexParser(AbstractParserSubset):
             free_index += amount_of_group + 1
         return indexes_dict
 
-    def _number_in_list(self):
-        regex_numbers = {}
-        number = 0
-        for parser in self._parsers:
-            regex_numbers[parser.name] = number
-            number += 1
-        return regex_numbers
-
     def _create_group_index_to_regex_name(self, parsers_indexes):
         index_to_regex = {}
         for name, indexes in six.iteritems(parsers_indexes):
             index_to_regex[indexes[0]] = name
         return index_to_regex
 
-    def convert_parsers_groups_from_matched_line(self, line):
-        """
-        Converts extracted parsers groups dict, where groups are strings to dict where groups
-        was converted to proper type, which is defined in parser object.
-        Params come from only one line from logs.
-        Sample convertion:
-            line: "2015-12-03 12:10:10 Commited transaction number 2100. Host name: postgres_db"
-            params_dict : {
-                'commited_transaction' : ('2015-12-03 12:10:10', '2100', 'postgres_db')
-            }
-            return: {
-                'commited_transaction': (datetime(2015, 12, 3, 12, 10, 10), 2100, 'postgres_db')
-            }
-            commited_transaction is sample parser name which matches with line
-        """
-        params_dict = self.get_extracted_parsers_params(line)
-        converted_params = {}
-        for parser_name, parser in six.iteritems(params_dict):
-            converted_params[parser_name] = self._parsers_dict[parser_name].convert_params(parser)
-        return converted_params
-
     def get_extracted_parsers_params(self, line):
         """
         Extracts groups from subregexes that matched with given line
@@ -122,6 +197,8 @@ class ConcatenatedRegexParser(AbstractParserSubset):
             "lost_data_suffix": ("2015-12-03 12:11:00", "alfa21. Loss = 567.02 GB. Host name: 101"),
         }
         """
+        if self._prefilter is not None and not self._prefilter.may_match(line):
+            return ConcatenatedRegexParser.NO_MATCH
         # Handle case when regex module is not installed by matching many regexes
         if IMPORTED_RE:
             extracted_regex_params = {}
@@ -207,6 +284,85 @@ class ConcatenatedRegexParser(AbstractParserSubset):
 
     def _brute_subregexes_matching(self, extracted_regex_params, left, right, line):
         for i in six.moves.range(left, right + 1):
-            match = self._parsers[i].get_regex_params(line)
+            match = self._get_params(self._parsers[i], line)
             if match is not None:
                 extracted_regex_params[self._parsers[i].name] = match
+
+
+class RegexSetParser(AbstractParserSubset):
+    """
+    Finds all parsers matching given line, without concatenating their regexes.
+    Required literals of subregexes are found in line by LiteralAutomaton in single pass
+    over line, then only parsers whose literals occur in line (and parsers without
+    required literal) match line by their own regexes. Cost of line which doesn't contain
+    any literal doesn't depend on number of parsers, and when many parsers match the same
+    line, every one of them is matched only once.
+    Few literals are found faster by 'in' operator, so automaton is built only
+    for more than MAX_LITERALS_WITHOUT_AUTOMATON literals.
+    """
+    SUBSET_TYPE = ParserSubsetType.REGEX_SET
+    MAX_LITERALS_WITHOUT_AUTOMATON = 64
+
+    def __init__(
+        self, parser_list, bytes_lines=False, literal_prefilter=True, buffer_scanning=True
+    ):
+        super(RegexSetParser,
+              self).__init__(parser_list, bytes_lines, literal_prefilter, buffer_scanning)
+        self._parsers_by_literal = defaultdict(list)
+        self._parsers_without_literal = []
+        for parser in self._parsers:
+            literal = RequiredLiteralExtractor.get_longest_literal(parser.regex_str)
+            if literal is None:
+                self._parsers_without_literal.append(parser)
+                continue
+            if bytes_lines:
+                literal = LogEncoding.encode_pattern(literal)
+            self._parsers_by_literal[literal].append(parser)
+        self._literals = tuple(self._parsers_by_literal)
+        self._automaton = None
+        if len(self._literals) > self.MAX_LITERALS_WITHOUT_AUTOMATON:
+            self._automaton = LiteralAutomaton(self._literals)
+
+    def _find_literals(self, line):
+        if self._automaton is not None:
+            return self._automaton.find_literals(line)
+        return [literal for literal in self._literals if literal in line]
+
+    def get_extracted_parsers_params(self, line):
+        """
+        Extracts groups from subregexes that matched with given line
+        :param line: line from parsed file
+        :returns: dict of regexname to tuple of extracted regex params which match with line
+        """
+        extracted_regex_params = {}
+        for literal in self._find_literals(line):
+            self._match_parsers(self._parsers_by_literal[literal], line, extracted_regex_params)
+        self._match_parsers(self._parsers_without_literal, line, extracted_regex_params)
+        return extracted_regex_params
+
+    def _match_parsers(self, parsers, line, extracted_regex_params):
+        for parser in parsers:
+            match = self._get_params(parser, line)
+            if match is not None:
+                extracted_regex_params[parser.name] = match
+
+
+class ParserSubsetFactory(object):
+    SUBSET_CLASSES = dict(
+        (subset_class.SUBSET_TYPE, subset_class)
+        for subset_class in (ConcatenatedRegexParser, RegexSetParser)
+    )
+
+    @classmethod
+    def create(
+        cls,
+        subset_type,
+        parser_list,
+        bytes_lines=False,
+        literal_prefilter=True,
+        buffer_scanning=True
+    ):
+        subset_class = cls.SUBSET_CLASSES.get(subset_type)
+        if subset_class is None:
+            raise UnsupportedParserSubsetType(subset_type)
+        return subset_class(parser_list, bytes_lines, literal_prefilter, buffer_scanning)
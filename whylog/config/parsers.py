@@ -2,6 +2,7 @@ from abc import ABCMeta, abstractmethod
 
 import six
 
+from whylog.config.consts import LogEncoding
 from whylog.converters import CONVERTION_MAPPING, STRING
 from whylog.converters.exceptions import UnsupportedConverterError
 
@@ -44,16 +45,37 @@ class RegexParser(AbstractParser):
         self.name = name
         self.line_content = line_content
         self.regex_str = regex_str
-        self.regex = regex.compile(self.regex_str)
         self.primary_key_groups = primary_key_groups
         self.log_type = log_type
         self.convertions = convertions
+        self._regex = None
+        self._bytes_regex = None
+
+    @property
+    def regex(self):
+        if self._regex is None:
+            self._regex = regex.compile(self.regex_str)
+        return self._regex
+
+    @property
+    def bytes_regex(self):
+        if self._bytes_regex is None:
+            self._bytes_regex = regex.compile(LogEncoding.encode_pattern(self.regex_str))
+        return self._bytes_regex
 
     def get_regex_params(self, line):
         matches = self.regex.match(line)
         if matches is not None:
             return matches.groups()
 
+    def get_bytes_regex_params(self, line):
+        """
+        the same as get_regex_params, but for line given as bytes, groups are not decoded
+        """
+        matches = self.bytes_regex.match(line)
+        if matches is not None:
+            return matches.groups()
+
     def serialize(self):
         return {
             "name": self.name,
@@ -71,17 +93,28 @@ class RegexParser(AbstractParser):
             params: ('2015-12-03 12:10:10', '2100', 'postgres_db')
             return: (datetime(2015, 12, 3, 12, 10, 10), 2100, 'postgres_db')
         """
-        converted_params = []
-        for i in six.moves.range(len(params)):
-            group_type = self.convertions.get(i + 1, STRING)
-            if group_type == STRING:
-                converted_params.append(params[i])
-                continue
-            converter = CONVERTION_MAPPING.get(group_type)
-            if converter is None:
-                raise UnsupportedConverterError(group_type)
-            converted_params.append(converter.convert(params[i]))
-        return tuple(converted_params)
+        return tuple(self.convert_param(i, params[i]) for i in six.moves.range(len(params)))
+
+    def convert_param(self, group_index, param):
+        """
+        Converts single group, group_index is counted from 0
+        """
+        group_type = self.convertions.get(group_index + 1, STRING)
+        if group_type == STRING:
+            return param
+        converter = CONVERTION_MAPPING.get(group_type)
+        if converter is None:
+            raise UnsupportedConverterError(group_type)
+        return converter.convert(param)
+
+    def convert_bytes_params(self, params):
+        """
+        Decodes groups extracted from line given as bytes and converts them like convert_params
+        """
+        return self.convert_params(tuple(LogEncoding.decode(param) for param in params))
+
+    def convert_bytes_param(self, group_index, param):
+        return self.convert_param(group_index, LogEncoding.decode(param))
 
     def __repr__(self):
         return "(RegexParser: %s, %s, %s, %s, %s, %s)" % (
@@ -0,0 +1,50 @@
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6, backport installed by setup.py
+    from ordereddict import OrderedDict
+
+
+class PlanSkeleton(object):
+    """
+    Part of investigation plan which depends only on effect parsers matched by effect line:
+    rules suspected for effect and parser subsets of log types used in investigation.
+    """
+    def __init__(self, suspected_rules, concatenated_parsers):
+        self.suspected_rules = suspected_rules
+        self.concatenated_parsers = concatenated_parsers
+
+
+class PlanSkeletonCache(object):
+    """
+    Keeps at most max_size recently used plan skeletons, by names of matched effect parsers.
+    Skeletons depend on rules of config, so cache has to be cleared when rule is added.
+    Skeletons are ordered from the least recently used one, which is dropped when cache is full.
+    """
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._skeletons = OrderedDict()
+
+    @classmethod
+    def get_key(cls, matching_parsers):
+        return frozenset(parser.name for parser in matching_parsers)
+
+    def get(self, key):
+        skeleton = self._skeletons.pop(key, None)
+        if skeleton is not None:
+            self._skeletons[key] = skeleton
+        return skeleton
+
+    def put(self, key, skeleton):
+        if self._max_size <= 0:
+            return
+        self._skeletons.pop(key, None)
+        self._skeletons[key] = skeleton
+        while len(self._skeletons) > self._max_size:
+            self._skeletons.popitem(last=False)
+
+    def clear(self):
+        self._skeletons.clear()
+
+    def __len__(self):
+        return len(self._skeletons)
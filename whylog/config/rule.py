@@ -1,11 +1,15 @@
+import datetime
 import itertools
 from abc import ABCMeta, abstractmethod
 
 import six
 
 from whylog.config.parsers import RegexParserFactory
+from whylog.constraints import TimeConstraint
+from whylog.constraints.const import ConstraintType
 from whylog.constraints.constraint_manager import ConstraintManager
 from whylog.constraints.verifier import Verifier
+from whylog.converters import ConverterType
 
 
 class Rule(object):
@@ -57,6 +61,69 @@ class Rule(object):
     def get_effect_name(self):
         return self._effect.name
 
+    def get_causes_search_ranges(self, effect_clue):
+        """
+        returns list of (primary key type, left bound, right bound) for every cause,
+        bounds are dates of cause primary key allowed by time delta constraints joining it
+        with the effect, undefined bound is None. Causes without such constraints
+        and all causes of rules with other linkage than AND get None instead of range,
+        because their clues aren't rejected by any constraint.
+        """
+        causes_ranges = []
+        for cause_nr, cause in enumerate(self._causes, 1):
+            left_bound, right_bound = None, None
+            if self._linkage == self.LINKAGE_AND:
+                for constraint in self._constraints:
+                    bounds = self._get_time_delta_bounds(constraint, cause_nr, cause, effect_clue)
+                    if bounds is not None:
+                        left_bound = self._narrow_bound(left_bound, bounds[0], max)
+                        right_bound = self._narrow_bound(right_bound, bounds[1], min)
+            if left_bound is None and right_bound is None:
+                causes_ranges.append(None)
+            else:
+                causes_ranges.append((ConverterType.TO_DATE, left_bound, right_bound))
+        return causes_ranges
+
+    @classmethod
+    def _narrow_bound(cls, bound, other_bound, choose):
+        if bound is None:
+            return other_bound
+        if other_bound is None:
+            return bound
+        return choose(bound, other_bound)
+
+    @classmethod
+    def _get_time_delta_bounds(cls, constraint, cause_nr, cause, effect_clue):
+        """
+        returns (left bound, right bound) of cause primary key date implied by time delta
+        constraint, or None when constraint doesn't join it with date of the effect
+        """
+        if constraint['name'] != ConstraintType.TIME_DELTA:
+            return None
+        (earlier_nr, earlier_group), (later_nr, later_group) = constraint['clues_groups']
+        if (earlier_nr, later_nr) == (cause_nr, 0):
+            cause_group, effect_group, sign = earlier_group, later_group, -1
+        elif (earlier_nr, later_nr) == (0, cause_nr):
+            cause_group, effect_group, sign = later_group, earlier_group, 1
+        else:
+            return None
+        if cause_group not in cause.primary_key_groups:
+            return None
+        if cause.convertions.get(cause_group) != ConverterType.TO_DATE:
+            return None
+        effect_date = effect_clue.regex_parameters[effect_group - 1]
+        if not isinstance(effect_date, datetime.datetime):
+            return None
+        bounds = []
+        for param in (TimeConstraint.MIN_DELTA, TimeConstraint.MAX_DELTA):
+            delta = constraint['params'].get(param)
+            if delta is not None:
+                delta = effect_date + sign * datetime.timedelta(seconds=float(delta))
+            bounds.append(delta)
+        if sign < 0:
+            bounds.reverse()
+        return tuple(bounds)
+
     def constraints_check(self, clues, effect_clues_dict):
         """
         check if given clues satisfy rule
@@ -4,7 +4,7 @@ from abc import abstractmethod
 import six
 import yaml
 
-from whylog.config.consts import YamlFileNames
+from whylog.config.consts import ConfigCacheConsts, SqliteFileNames, YamlFileNames
 
 
 class AbstractSettingsFactory(object):
@@ -53,6 +53,17 @@ class YamlSettingsFactory(AbstractSettingsFactory):
             path = os.path.join(whylog_dir, file_name)
             cls._create_empty_file(path)
             settings[key] = path
+        settings['config_cache_dir'] = os.path.join(whylog_dir, ConfigCacheConsts.DIRECTORY_NAME)
         settings['pattern_assistant'] = cls.DEFAULT_PATTERN_ASSISTANT
         settings['config_type'] = 'yaml'
         return settings
+
+
+class SqliteSettingsFactory(AbstractSettingsFactory):
+    @classmethod
+    def _create_settings_dict(cls, whylog_dir):
+        return {
+            'database_path': os.path.join(whylog_dir, SqliteFileNames.config),
+            'pattern_assistant': cls.DEFAULT_PATTERN_ASSISTANT,
+            'config_type': 'sqlite'
+        }
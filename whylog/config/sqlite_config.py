@@ -0,0 +1,222 @@
+import json
+from collections import defaultdict
+
+import six
+
+from whylog.config.abstract_config import AbstractConfig
+from whylog.config.exceptions import UnsupportedConfigType, UnsupportedFilenameMatcher
+from whylog.config.filename_matchers import WildCardFilenameMatcherFactory
+from whylog.config.log_type import LogType
+from whylog.config.parser_name_generator import ParserNameGenerator
+from whylog.config.parsers import RegexParserFactory
+from whylog.config.rule import RegexRuleFactory
+
+try:
+    import sqlite3
+except ImportError:
+    # e.g. Jython, whose standard library has no sqlite3
+    sqlite3 = None
+
+
+class LazyDefinitions(object):
+    """
+    Mapping of config definitions, the value of key is loaded by load_value(key)
+    when key is used for the first time. load_value raises KeyError for not existing keys.
+    """
+    def __init__(self, load_value):
+        self._load_value = load_value
+        self._values = {}
+
+    def __getitem__(self, key):
+        value = self._values.get(key)
+        if value is None:
+            value = self._load_value(key)
+            self._values[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, value):
+        return self._values.setdefault(key, value)
+
+
+class SqliteConfig(AbstractConfig):
+    """
+    Keeps parsers, rules and filename matchers in single SQLite database, indexed by parser names,
+    log types and effect names. Parsers of log type and rules of effect parser are loaded
+    when they are needed for the first time, so investigation loads only definitions it uses.
+    Rule is added together with its new parsers in single transaction. Loaded definitions
+    are dropped when other process has changed database, so its rules are seen
+    by the next investigation.
+    """
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS parsers ("
+        "name TEXT PRIMARY KEY, log_type TEXT NOT NULL, definition TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS parsers_by_log_type ON parsers (log_type)",
+        "CREATE TABLE IF NOT EXISTS rules ("
+        "rule_id INTEGER PRIMARY KEY, effect TEXT NOT NULL, definition TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS rules_by_effect ON rules (effect)",
+        "CREATE TABLE IF NOT EXISTS filename_matchers ("
+        "matcher_id INTEGER PRIMARY KEY, log_type TEXT NOT NULL, definition TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS filename_matchers_by_log_type "
+        "ON filename_matchers (log_type)",
+    )  # yapf: disable
+    MATCHER_FACTORIES = {'WildCardFilenameMatcher': WildCardFilenameMatcherFactory}
+    # tables whose rows are only inserted, so their highest row ids change with every write
+    VERSIONED_TABLES = ('parsers', 'rules', 'filename_matchers')
+
+    def __init__(self, database_path):
+        if sqlite3 is None:
+            raise UnsupportedConfigType('sqlite')
+        self._database_path = database_path
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+        self._data_version = self._get_data_version()
+        super(SqliteConfig, self).__init__()
+
+    def close(self):
+        self._connection.close()
+
+    def _get_data_version(self):
+        row = self._connection.execute("PRAGMA data_version").fetchone()
+        if row is not None:
+            return row[0]
+        # SQLite older than 3.8.8 has no data_version pragma
+        return tuple(
+            self._connection.execute("SELECT max(rowid) FROM %s" % (table,)).fetchone()[0]
+            for table in self.VERSIONED_TABLES
+        )
+
+    @classmethod
+    def _with_int_keys(cls, convertions):
+        # JSON object keys are always strings
+        return dict((int(group), converter) for group, converter in six.iteritems(convertions))
+
+    @classmethod
+    def _parser_from_definition(cls, definition):
+        serialized_parser = json.loads(definition)
+        serialized_parser['convertions'] = cls._with_int_keys(serialized_parser['convertions'])
+        return RegexParserFactory.from_dao(serialized_parser)
+
+    def _select_parser(self, parser_name):
+        row = self._connection.execute(
+            "SELECT definition FROM parsers WHERE name = ?", (parser_name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(parser_name)
+        return self._parser_from_definition(row[0])
+
+    def _select_parsers_of_log_type(self, log_type_name):
+        return [
+            self._parsers.setdefault(name, self._parser_from_definition(definition))
+            for name, definition in self._connection.execute(
+                "SELECT name, definition FROM parsers WHERE log_type = ? ORDER BY rowid",
+                (log_type_name,)
+            )
+        ]
+
+    def _select_rules_of_effect(self, effect_name):
+        return [
+            RegexRuleFactory.from_dao(json.loads(definition), self._parsers)
+            for definition, in self._connection.execute(
+                "SELECT definition FROM rules WHERE effect = ? ORDER BY rule_id", (effect_name,)
+            )
+        ]
+
+    def _load_parsers(self):
+        return LazyDefinitions(self._select_parser)
+
+    def _load_parsers_grouped_by_log_type(self):
+        return LazyDefinitions(self._select_parsers_of_log_type)
+
+    def _load_rules(self):
+        return LazyDefinitions(self._select_rules_of_effect)
+
+    def _load_log_types(self):
+        matchers = defaultdict(list)
+        for log_type_name, definition in self._connection.execute(
+            "SELECT log_type, definition FROM filename_matchers ORDER BY matcher_id"
+        ):
+            serialized_matcher = json.loads(definition)
+            matcher_class_name = serialized_matcher['matcher_class_name']
+            factory_class = self.MATCHER_FACTORIES.get(matcher_class_name)
+            if factory_class is None:
+                raise UnsupportedFilenameMatcher(matcher_class_name)
+            super_parser = serialized_matcher['super_parser']
+            super_parser['convertions'] = self._with_int_keys(super_parser['convertions'])
+            matchers[log_type_name].append(factory_class.from_dao(serialized_matcher))
+        return dict(
+            (log_type_name, LogType(log_type_name, log_type_matchers))
+            for log_type_name, log_type_matchers in six.iteritems(matchers)
+        )
+
+    def _drop_loaded_definitions(self):
+        self._parsers = self._load_parsers()
+        self._parsers_grouped_by_log_type = self._load_parsers_grouped_by_log_type()
+        self._parser_name_generator = ParserNameGenerator(self._parsers)
+        self._rules = self._load_rules()
+        self._plan_cache.clear()
+        self._effect_matchers = {}
+
+    def _drop_definitions_changed_by_others(self):
+        data_version = self._get_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._drop_loaded_definitions()
+
+    def create_investigation_plan(self, front_input, log_type):
+        self._drop_definitions_changed_by_others()
+        return super(SqliteConfig, self).create_investigation_plan(front_input, log_type)
+
+    def add_rule(self, user_rule_intent):
+        """
+        inserts rule and its new parsers in single transaction, loaded definitions are dropped,
+        so they are loaded again together with added ones
+        """
+        self._drop_definitions_changed_by_others()
+        created_rule = RegexRuleFactory.create_from_intent(user_rule_intent)
+        created_parsers = created_rule.get_new_parsers(self._parser_name_generator)
+        with self._connection:
+            self._save_rule_definition(created_rule.serialize())
+            self._save_parsers_definition(parser.serialize() for parser in created_parsers)
+        self._drop_loaded_definitions()
+
+    def add_filename_matcher_to_log_type(self, matcher):
+        with self._connection:
+            super(SqliteConfig, self).add_filename_matcher_to_log_type(matcher)
+
+    def _save_rule_definition(self, rule_definition):
+        self._connection.execute(
+            "INSERT INTO rules (effect, definition) VALUES (?, ?)",
+            (rule_definition['effect'], json.dumps(rule_definition))
+        )
+
+    def _save_parsers_definition(self, parser_definitions):
+        self._connection.executemany(
+            "INSERT INTO parsers (name, log_type, definition) VALUES (?, ?, ?)", (
+                (definition['name'], definition['log_type'], json.dumps(definition))
+                for definition in parser_definitions
+            )
+        )
+
+    def _save_filename_matcher_definition(self, matcher_definition):
+        self._connection.execute(
+            "INSERT INTO filename_matchers (log_type, definition) VALUES (?, ?)",
+            (matcher_definition['log_type_name'], json.dumps(matcher_definition))
+        )
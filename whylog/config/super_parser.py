@@ -3,6 +3,7 @@ from abc import ABCMeta, abstractmethod
 
 import six
 
+from whylog.config.consts import LogEncoding
 from whylog.converters import CONVERTION_MAPPING, STRING
 
 
@@ -16,6 +17,22 @@ class AbstractSuperParser(object):
         """
         pass
 
+    @abstractmethod
+    def get_ordered_groups_from_bytes(self, line):
+        """
+        The same as get_ordered_groups, but for line given as bytes.
+        Only matched groups are decoded.
+        """
+        pass
+
+    @abstractmethod
+    def get_primary_key_type(self):
+        """
+        This method returns convertion type of the first group returned by get_ordered_groups,
+        or None if super parser doesn't extract primary key
+        """
+        pass
+
 
 class RegexSuperParser(AbstractSuperParser):
     NO_PRIMARY_KEY = tuple()
@@ -24,6 +41,13 @@ class RegexSuperParser(AbstractSuperParser):
         self.regex = re.compile(regex_str)
         self.group_order = group_order
         self.convertions = convertions
+        self._bytes_regex = None
+
+    @property
+    def bytes_regex(self):
+        if self._bytes_regex is None:
+            self._bytes_regex = re.compile(LogEncoding.encode_pattern(self.regex.pattern))
+        return self._bytes_regex
 
     def serialize(self):
         return {
@@ -35,6 +59,11 @@ class RegexSuperParser(AbstractSuperParser):
     def __eq__(self, other):
         return self.serialize() == other.serialize()
 
+    def get_primary_key_type(self):
+        if not self.group_order:
+            return None
+        return self.convertions.get(self.group_order[0], STRING)
+
     def get_ordered_groups(self, line):
         """
         Example:
@@ -51,7 +80,15 @@ class RegexSuperParser(AbstractSuperParser):
         match = self.regex.match(line)
         if not match:
             return self.NO_PRIMARY_KEY
-        groups = match.groups()
+        return self._convert_groups(match.groups())
+
+    def get_ordered_groups_from_bytes(self, line):
+        match = self.bytes_regex.match(line)
+        if not match:
+            return self.NO_PRIMARY_KEY
+        return self._convert_groups(tuple(LogEncoding.decode(group) for group in match.groups()))
+
+    def _convert_groups(self, groups):
         result = []
         for group_nr in self.group_order:
             convertion_type = self.convertions.get(group_nr)
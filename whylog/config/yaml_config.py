@@ -1,13 +1,29 @@
 import yaml
 
 from whylog.config.abstract_file_config import AbstractFileConfig
+from whylog.config.config_cache import ConfigCache
 
 
 class YamlConfig(AbstractFileConfig):
-    def __init__(self, parsers_path, rules_path, log_types_path):
+    def __init__(self, parsers_path, rules_path, log_types_path, config_cache_dir=None):
+        """
+        :param config_cache_dir: directory in which documents loaded from YAML files are cached
+                                 in binary files, so next loads of unchanged config
+                                 don't parse YAML. None means that config isn't cached.
+                                 Settings created by YamlSettingsFactory set it.
+        """
+        self._config_cache = None
+        if config_cache_dir is not None:
+            self._config_cache = ConfigCache(config_cache_dir)
         super(YamlConfig, self).__init__(parsers_path, rules_path, log_types_path)
 
     def _load_file_with_config(self, path):
+        if self._config_cache is not None:
+            return self._config_cache.load(path, self._parse_file_with_config)
+        return self._parse_file_with_config(path)
+
+    @classmethod
+    def _parse_file_with_config(cls, path):
         with open(path, "r") as config_file:
             return list(yaml.load_all(config_file))
 
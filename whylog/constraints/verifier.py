@@ -1,5 +1,7 @@
 import itertools
 
+import six
+
 from whylog.config.investigation_plan import Clue
 from whylog.constraints.exceptions import TooManyConstraintsToNegate
 from whylog.front.utils import FrontInput
@@ -34,7 +36,7 @@ class Verifier(object):
             if parser_num == 0:
                 groups.append(effect.regex_parameters[group_num - 1])
             else:
-                if combination[parser_num - 1] == Verifier.UNMATCHED:
+                if combination[parser_num - 1] is Verifier.UNMATCHED:
                     return False
                 groups.append(combination[parser_num - 1].regex_parameters[group_num - 1])
         return constraint_verifier.verify(groups, constraint['params'])
@@ -67,10 +69,13 @@ class Verifier(object):
         """
         if len(clues_tuples) != 0:
             first_list, repetitions_number = clues_tuples[0]
-            for clues in itertools.permutations(first_list, repetitions_number):
-                for subset in cls._clues_combinations(
-                    clues_tuples[1:], collected_subset + list(clues)
-                ):
+            # indexes are permuted instead of clues, so clues from ClueStore columns
+            # are created only for visited combinations, not all at once
+            for indexes in itertools.permutations(
+                six.moves.range(len(first_list)), repetitions_number
+            ):
+                clues = [first_list[index] for index in indexes]
+                for subset in cls._clues_combinations(clues_tuples[1:], collected_subset + clues):
                     yield subset
         else:
             yield collected_subset
@@ -88,7 +93,7 @@ class Verifier(object):
     @classmethod
     def _pack_results_for_constraint_or(cls, combination, constraints):
         return cls._create_investigation_result(
-            (clue for clue in combination if not clue == Verifier.UNMATCHED), constraints,
+            (clue for clue in combination if clue is not Verifier.UNMATCHED), constraints,
             InvestigationResult.OR
         )
 
@@ -182,13 +187,23 @@ class InvestigationResult(object):
     OR = "OR"
     NOT = "NOT"
 
-    def __init__(self, lines, constraints, cons_linkage):
+    def __init__(self, lines, constraints, cons_linkage, dropped_clues=None):
+        """
+        :param dropped_clues: dict of numbers of clues dropped because of retention limits
+        of cause parsers, by parser names
+        """
         self.lines = lines
         self.constraints = constraints
         self.constraints_linkage = cons_linkage
+        self.dropped_clues = dropped_clues or {}
 
     def __repr__(self):
         if self.constraints_linkage in [self.AND, self.OR]:
+            if self.dropped_clues:
+                return (
+                    "\n(\n    result lines: %s;\n    due to '%s' constraints: %s;"
+                    "\n    dropped clues: %s\n)"
+                ) % (self.lines, self.constraints_linkage, self.constraints, self.dropped_clues)
             return "\n(\n    result lines: %s;\n    due to '%s' constraints: %s\n)" % (
                 self.lines, self.constraints_linkage, self.constraints
             )
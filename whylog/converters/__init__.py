@@ -1,4 +1,6 @@
+import re
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
 
 import dateutil.parser
 import six
@@ -51,10 +53,30 @@ class StringConverter(AbstractConverter):
 
 #TODO: Simple date convertion will replace for concreate date format converter in the future
 class DateConverter(AbstractConverter):
+    # dates in this format are converted without dateutil, which is much slower
+    ISO_DATE_REGEX = re.compile(r'(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:[.,](\d{1,6}))?$')
+
     @classmethod
     def convert(cls, pattern_group):
+        try:
+            match = cls.ISO_DATE_REGEX.match(pattern_group)
+        except TypeError:
+            match = None
+        if match is not None:
+            try:
+                return cls._convert_iso_date(match)
+            except ValueError:
+                pass
         return dateutil.parser.parse(pattern_group, fuzzy=True)
 
+    @classmethod
+    def _convert_iso_date(cls, match):
+        year, month, day, hour, minute, second, fraction = match.groups()
+        return datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            int(fraction.ljust(6, '0')) if fraction else 0
+        )
+
     @classmethod
     def safe_convert(cls, pattern_group):
         try:
@@ -1,12 +1,13 @@
-import itertools
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
 
 import six
 from frozendict import frozendict
 
-from whylog.log_reader.exceptions import NoLogTypeError
-from whylog.log_reader.investiagtion_utils import InvestigationUtils
+from whylog.log_reader.async_search import AsyncFileScan, asyncio, create_future, get_loop
+from whylog.log_reader.clue_store import ClueStore
+from whylog.log_reader.exceptions import AsyncioUnavailable, NoLogTypeError
+from whylog.log_reader.parallel_search import ParallelSearch
+from whylog.log_reader.search_agent import RemoteSearch
 from whylog.log_reader.searchers import BacktrackSearcher
 
 EMPTY_FROZEN_DICT = frozendict()
@@ -24,19 +25,64 @@ class AbstractLogReader(object):
 
 
 class LogReader(AbstractLogReader):
-    def __init__(self, config):
+    def __init__(self, config, searcher_class=BacktrackSearcher, workers=None):
+        """
+        :param searcher_class: AbstractSearcher subclass used to search single file,
+                               e.g. IndexSearcher for files investigated repeatedly
+        :param workers: number of worker processes scanning files in parallel,
+                        None means that files are scanned one after another in this process.
+                        Workers are started by the first investigation and kept until close()
+        """
         self.config = config
+        self._searcher_class = searcher_class
+        self._parallel_search = None
+        if workers is not None:
+            self._parallel_search = ParallelSearch(searcher_class, workers)
 
-    def get_causes(self, front_input, tmp_assign_to_log_type=EMPTY_FROZEN_DICT):
+    def close(self):
+        """
+        stops worker processes of parallel investigations
+        """
+        if self._parallel_search is not None:
+            self._parallel_search.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _create_investigation_plan(self, front_input, tmp_assign_to_log_type):
         input_line_source = front_input.line_source
         input_log_type = self._get_input_log_type(tmp_assign_to_log_type, input_line_source) or \
                          self.config.get_log_type(input_line_source)
         if not input_log_type:
             raise NoLogTypeError(input_line_source)
-        investigation_plan = self.config.create_investigation_plan(front_input, input_log_type)
-        manager = SearchManager(investigation_plan)
+        return self.config.create_investigation_plan(front_input, input_log_type)
+
+    def get_causes(self, front_input, tmp_assign_to_log_type=EMPTY_FROZEN_DICT):
+        investigation_plan = self._create_investigation_plan(front_input, tmp_assign_to_log_type)
+        manager = SearchManager(investigation_plan, self._searcher_class, self._parallel_search)
         return manager.investigate(front_input, tmp_assign_to_log_type)
 
+    def get_causes_async(
+        self, front_input, tmp_assign_to_log_type=EMPTY_FROZEN_DICT, loop=None, executor=None
+    ):
+        """
+        asyncio version of get_causes, files are read in executor
+        and scanned concurrently without blocking the event loop
+        :param loop: event loop of investigation, when it's None, get_causes_async
+                     has to be called in coroutine, and the running loop is used
+        :return: asyncio future of list of InvestigationResults
+        """
+        if asyncio is None:
+            raise AsyncioUnavailable()
+        investigation_plan = self._create_investigation_plan(front_input, tmp_assign_to_log_type)
+        manager = AsyncSearchManager(
+            investigation_plan, self._searcher_class, get_loop(loop), executor
+        )
+        return manager.investigate_async(front_input, tmp_assign_to_log_type)
+
     @classmethod
     def _get_input_log_type(cls, tmp_assign_to_log_type, input_line_source):
         for log_type, line_sources in six.iteritems(tmp_assign_to_log_type):
@@ -48,14 +94,14 @@ class LogReader(AbstractLogReader):
 
 
 class SearchManager(object):
-    def __init__(self, investigation_plan):
+    def __init__(self, investigation_plan, searcher_class=BacktrackSearcher, parallel_search=None):
+        """
+        :param parallel_search: ParallelSearch scanning files in worker processes,
+                                None means that files are scanned in this process
+        """
         self._investigation_plan = investigation_plan
-
-    @classmethod
-    def _save_clues_in_normal_dict(cls, collector):
-        return dict(
-            (parser_name, list(clues_iter)) for parser_name, clues_iter in six.iteritems(collector)
-        )
+        self._searcher_class = searcher_class
+        self._parallel_search = parallel_search
 
     def _constraints_verification(self, clues):
         """
@@ -65,9 +111,24 @@ class SearchManager(object):
         causes = []
         for rule in self._investigation_plan.suspected_rules:
             results_from_rule = rule.constraints_check(clues, self._investigation_plan.effect_clues)
+            dropped_clues = self._get_dropped_clues(rule, clues)
+            for result in results_from_rule:
+                result.dropped_clues = dropped_clues
             causes.extend(results_from_rule)
         return causes
 
+    @classmethod
+    def _get_dropped_clues(cls, rule, clues):
+        """
+        returns numbers of clues of rule causes dropped because of retention limits
+        """
+        dropped_clues = {}
+        for parser in rule.get_causes_parsers():
+            dropped_count = clues.get_dropped_count(parser.name)
+            if dropped_count:
+                dropped_clues[parser.name] = dropped_count
+        return dropped_clues
+
     def investigate(self, original_front_input, tmp_assign_to_log_type=EMPTY_FROZEN_DICT):
         """
         this function collects clues from SearchHandlers
@@ -76,31 +137,144 @@ class SearchManager(object):
         and then provide their verification with constraints
         :return: list of InvestigationResults
         """
-        clues_collector = defaultdict(itertools.chain)
+        clues_collector = ClueStore()
+        remote_search = RemoteSearch(
+            self._get_remote_requests(original_front_input, tmp_assign_to_log_type)
+        ).start()
+        if self._parallel_search is None:
+            for step, log_type in self._investigation_plan.investigation_steps_with_log_types:
+                search_handler = SearchHandler(step, log_type, self._searcher_class)
+                clues_collector.merge(
+                    search_handler.investigate(
+                        original_front_input, tmp_assign_to_log_type.get(log_type)
+                    )
+                )
+        else:
+            for clues_from_file in self._investigate_in_parallel(
+                original_front_input, tmp_assign_to_log_type
+            ):
+                clues_collector.merge(clues_from_file)
+        for clues_from_host in remote_search.wait():
+            clues_collector.merge(clues_from_host)
+        return self._constraints_verification(clues_collector)
+
+    def _get_remote_requests(self, original_front_input, tmp_assign_to_log_type):
+        """
+        returns list of requests of RemoteSearch, which searches files of other hosts
+        by search agents running on these hosts
+        """
+        requests = []
         for step, log_type in self._investigation_plan.investigation_steps_with_log_types:
-            search_handler = SearchHandler(step, log_type)
-            InvestigationUtils.merge_clue_dicts(
-                clues_collector, search_handler.investigate(
-                    original_front_input, tmp_assign_to_log_type.get(log_type)
+            search_handler = SearchHandler(step, log_type, self._searcher_class)
+            for host, path_pattern, super_parser in search_handler.remote_files_to_search(
+                tmp_assign_to_log_type.get(log_type)
+            ):
+                requests.append((host, step, path_pattern, super_parser, original_front_input))
+        return requests
+
+    def _investigate_in_parallel(self, original_front_input, tmp_assign_to_log_type):
+        """
+        fans out scans of all files from all investigation steps to worker processes,
+        returned clues dicts are ordered like in sequential investigation
+        """
+        investigation_steps = []
+        tasks = []
+        for step_nr, (step, log_type) in enumerate(
+            self._investigation_plan.investigation_steps_with_log_types
+        ):
+            investigation_steps.append(step)
+            search_handler = SearchHandler(step, log_type, self._searcher_class)
+            for path, super_parser in search_handler.files_to_search(
+                tmp_assign_to_log_type.get(log_type)
+            ):
+                tasks.append((step_nr, path, super_parser, original_front_input))
+        if not tasks:
+            return []
+        return self._parallel_search.search(investigation_steps, tasks)
+
+
+class AsyncSearchManager(SearchManager):
+    """
+    Runs scans of all files from all investigation steps as concurrent asyncio tasks.
+    Clues are merged in the same order as in sequential investigation.
+    """
+    def __init__(
+        self, investigation_plan, searcher_class=BacktrackSearcher, loop=None, executor=None
+    ):
+        super(AsyncSearchManager, self).__init__(investigation_plan, searcher_class)
+        self._loop = loop
+        self._executor = executor
+
+    def investigate_async(self, original_front_input, tmp_assign_to_log_type=EMPTY_FROZEN_DICT):
+        """
+        :return: asyncio future of list of InvestigationResults
+        """
+        scans = []
+        for step, log_type in self._investigation_plan.investigation_steps_with_log_types:
+            search_handler = SearchHandler(step, log_type, self._searcher_class)
+            for path, super_parser in search_handler.files_to_search(
+                tmp_assign_to_log_type.get(log_type)
+            ):
+                searcher = self._searcher_class(path, step, super_parser)
+                scans.append(
+                    AsyncFileScan(searcher, original_front_input, self._loop,
+                                  self._executor).start()
                 )
+        remote_requests = self._get_remote_requests(original_front_input, tmp_assign_to_log_type)
+        if remote_requests:
+            scans.append(
+                self._loop.run_in_executor(self._executor,
+                                           RemoteSearch(remote_requests).search)
             )
-        clues = self._save_clues_in_normal_dict(clues_collector)
-        return self._constraints_verification(clues)
+        result = create_future(self._loop)
+        if not scans:
+            result.set_result(self._constraints_verification(ClueStore()))
+            return result
+        files_scanned = asyncio.gather(*scans)
+        files_scanned.add_done_callback(lambda scanned: self._on_files_scanned(scanned, result))
+        return result
+
+    def _on_files_scanned(self, scanned, result):
+        if result.done():
+            return
+        if scanned.cancelled():
+            result.cancel()
+            return
+        if scanned.exception() is not None:
+            result.set_exception(scanned.exception())
+            return
+        clues_collector = ClueStore()
+        for clues_from_file in scanned.result():
+            clues_collector.merge(clues_from_file)
+        result.set_result(self._constraints_verification(clues_collector))
 
 
 class SearchHandler(object):
-    def __init__(self, investigation_step, log_type):
+    def __init__(self, investigation_step, log_type, searcher_class=BacktrackSearcher):
         self._investigation_step = investigation_step
         self._log_type = log_type
+        self._searcher_class = searcher_class
 
-    def investigate(self, original_front_input, forced_log_type=None):
-        clues = defaultdict(itertools.chain)
+    def files_to_search(self, forced_log_type=None):
         for host, path, super_parser in self._log_type.files_to_parse(forced_log_type):
             if host == "localhost":
-                searcher = BacktrackSearcher(path, self._investigation_step, super_parser)
-                InvestigationUtils.merge_clue_dicts(clues, searcher.search(original_front_input))
-            else:
-                raise NotImplementedError(
-                    "Cannot operate on %s which is different than %s" % (host, "localhost")
-                )
+                yield path, super_parser
+
+    def remote_files_to_search(self, forced_log_type=None):
+        """
+        returns generator of tuples (host, path pattern, super parser) of files
+        of other hosts, which are searched by search agents running on these hosts
+        """
+        for host, path_pattern, super_parser in self._log_type.files_to_parse(forced_log_type):
+            if host != "localhost":
+                yield host, path_pattern, super_parser
+
+    def investigate(self, original_front_input, forced_log_type=None):
+        """
+        searches files of localhost, files of other hosts are searched by RemoteSearch
+        """
+        clues = ClueStore()
+        for path, super_parser in self.files_to_search(forced_log_type):
+            searcher = self._searcher_class(path, self._investigation_step, super_parser)
+            clues.merge(searcher.search(original_front_input))
         return clues
@@ -0,0 +1,127 @@
+import itertools
+import threading
+
+from whylog.log_reader.const import AsyncConsts
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+def get_loop(loop=None):
+    """
+    returns given loop or, when it's None, the loop running in current thread,
+    so without loop it has to be called from coroutine or callback of running loop.
+    Python older than 3.7 can't get running loop, then the loop of current thread is returned.
+    """
+    if loop is not None:
+        return loop
+    get_running_loop = getattr(asyncio, 'get_running_loop', None)
+    if get_running_loop is None:
+        return asyncio.get_event_loop()
+    return get_running_loop()
+
+
+def create_future(loop):
+    create = getattr(loop, 'create_future', None)
+    if create is None:
+        # Python older than 3.5.2
+        return asyncio.Future(loop=loop)
+    return create()
+
+
+class AsyncFileScan(object):
+    """
+    Scans single file without blocking an asyncio event loop.
+    Batches of lines are read in executor, while clues from the previous batch
+    are collected in the loop thread. Every batch is processed by separate loop callback,
+    so other coroutines are not starved by long scans.
+    Searchers without lines_to_search, create_clue_store and collect_clues methods
+    are run in executor entirely.
+    When scan is cancelled or fails, generator of lines is closed in executor, so the file
+    mapped by it is released without waiting for garbage collection.
+    """
+    def __init__(
+        self,
+        searcher,
+        original_front_input,
+        loop,
+        executor=None,
+        batch_size=AsyncConsts.LINES_BATCH_SIZE
+    ):
+        self._searcher = searcher
+        self._original_front_input = original_front_input
+        self._loop = loop
+        self._executor = executor
+        self._batch_size = batch_size
+        self._lines = None
+        # closing generator of lines waits for its batch being read in executor
+        self._lines_lock = threading.Lock()
+        self._clues = None
+        self._result = create_future(loop)
+
+    def start(self):
+        """
+        returns future of clues dict found in file
+        """
+        if hasattr(self._searcher, 'lines_to_search'):
+            self._clues = self._searcher.create_clue_store()
+            self._schedule_read()
+        else:
+            searched = self._loop.run_in_executor(
+                self._executor, self._searcher.search, self._original_front_input
+            )
+            searched.add_done_callback(self._on_searched)
+        return self._result
+
+    def _on_searched(self, searched):
+        if self._is_finished(searched):
+            return
+        self._result.set_result(searched.result())
+
+    def _read_batch(self):
+        with self._lines_lock:
+            if self._lines is None:
+                self._lines = self._searcher.lines_to_search(self._original_front_input)
+            return list(itertools.islice(self._lines, self._batch_size))
+
+    def _close_lines(self):
+        with self._lines_lock:
+            if self._lines is not None:
+                self._lines.close()
+
+    def _schedule_read(self):
+        batch_read = self._loop.run_in_executor(self._executor, self._read_batch)
+        batch_read.add_done_callback(self._on_batch_read)
+
+    def _is_finished(self, pending):
+        """
+        passes exception or cancellation of pending operation to the result,
+        lines aren't read any more when the result is done
+        """
+        if not self._result.done():
+            if pending.cancelled():
+                self._result.cancel()
+            elif pending.exception() is not None:
+                self._result.set_exception(pending.exception())
+            else:
+                return False
+        self._loop.run_in_executor(self._executor, self._close_lines)
+        return True
+
+    def _on_batch_read(self, batch_read):
+        if self._is_finished(batch_read):
+            return
+        batch = batch_read.result()
+        is_last_batch = len(batch) < self._batch_size
+        if not is_last_batch:
+            self._schedule_read()
+        try:
+            for line, line_offset in batch:
+                self._searcher.collect_clues(self._clues, line, line_offset)
+        except Exception as exception:
+            self._result.set_exception(exception)
+            return
+        if is_last_batch:
+            self._result.set_result(self._clues)
@@ -0,0 +1,362 @@
+import heapq
+import itertools
+from array import array
+from bisect import bisect_right
+
+import six
+
+from whylog.config.investigation_plan import ConvertedGroups, LazyClue
+from whylog.log_reader.const import ClueStoreConsts
+from whylog.log_reader.read_utils import ReadUtils
+from whylog.log_reader.sparse_index import PrimaryKeyEncoder
+
+
+class ClueColumns(object):
+    """
+    List-like container of clues found by single parser, which keeps clues in columns
+    instead of separate objects: line offsets and converted primary keys are kept in
+    typed arrays (primary keys encoded by PrimaryKeyEncoder), other groups are kept
+    not converted and interned, so repeated values are stored once.
+    Line source and line loader are stored once for every run of clues from the same file,
+    so clues read by different line loaders (e.g. clues from other hosts) can be kept together.
+    Clues are created (as LazyClues) only when they are accessed.
+    When ClueRetention limits clues of the parser, only clues with primary keys closest
+    to the effect primary key are kept: the farthest kept clue is found in a bounded heap
+    and replaced by a closer one. Replaced clues are removed from columns in batches.
+    """
+    def __init__(self, parser, bytes_groups=False, line_loader=ReadUtils, retention=None):
+        self._parser = parser
+        self._bytes_groups = bytes_groups
+        self._line_loader = line_loader
+        self._offsets = array('d')
+        self._source_starts = []
+        self._sources = []
+        self._key_types = self._get_encodable_key_types(parser)
+        self._columns = None
+        self._converted_keys = set()
+        self._interned = {}
+        self._encoded_keys_cache = {}
+        self._limit = None
+        self._ranked_key = None
+        self._distances = array('d')
+        self._farthest = []
+        self._evicted = set()
+        self._dropped_count = 0
+        if retention is not None:
+            self._init_retention(retention)
+
+    def _init_retention(self, retention):
+        limit = retention.get_limit(self._parser.name)
+        if limit is None:
+            return
+        for group_nr in self._parser.primary_key_groups:
+            key_type = self._parser.convertions.get(group_nr)
+            effect_key = retention.get_effect_key(key_type)
+            if PrimaryKeyEncoder.is_encodable(key_type) and effect_key is not None:
+                self._limit = limit
+                self._ranked_key = (
+                    group_nr - 1, key_type, PrimaryKeyEncoder.encode(key_type, effect_key)
+                )
+                return
+
+    @property
+    def dropped_count(self):
+        """
+        number of clues dropped because of retention limit
+        """
+        return self._dropped_count
+
+    @classmethod
+    def _get_encodable_key_types(cls, parser):
+        """
+        returns dict of types of encodable primary key groups by their indexes
+        """
+        key_types = {}
+        for group_nr in parser.primary_key_groups:
+            key_type = parser.convertions.get(group_nr)
+            if PrimaryKeyEncoder.is_encodable(key_type):
+                key_types[group_nr - 1] = key_type
+        return key_types
+
+    def _create_columns(self, groups_count):
+        self._key_types = dict(
+            (index, key_type)
+            for index, key_type in six.iteritems(self._key_types) if index < groups_count
+        )
+        self._columns = [
+            array('d') if index in self._key_types else []
+            for index in six.moves.range(groups_count)
+        ]
+
+    def _convert_key(self, index, raw_group):
+        if self._bytes_groups:
+            return self._parser.convert_bytes_param(index, raw_group)
+        return self._parser.convert_param(index, raw_group)
+
+    def _encode_key(self, index, raw_group):
+        """
+        returns converted primary key encoded as float, or None when it can't be decoded
+        to the same value (e.g. date with time zone). Encoded keys of recent raw groups
+        are cached, because neighbouring lines often have the same primary key.
+        """
+        cache_key = (index, raw_group)
+        encoded = self._encoded_keys_cache.get(cache_key)
+        if encoded is not None:
+            return encoded
+        key_type = self._key_types[index]
+        converted = self._convert_key(index, raw_group)
+        encoded = PrimaryKeyEncoder.encode(key_type, converted)
+        if PrimaryKeyEncoder.decode(key_type, encoded) != converted:
+            return None
+        if len(self._encoded_keys_cache) >= ClueStoreConsts.ENCODED_KEYS_CACHE_SIZE:
+            self._encoded_keys_cache = {}
+        self._encoded_keys_cache[cache_key] = encoded
+        return encoded
+
+    def _store_as_objects(self, index):
+        """
+        replaces typed array column of primary key by list of converted values,
+        used when some value of the key can't be encoded
+        """
+        self._columns[index] = self._get_converted_keys(index)
+        del self._key_types[index]
+        self._converted_keys.add(index)
+
+    def _get_converted_keys(self, index):
+        if index not in self._key_types:
+            return self._columns[index]
+        key_type = self._key_types[index]
+        return [PrimaryKeyEncoder.decode(key_type, encoded) for encoded in self._columns[index]]
+
+    def _get_distance(self, raw_groups):
+        """
+        returns distance between primary key of clue and primary key of effect
+        """
+        index, key_type, effect_key = self._ranked_key
+        encoded = None
+        if index in self._key_types:
+            encoded = self._encode_key(index, raw_groups[index])
+        if encoded is None:
+            encoded = PrimaryKeyEncoder.encode(
+                key_type, self._convert_key(index, raw_groups[index])
+            )
+        return abs(encoded - effect_key)
+
+    def _retain(self, distance):
+        """
+        returns True when clue with given distance should be appended,
+        the farthest kept clue is evicted when limit of clues is reached
+        """
+        slot = len(self._offsets)
+        if len(self._farthest) < self._limit:
+            heapq.heappush(self._farthest, (-distance, -slot))
+        elif self._farthest and -self._farthest[0][0] > distance:
+            _, evicted_slot = heapq.heapreplace(self._farthest, (-distance, -slot))
+            self._evicted.add(-evicted_slot)
+            self._dropped_count += 1
+        else:
+            self._dropped_count += 1
+            return False
+        self._distances.append(distance)
+        return True
+
+    def _remove_evicted(self):
+        """
+        removes evicted clues from columns, order of kept clues is preserved
+        """
+        if not self._evicted:
+            return
+        kept = [slot for slot in six.moves.range(len(self._offsets)) if slot not in self._evicted]
+        for index, column in enumerate(self._columns):
+            if index in self._key_types:
+                self._columns[index] = array('d', (column[slot] for slot in kept))
+            else:
+                self._columns[index] = [column[slot] for slot in kept]
+        sources = [self._get_source(slot) for slot in kept]
+        self._source_starts = []
+        self._sources = []
+        for slot, source in enumerate(sources):
+            self._append_source(slot, source)
+        self._offsets = array('d', (self._offsets[slot] for slot in kept))
+        self._distances = array('d', (self._distances[slot] for slot in kept))
+        self._rebuild_farthest()
+        self._evicted = set()
+
+    def _apply_limit(self):
+        """
+        evicts the farthest clues, so only limit of clues is kept
+        """
+        slots = six.moves.range(len(self._distances))
+        if len(self._distances) <= self._limit:
+            self._rebuild_farthest()
+            return
+        nearest = heapq.nsmallest(self._limit, six.moves.zip(self._distances, slots))
+        self._evicted = set(slots) - set(slot for _, slot in nearest)
+        self._dropped_count += len(self._evicted)
+        self._remove_evicted()
+
+    def _rebuild_farthest(self):
+        # from clues equally distant from the effect the latest one is evicted first
+        self._farthest = [(-distance, -slot) for slot, distance in enumerate(self._distances)]
+        heapq.heapify(self._farthest)
+
+    def append(self, raw_groups, line_offset, line_source):
+        if self._limit is not None and not self._retain(self._get_distance(raw_groups)):
+            return
+        if self._columns is None:
+            self._create_columns(len(raw_groups))
+        for index, raw_group in enumerate(raw_groups):
+            if index in self._key_types:
+                encoded = self._encode_key(index, raw_group)
+                if encoded is not None:
+                    self._columns[index].append(encoded)
+                    continue
+                self._store_as_objects(index)
+            if index in self._converted_keys:
+                self._columns[index].append(self._convert_key(index, raw_group))
+            else:
+                self._columns[index].append(self._interned.setdefault(raw_group, raw_group))
+        self._append_source(len(self._offsets), (line_source, self._line_loader))
+        self._offsets.append(line_offset)
+        if self._limit is not None and len(self._evicted) >= max(self._limit, 1):
+            self._remove_evicted()
+
+    def _append_source(self, clue_index, source):
+        """
+        :param source: pair (line source, line loader) of clue
+        """
+        if self._sources and self._sources[-1] == source:
+            return
+        self._source_starts.append(clue_index)
+        self._sources.append(source)
+
+    def extend_columns(self, other):
+        """
+        appends all clues of other columns of the same parser,
+        then the farthest clues are dropped when limit of clues is exceeded
+        """
+        self._remove_evicted()
+        other._remove_evicted()
+        self._dropped_count += other._dropped_count
+        if other._columns is None:
+            return
+        if self._columns is None:
+            self._create_columns(len(other._columns))
+        for index in list(self._key_types):
+            if index not in other._key_types:
+                self._store_as_objects(index)
+        for index, column in enumerate(other._columns):
+            if index in self._key_types:
+                self._columns[index].extend(column)
+            elif index in self._converted_keys:
+                self._columns[index].extend(other._get_converted_keys(index))
+            else:
+                self._columns[index].extend(
+                    self._interned.setdefault(value, value) for value in column
+                )
+        for source_start, source in six.moves.zip(other._source_starts, other._sources):
+            self._append_source(len(self._offsets) + source_start, source)
+        if self._limit is not None:
+            if other._ranked_key == self._ranked_key:
+                self._distances.extend(other._distances)
+            else:
+                # other clues weren't limited, so their distances are computed now
+                self._distances.extend(self._get_distances(len(self._offsets)))
+        self._offsets.extend(other._offsets)
+        if self._limit is not None:
+            self._apply_limit()
+
+    def _get_distances(self, first_slot):
+        """
+        returns distances between primary keys of kept clues beginning with first_slot
+        and primary key of effect
+        """
+        index, key_type, effect_key = self._ranked_key
+        keys = self._columns[index][first_slot:]
+        if index not in self._key_types:
+            keys = [PrimaryKeyEncoder.encode(key_type, key) for key in keys]
+        return array('d', (abs(encoded - effect_key) for encoded in keys))
+
+    def _get_source(self, clue_index):
+        return self._sources[bisect_right(self._source_starts, clue_index) - 1]
+
+    def __len__(self):
+        self._remove_evicted()
+        return len(self._offsets)
+
+    def __getitem__(self, clue_index):
+        self._remove_evicted()
+        if clue_index < 0:
+            clue_index += len(self._offsets)
+        if not 0 <= clue_index < len(self._offsets):
+            raise IndexError(clue_index)
+        raw_groups = []
+        converted = {}
+        for index, column in enumerate(self._columns):
+            if index in self._key_types:
+                converted[index] = PrimaryKeyEncoder.decode(
+                    self._key_types[index], column[clue_index]
+                )
+                raw_groups.append(None)
+            elif index in self._converted_keys:
+                converted[index] = column[clue_index]
+                raw_groups.append(None)
+            else:
+                raw_groups.append(column[clue_index])
+        line_source, line_loader = self._get_source(clue_index)
+        return LazyClue(
+            ConvertedGroups(self._parser, tuple(raw_groups), self._bytes_groups, converted),
+            line_loader, int(self._offsets[clue_index]), line_source
+        )
+
+    def __iter__(self):
+        for clue_index in six.moves.range(len(self)):
+            yield self[clue_index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ClueStore(dict):
+    """
+    Dict of ClueColumns of clues found in investigation, by names of parsers.
+    Number of kept clues of single parser may be limited by ClueRetention.
+    """
+    def __init__(self, line_loader=ReadUtils, retention=None):
+        super(ClueStore, self).__init__()
+        self._line_loader = line_loader
+        self._retention = retention
+
+    def add(self, parser, raw_groups, bytes_groups, line_offset, line_source):
+        columns = self.get(parser.name)
+        if columns is None:
+            columns = ClueColumns(parser, bytes_groups, self._line_loader, self._retention)
+            self[parser.name] = columns
+        columns.append(raw_groups, line_offset, line_source)
+
+    def merge(self, other):
+        """
+        appends clues from other clues dict, after clues of this store.
+        Clues lists which can't extend columns (e.g. lists from other searchers)
+        are merged as lists.
+        """
+        for parser_name, other_clues in six.iteritems(other):
+            clues = self.get(parser_name)
+            if clues is None:
+                self[parser_name] = other_clues
+            elif hasattr(clues, 'extend_columns') and hasattr(other_clues, 'extend_columns'):
+                clues.extend_columns(other_clues)
+            else:
+                self[parser_name] = list(itertools.chain(clues, other_clues))
+
+    def get_dropped_count(self, parser_name):
+        """
+        returns number of clues of parser dropped because of retention limit
+        """
+        return getattr(self.get(parser_name), 'dropped_count', 0)
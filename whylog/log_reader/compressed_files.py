@@ -0,0 +1,400 @@
+import atexit
+import bz2
+import os
+import tempfile
+import zlib
+from bisect import bisect_right
+
+from whylog.log_reader.const import CompressionConsts
+from whylog.log_reader.exceptions import UnsupportedCompressionFormat
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6, backport installed by setup.py
+    from ordereddict import OrderedDict
+
+try:
+    import mmap
+except ImportError:
+    # e.g. Jython, files are read by ReadFileMap instead
+    mmap = None
+
+
+class CompressionFormats(object):
+    GZIP = 'gzip'
+    BZIP2 = 'bzip2'
+    XZ = 'xz'
+
+    MAGIC_NUMBERS = (
+        (b'\x1f\x8b', GZIP),
+        (b'BZh', BZIP2),
+        (b'\xfd7zXZ\x00', XZ),
+    )  # yapf: disable
+    MAGIC_LENGTH = 6
+
+    @classmethod
+    def detect(cls, file_path):
+        """
+        returns compression format of file basing on its magic number,
+        or None for not compressed files
+        """
+        with open(file_path, 'rb') as opened_file:
+            head = opened_file.read(cls.MAGIC_LENGTH)
+        for magic, compression_format in cls.MAGIC_NUMBERS:
+            if head.startswith(magic):
+                return compression_format
+
+    @classmethod
+    def create_decompressor(cls, compression_format):
+        if compression_format == cls.GZIP:
+            return zlib.decompressobj(CompressionConsts.GZIP_WBITS)
+        if compression_format == cls.BZIP2:
+            return bz2.BZ2Decompressor()
+        if compression_format == cls.XZ and lzma is not None:
+            return lzma.LZMADecompressor()
+        raise UnsupportedCompressionFormat(compression_format)
+
+
+def _decompress_chunks(opened_file, compression_format, decompressor):
+    """
+    a generator that decompresses file from its current position, chunk by chunk.
+    Yields triples: (decompressed data, position in compressed file, decompressor state)
+    where the state is valid after consuming whole compressed file up to yielded position.
+    Files made of many concatenated compressed streams are handled.
+    """
+    position = opened_file.tell()
+    while True:
+        chunk = opened_file.read(CompressionConsts.COMPRESSED_CHUNK_SIZE)
+        if not chunk:
+            return
+        position += len(chunk)
+        decompressed = []
+        while chunk:
+            decompressed.append(decompressor.decompress(chunk))
+            chunk = decompressor.unused_data
+            if chunk or getattr(decompressor, 'eof', False):
+                decompressor = CompressionFormats.create_decompressor(compression_format)
+        yield b''.join(decompressed), position, decompressor
+
+
+class GzipAccessIndex(object):
+    """
+    Allows random access to decompressed content of gzip file, like zran.c example from zlib.
+    During single decompression pass it saves access points every spacing bytes of
+    decompressed data. Access point is a copy of decompressor state together with
+    its positions in compressed and decompressed data, so reading in the middle of file
+    requires decompressing at most spacing bytes.
+    """
+    def __init__(self, file_path, spacing=CompressionConsts.ACCESS_POINT_SPACING):
+        self._file_path = file_path
+        self.decompressed_offsets = [0]
+        self._access_points = [(0, None)]
+        self.size = self._build(spacing)
+
+    def _build(self, spacing):
+        decompressed_size = 0
+        next_access_point = spacing
+        with open(self._file_path, 'rb') as opened_file:
+            for data, position, decompressor in _decompress_chunks(
+                opened_file, CompressionFormats.GZIP, self._create_decompressor()
+            ):
+                decompressed_size += len(data)
+                if decompressed_size >= next_access_point:
+                    self.decompressed_offsets.append(decompressed_size)
+                    self._access_points.append((position, decompressor.copy()))
+                    next_access_point = decompressed_size + spacing
+        return decompressed_size
+
+    @classmethod
+    def _create_decompressor(cls):
+        return CompressionFormats.create_decompressor(CompressionFormats.GZIP)
+
+    def read_span(self, span_nr):
+        """
+        returns decompressed data between access points span_nr and span_nr + 1
+        """
+        position, decompressor = self._access_points[span_nr]
+        decompressor = decompressor.copy() if decompressor else self._create_decompressor()
+        if span_nr + 1 < len(self.decompressed_offsets):
+            span_size = self.decompressed_offsets[span_nr + 1] - self.decompressed_offsets[span_nr]
+        else:
+            span_size = self.size - self.decompressed_offsets[span_nr]
+        span = []
+        read_size = 0
+        with open(self._file_path, 'rb') as opened_file:
+            opened_file.seek(position)
+            for data, _, decompressor in _decompress_chunks(
+                opened_file, CompressionFormats.GZIP, decompressor
+            ):
+                span.append(data)
+                read_size += len(data)
+                if read_size >= span_size:
+                    break
+        return b''.join(span)[:span_size]
+
+    def span_containing(self, offset):
+        return bisect_right(self.decompressed_offsets, offset) - 1
+
+
+class GzipRandomAccessFile(object):
+    """
+    Read only binary file-like object with decompressed content of gzip file.
+    Spans between access points are decompressed on demand, recently used ones are cached.
+    """
+    def __init__(self, access_index):
+        self._access_index = access_index
+        self._position = 0
+        self._cached_spans = {}
+        self._spans_usage = []
+
+    def _get_span(self, span_nr):
+        span = self._cached_spans.get(span_nr)
+        if span is None:
+            span = self._access_index.read_span(span_nr)
+            self._cached_spans[span_nr] = span
+        else:
+            self._spans_usage.remove(span_nr)
+        self._spans_usage.append(span_nr)
+        if len(self._spans_usage) > CompressionConsts.CACHED_SPANS:
+            del self._cached_spans[self._spans_usage.pop(0)]
+        return span
+
+    def read(self, size=-1):
+        end = self._access_index.size
+        if size >= 0:
+            end = min(end, self._position + size)
+        parts = []
+        while self._position < end:
+            span_nr = self._access_index.span_containing(self._position)
+            span_begin = self._access_index.decompressed_offsets[span_nr]
+            span = self._get_span(span_nr)
+            part = span[self._position - span_begin:end - span_begin]
+            if not part:
+                break
+            parts.append(part)
+            self._position += len(part)
+        return b''.join(parts)
+
+    def readline(self):
+        parts = []
+        while True:
+            block = self.read(CompressionConsts.READLINE_BLOCK_SIZE)
+            if not block:
+                break
+            newline_pos = block.find(b'\n')
+            if newline_pos != -1:
+                parts.append(block[:newline_pos + 1])
+                self._position -= len(block) - newline_pos - 1
+                break
+            parts.append(block)
+        return b''.join(parts)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._position = offset
+        elif whence == os.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = self._access_index.size + offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._cached_spans = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReadFileMap(object):
+    """
+    Provides these operations of mmap object which are used by ReverseLineReader
+    for content of a file read by seek and read, when it is decompressed or can't be mapped.
+    The last searched block is cached, because ReverseLineReader searches the same block
+    many times.
+    """
+    def __init__(self, opened_file):
+        self._opened_file = opened_file
+        self._block_begin = self._block_end = 0
+        self._block = b''
+
+    def _read(self, begin, end):
+        if self._block_begin <= begin and end <= self._block_end:
+            return self._block[begin - self._block_begin:end - self._block_begin]
+        self._opened_file.seek(begin)
+        return self._opened_file.read(end - begin)
+
+    def rfind(self, sub, begin, end):
+        if not (self._block_begin <= begin and end <= self._block_end):
+            self._block = self._read(begin, end)
+            self._block_begin, self._block_end = begin, end
+        position = self._block.rfind(sub, begin - self._block_begin, end - self._block_begin)
+        if position == -1:
+            return -1
+        return position + self._block_begin
+
+    def __getitem__(self, offsets):
+        return self._read(offsets.start, offsets.stop)
+
+    def __len__(self):
+        self._opened_file.seek(0, os.SEEK_END)
+        return self._opened_file.tell()
+
+    def close(self):
+        self._opened_file.close()
+
+
+class CompressedFilesCache(object):
+    """
+    Keeps compression formats of files and structures that allow random access
+    to compressed files, so the work done for a file while its first investigation
+    is reused by next ones.
+    Gzip files get access points index, other formats, whose decompressors can't be copied,
+    are decompressed once to a temporary file, which is removed when file changes
+    or is dropped from cache.
+    At most max_files files are kept, the least recently used one is dropped first.
+    """
+    def __init__(self, max_files=CompressionConsts.MAX_CACHED_FILES):
+        self._max_files = max_files
+        # (file version, compression format, random access structure or None) by file paths,
+        # ordered from the least recently used one
+        self._cache = OrderedDict()
+        self._spilled_files = set()
+        atexit.register(self.remove_spilled_files)
+
+    @classmethod
+    def _file_version(cls, file_path):
+        stat = os.stat(file_path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime
+
+    def _get_cached(self, file_path):
+        version = self._file_version(file_path)
+        cached = self._cache.pop(file_path, None)
+        if cached is not None and cached[0] != version:
+            self._drop_access(cached[2])
+            cached = None
+        if cached is None:
+            cached = (version, CompressionFormats.detect(file_path), None)
+        self._cache[file_path] = cached
+        while len(self._cache) > self._max_files:
+            self._drop_access(self._cache.popitem(last=False)[1][2])
+        return cached
+
+    def detect(self, file_path):
+        """
+        returns compression format of file, which is detected only once for a version of file
+        """
+        return self._get_cached(file_path)[1]
+
+    def get(self, file_path):
+        """
+        returns GzipAccessIndex of gzip file, or path of decompressed copy of file
+        compressed with other format
+        """
+        version, compression_format, access = self._get_cached(file_path)
+        if access is None:
+            if compression_format == CompressionFormats.GZIP:
+                access = GzipAccessIndex(file_path)
+            else:
+                access = self._spill(file_path, compression_format)
+            self._cache[file_path] = (version, compression_format, access)
+        return access
+
+    def _spill(self, file_path, compression_format):
+        descriptor, spilled_path = tempfile.mkstemp(suffix=CompressionConsts.SPILLED_FILE_SUFFIX)
+        self._spilled_files.add(spilled_path)
+        with os.fdopen(descriptor, 'wb') as spilled_file:
+            with open(file_path, 'rb') as opened_file:
+                decompressor = CompressionFormats.create_decompressor(compression_format)
+                for data, _, decompressor in _decompress_chunks(
+                    opened_file, compression_format, decompressor
+                ):
+                    spilled_file.write(data)
+        return spilled_path
+
+    def _drop_access(self, access):
+        if access in self._spilled_files:
+            self._remove_spilled_file(access)
+
+    def _remove_spilled_file(self, spilled_path):
+        try:
+            os.remove(spilled_path)
+        except EnvironmentError:
+            # e.g. file still opened on Windows, it is removed at exit
+            return
+        self._spilled_files.discard(spilled_path)
+
+    def remove_spilled_files(self):
+        for spilled_path in list(self._spilled_files):
+            self._remove_spilled_file(spilled_path)
+
+
+class LogFileOpener(object):
+    """
+    Opens log files for reading with transparent decompression of gzip, bzip2 and xz files.
+    Offsets in opened files are offsets in decompressed content.
+    """
+    COMPRESSED_FILES_CACHE = CompressedFilesCache()
+
+    @classmethod
+    def _get_plain_path(cls, file_path, compression_format):
+        if compression_format is None:
+            return file_path
+        if compression_format == CompressionFormats.GZIP:
+            return None
+        return cls.COMPRESSED_FILES_CACHE.get(file_path)
+
+    @classmethod
+    def is_compressed(cls, file_path):
+        return cls.COMPRESSED_FILES_CACHE.detect(file_path) is not None
+
+    @classmethod
+    def get_mapped_path(cls, file_path):
+        """
+        returns path of file memory-mapped by open_map, or None when content of file
+        is decompressed while it's read
+        """
+        return cls._get_plain_path(file_path, cls.COMPRESSED_FILES_CACHE.detect(file_path))
+
+    @classmethod
+    def open_file(cls, file_path):
+        """
+        returns binary file-like object supporting read, readline, seek and tell
+        """
+        compression_format = cls.COMPRESSED_FILES_CACHE.detect(file_path)
+        plain_path = cls._get_plain_path(file_path, compression_format)
+        if plain_path is not None:
+            return open(plain_path, 'rb')
+        return GzipRandomAccessFile(cls.COMPRESSED_FILES_CACHE.get(file_path))
+
+    @classmethod
+    def open_map(cls, file_path):
+        """
+        returns mmap object (or object providing the same rfind, slicing, len and close)
+        with content of the file, or None if content is empty.
+        File is read by ReadFileMap when mmap isn't available or file can't be mapped.
+        """
+        compression_format = cls.COMPRESSED_FILES_CACHE.detect(file_path)
+        plain_path = cls._get_plain_path(file_path, compression_format)
+        if plain_path is None:
+            return ReadFileMap(cls.open_file(file_path))
+        if os.path.getsize(plain_path) == 0:
+            return None
+        if mmap is not None:
+            with open(plain_path, 'rb') as opened_file:
+                try:
+                    return mmap.mmap(opened_file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (EnvironmentError, ValueError):
+                    # e.g. files of special filesystems, which can't be mapped
+                    pass
+        return ReadFileMap(open(plain_path, 'rb'))
@@ -1,2 +1,53 @@
-class BufsizeConsts(object):
-    STANDARD_BUF_SIZE = 1024 * 1024 * 10
+from whylog.config.consts import IndexFileConsts, LogEncoding
+
+
+class LineConsts(object):
+    NEWLINE = b'\n'
+    CARRIAGE_RETURN = b'\r'
+    ENCODING = LogEncoding.ENCODING
+    DECODING_ERRORS = LogEncoding.DECODING_ERRORS
+
+
+class IndexConsts(object):
+    SAMPLE_SPACING = 64 * 1024
+    HEAD_BLOCK_SIZE = 4096
+    FILE_SUFFIX = IndexFileConsts.SUFFIX
+    TMP_SUFFIX = '.tmp'
+
+
+class CompressionConsts(object):
+    GZIP_WBITS = 16 + 15
+    COMPRESSED_CHUNK_SIZE = 64 * 1024
+    ACCESS_POINT_SPACING = 4 * 1024 * 1024
+    CACHED_SPANS = 2
+    READLINE_BLOCK_SIZE = 512
+    SPILLED_FILE_SUFFIX = '.whylog_decompressed'
+    MAX_CACHED_FILES = 64
+
+
+class AsyncConsts(object):
+    LINES_BATCH_SIZE = 1024
+
+
+class ClueStoreConsts(object):
+    ENCODED_KEYS_CACHE_SIZE = 1024
+
+
+class KeyRangeConsts(object):
+    # maximal number of files whose ranges of primary keys are cached
+    MAX_FILES = 4096
+
+
+class LogDatabaseConsts(object):
+    DEFAULT_PATH = 'whylog_logs.sqlite'
+    INSERT_BATCH_SIZE = 10000
+
+
+class SearchAgentConsts(object):
+    DEFAULT_PORT = 9797
+    TIMEOUT = 300
+    MESSAGE_ENCODING = 'utf-8'
+
+
+class ReadAheadConsts(object):
+    CHUNK_SIZE = 1024 * 1024
@@ -0,0 +1,91 @@
+import os.path
+
+from whylog.config.consts import LogEncoding
+from whylog.config.investigation_plan import LineSource
+from whylog.log_reader.clue_store import ClueStore
+from whylog.log_reader.const import LogDatabaseConsts
+from whylog.log_reader.log_database import LogDatabase
+from whylog.log_reader.read_utils import ReadUtils
+from whylog.log_reader.searchers import AbstractSearcher, BacktrackSearcher
+from whylog.log_reader.sparse_index import PrimaryKeyEncoder
+
+
+class DatabaseSearcher(AbstractSearcher):
+    """
+    Finds clues by indexed range queries to LogDatabase filled by ingestion of log files,
+    instead of regex scanning of file. Files which weren't ingested with parsers of
+    investigation step, or changed since ingestion, are searched by fallback searcher.
+    LogReader can use it as functools.partial(DatabaseSearcher, database_path=path).
+    """
+    def __init__(
+        self,
+        file_path,
+        investigation_step,
+        super_parser,
+        database_path=LogDatabaseConsts.DEFAULT_PATH,
+        fallback_searcher_class=None
+    ):
+        self._file_path = file_path
+        self._investigation_step = investigation_step
+        self._super_parser = super_parser
+        self._database_path = database_path
+        self._fallback_searcher_class = fallback_searcher_class or BacktrackSearcher
+
+    def _get_query_bounds(self, original_front_input):
+        """
+        returns tuple (left primary key bound, right primary key bound, offset bound)
+        of lines searched like by BacktrackSearcher, or None when range of primary keys
+        can't be found by query
+        """
+        before = None
+        if original_front_input.line_source.path == self._file_path:
+            # lines before effect line are searched, like in BacktrackSearcher
+            before = original_front_input.offset
+        primary_key_type = self._super_parser.get_primary_key_type()
+        if not self._investigation_step.is_bounded(primary_key_type):
+            return None, None, before
+        if not PrimaryKeyEncoder.is_encodable(primary_key_type):
+            return None
+        left_bound, right_bound = self._investigation_step.get_bounds(primary_key_type)
+        if before is not None:
+            right_bound = None
+        left_key, right_key = [
+            None if bound is None else PrimaryKeyEncoder.encode(primary_key_type, bound)
+            for bound in (left_bound, right_bound)
+        ]
+        return left_key, right_key, before
+
+    def search(self, original_front_input):
+        query_bounds = self._get_query_bounds(original_front_input)
+        if all((
+            query_bounds is not None,
+            LogDatabase.is_supported(),
+            os.path.exists(self._database_path)
+        )):  # yapf: disable
+            database = LogDatabase(self._database_path)
+            try:
+                ingested_file = database.find_file(
+                    self._file_path, self._super_parser, self._investigation_step.get_parsers()
+                )
+                if ingested_file is not None:
+                    file_id, host = ingested_file
+                    return self._collect_clues(database, file_id, host, query_bounds)
+            finally:
+                database.close()
+        fallback_searcher = self._fallback_searcher_class(
+            self._file_path, self._investigation_step, self._super_parser
+        )
+        return fallback_searcher.search(original_front_input)
+
+    def _collect_clues(self, database, file_id, host, query_bounds):
+        parsers = dict((parser.name, parser) for parser in self._investigation_step.get_parsers())
+        bytes_groups = self._investigation_step.bytes_lines
+        clues = ClueStore(ReadUtils, self._investigation_step.clue_retention)
+        line_source = LineSource(host, self._file_path)
+        for parser_name, line_offset, groups in database.find_clues(
+            file_id, list(parsers.values()), self._super_parser, *query_bounds
+        ):
+            if bytes_groups:
+                groups = tuple(LogEncoding.encode(group) for group in groups)
+            clues.add(parsers[parser_name], groups, bytes_groups, line_offset, line_source)
+        return clues
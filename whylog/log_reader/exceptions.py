@@ -25,3 +25,30 @@ class OffsetBiggerThanFileSize(LogReaderError):
 
     def __str__(self):
         return 'Captured offset (%s) is too big' % self.offset
+
+
+class UnsupportedCompressionFormat(LogReaderError):
+    def __init__(self, compression_format):
+        self.compression_format = compression_format
+
+    def __str__(self):
+        return 'Cannot decompress log file in %s format' % self.compression_format
+
+
+class SearchAgentError(LogReaderError):
+    def __init__(self, host, message):
+        self.host = host
+        self.message = message
+
+    def __str__(self):
+        return 'Search agent on %s failed: %s' % (self.host, self.message)
+
+
+class AsyncioUnavailable(LogReaderError):
+    def __str__(self):
+        return 'asyncio is not available in this Python version, use get_causes instead'
+
+
+class LogDatabaseUnavailable(LogReaderError):
+    def __str__(self):
+        return 'Log database requires sqlite3, which is missing in this Python'
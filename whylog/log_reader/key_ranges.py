@@ -0,0 +1,93 @@
+import os
+
+from whylog.log_reader.compressed_files import LogFileOpener
+from whylog.log_reader.const import KeyRangeConsts
+from whylog.log_reader.read_utils import ReadUtils
+from whylog.log_reader.reverse_reader import ReverseLineReader
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6, backport installed by setup.py
+    from ordereddict import OrderedDict
+
+
+class FileKeyRange(object):
+    """
+    Primary keys of the first and the last line with primary key of log file,
+    together with stat of file, for which they were found.
+    """
+    def __init__(self, file_stat, first_key, last_key):
+        self.file_stat = file_stat
+        self.first_key = first_key
+        self.last_key = last_key
+
+    def intersects(self, left_bound, right_bound):
+        """
+        returns True when some primary key of file can lie in range [left_bound, right_bound],
+        None bound means unbounded range
+        """
+        if self.first_key is None:
+            return True
+        if left_bound is not None and self.last_key < left_bound:
+            return False
+        return right_bound is None or not self.first_key > right_bound
+
+
+class KeyRangeCache(object):
+    """
+    Keeps ranges of primary keys of log files, so files ordered by primary key whose range
+    doesn't intersect search range are skipped without being opened.
+    Range is valid as long as device, inode, size and modification time of file
+    don't change, what is checked by single stat call. Rotated files aren't modified,
+    so their ranges are found only once.
+    At most max_files ranges are kept, the least recently used one is dropped first,
+    ranges are ordered from the least recently used one.
+    """
+    def __init__(self, max_files=KeyRangeConsts.MAX_FILES):
+        self._max_files = max_files
+        self._ranges = OrderedDict()
+
+    @classmethod
+    def _get_stat(cls, file_path):
+        stat = os.stat(file_path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime
+
+    @classmethod
+    def _get_cache_key(cls, file_path, super_parser):
+        return (
+            file_path, super_parser.regex.pattern, tuple(super_parser.group_order),
+            super_parser.get_primary_key_type()
+        )
+
+    def get_range(self, file_path, super_parser):
+        """
+        returns FileKeyRange of file, its keys are None when no line of file has primary key
+        """
+        cache_key = self._get_cache_key(file_path, super_parser)
+        file_stat = self._get_stat(file_path)
+        key_range = self._ranges.pop(cache_key, None)
+        if key_range is None or key_range.file_stat != file_stat:
+            key_range = self._find_range(file_path, super_parser, file_stat)
+        self._ranges[cache_key] = key_range
+        while len(self._ranges) > self._max_files:
+            self._ranges.popitem(last=False)
+        return key_range
+
+    @classmethod
+    def _find_range(cls, file_path, super_parser, file_stat):
+        with LogFileOpener.open_file(file_path) as opened_file:
+            size = ReadUtils.size_of_opened_file(opened_file)
+            found_line = None
+            if size > 0:
+                found_line = ReadUtils.find_line_with_primary_key(
+                    opened_file, 0, size, super_parser
+                )
+        if found_line is None:
+            return FileKeyRange(file_stat, None, None)
+        first_key = found_line[2][0][1]
+        for line, _ in ReverseLineReader(file_path, read_ahead=False).reverse_lines(size):
+            groups = super_parser.get_ordered_groups(ReverseLineReader.decode_line(line))
+            if groups:
+                return FileKeyRange(file_stat, first_key, groups[0][1])
+        return FileKeyRange(file_stat, first_key, first_key)
@@ -0,0 +1,392 @@
+import json
+import os.path
+import sys
+
+import six
+
+from whylog.config.consts import ParserSubsetType
+from whylog.config.parser_subset import ParserSubsetFactory
+from whylog.log_reader.compressed_files import LogFileOpener
+from whylog.log_reader.const import LineConsts, LogDatabaseConsts
+from whylog.log_reader.exceptions import LogDatabaseUnavailable
+from whylog.log_reader.reverse_reader import ReverseLineReader
+from whylog.log_reader.sparse_index import FileIdentity, PrimaryKeyEncoder
+
+try:
+    import sqlite3
+except ImportError:
+    # e.g. Jython, whose standard library has no sqlite3
+    sqlite3 = None
+
+
+class LogDatabase(object):
+    """
+    SQLite database of log lines matched by rule parsers, filled by ingestion of log files.
+    Every matched line is stored with its offset, groups extracted by parser and primary key
+    of the line encoded by PrimaryKeyEncoder, so clues from a range of primary keys
+    are found by an indexed query, without regex scanning of the log file.
+    Like in BacktrackSearcher, lines without primary key (e.g. continuation lines
+    of multi-line entries) belong to the previous line with primary key, lines before
+    the first line with primary key are stored without primary key.
+    File appended since the previous ingestion is ingested from the last ingested line.
+    Until then, its lines stored in database are found by queries and only appended lines
+    are scanned.
+    """
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS files ("
+        "file_id INTEGER PRIMARY KEY, log_type TEXT NOT NULL, host TEXT NOT NULL, "
+        "path TEXT NOT NULL, "
+        "parsers TEXT NOT NULL, primary_key_type TEXT, device INTEGER NOT NULL, "
+        "inode INTEGER NOT NULL, size INTEGER NOT NULL, head_length INTEGER NOT NULL, "
+        "head_checksum INTEGER NOT NULL, ingested_size INTEGER NOT NULL, "
+        "last_primary_key REAL, first_key_offset INTEGER, first_primary_key REAL, "
+        "UNIQUE (log_type, host, path))",
+        "CREATE TABLE IF NOT EXISTS clues ("
+        "file_id INTEGER NOT NULL, parser_name TEXT NOT NULL, primary_key REAL, "
+        "line_offset INTEGER NOT NULL, groups TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS clues_by_primary_key "
+        "ON clues (file_id, parser_name, primary_key)",
+        "CREATE INDEX IF NOT EXISTS files_by_path ON files (path)",
+    )  # yapf: disable
+    FILE_COLUMNS = (
+        "file_id, parsers, primary_key_type, device, inode, size, head_length, head_checksum, "
+        "ingested_size, last_primary_key, first_key_offset, first_primary_key, host"
+    )
+
+    def __init__(self, database_path):
+        if not self.is_supported():
+            raise LogDatabaseUnavailable()
+        self._connection = sqlite3.connect(database_path)
+        with self._connection:
+            for statement in self.SCHEMA:
+                self._connection.execute(statement)
+
+    @classmethod
+    def is_supported(cls):
+        return sqlite3 is not None
+
+    def close(self):
+        self._connection.close()
+
+    @classmethod
+    def _serialize_parsers(cls, parsers):
+        return json.dumps(sorted([parser.name, parser.regex_str] for parser in parsers))
+
+    @classmethod
+    def _get_identity(cls, file_row):
+        return FileIdentity(*file_row[3:8])
+
+    @classmethod
+    def _is_fresh(cls, file_row, file_path, primary_key_type):
+        """
+        returns True when file wasn't changed since its ingestion
+        """
+        stored_identity = cls._get_identity(file_row)
+        identity = FileIdentity.of_file(file_path, stored_identity.head_length)
+        return all((
+            file_row[2] == primary_key_type,
+            stored_identity.is_same_file(identity),
+            stored_identity.size == identity.size
+        ))  # yapf: disable
+
+    @classmethod
+    def _is_appended(cls, file_row, file_path, primary_key_type):
+        """
+        returns True when file was only appended since its ingestion, so lines stored
+        in database are still valid and only lines after the ingested size are new
+        """
+        stored_identity = cls._get_identity(file_row)
+        identity = FileIdentity.of_file(file_path, stored_identity.head_length)
+        return all((
+            file_row[2] == primary_key_type,
+            stored_identity.is_same_file(identity),
+            stored_identity.size <= identity.size,
+            not LogFileOpener.is_compressed(file_path)
+        ))  # yapf: disable
+
+    def _find_file_row(self, log_type_name, host, file_path):
+        return self._connection.execute(
+            "SELECT %s FROM files WHERE log_type = ? AND host = ? AND path = ?" %
+            (self.FILE_COLUMNS,), (log_type_name, host, file_path)
+        ).fetchone()
+
+    def ingest(self, config):
+        """
+        ingests files of all log types of config, returns number of stored lines
+        """
+        lines_count = 0
+        for log_type in config.get_all_log_types():
+            parsers = config.get_parsers_of_log_type(log_type.name)
+            if not parsers:
+                continue
+            parser_subset = ParserSubsetFactory.create(
+                config.parser_subset_type,
+                parsers,
+                literal_prefilter=config.literal_prefilter,
+                buffer_scanning=False
+            )
+            for host, path, super_parser in log_type.files_to_parse():
+                if host != "localhost":
+                    # files of other hosts are searched by search agents running on them
+                    continue
+                lines_count += self.ingest_file(
+                    log_type.name, host, path, super_parser, parser_subset
+                )
+        return lines_count
+
+    def ingest_file(self, log_type_name, host, file_path, super_parser, parser_subset):
+        """
+        stores lines of file matched by parsers of parser subset, together with host
+        of the file given by filename matchers, returns number of stored lines
+        """
+        parsers = self._serialize_parsers(parser_subset.get_parsers())
+        primary_key_type = super_parser.get_primary_key_type()
+        file_row = self._find_file_row(log_type_name, host, file_path)
+        if file_row is not None and file_row[1] == parsers and self._is_fresh(
+            file_row, file_path, primary_key_type
+        ):
+            return 0
+        identity = FileIdentity.of_file(file_path)
+        with self._connection:
+            if file_row is None:
+                file_id = self._connection.execute(
+                    "INSERT INTO files (log_type, host, path, parsers, device, inode, size, "
+                    "head_length, head_checksum, ingested_size) "
+                    "VALUES (?, ?, ?, ?, 0, 0, 0, 0, 0, 0)",
+                    (log_type_name, host, file_path, parsers)
+                ).lastrowid
+                start, last_key, first_key = 0, None, (None, None)
+            else:
+                file_id = file_row[0]
+                start, last_key, first_key = 0, None, (None, None)
+                if file_row[1] == parsers and self._is_appended(
+                    file_row, file_path, primary_key_type
+                ):
+                    start, last_key, first_key = file_row[8], file_row[9], file_row[10:12]
+                self._connection.execute(
+                    "DELETE FROM clues WHERE file_id = ? AND line_offset >= ?", (file_id, start)
+                )
+            # compressed files are read to the end, their size is size of compressed content
+            limit = None if LogFileOpener.is_compressed(file_path) else identity.size
+            with LogFileOpener.open_file(file_path) as opened_file:
+                ingested_size, last_key, first_key, lines_count = self._store_lines(
+                    opened_file, file_id, start, limit, last_key, first_key, super_parser,
+                    parser_subset
+                )
+            self._connection.execute(
+                "UPDATE files SET parsers = ?, primary_key_type = ?, device = ?, inode = ?, "
+                "size = ?, head_length = ?, head_checksum = ?, ingested_size = ?, "
+                "last_primary_key = ?, first_key_offset = ?, first_primary_key = ? "
+                "WHERE file_id = ?", (
+                    parsers, primary_key_type, identity.device, identity.inode, identity.size,
+                    identity.head_length, identity.head_checksum, ingested_size, last_key,
+                    first_key[0], first_key[1], file_id
+                )
+            )
+        return lines_count
+
+    @classmethod
+    def _get_encoded_primary_key(cls, super_parser, line):
+        groups = super_parser.get_ordered_groups(line)
+        if not groups:
+            return None
+        primary_key_type, primary_key = groups[0]
+        if not PrimaryKeyEncoder.is_encodable(primary_key_type):
+            return None
+        return PrimaryKeyEncoder.encode(primary_key_type, primary_key)
+
+    def _store_lines(
+        self, opened_file, file_id, position, limit, last_key, first_key, super_parser,
+        parser_subset
+    ):
+        """
+        stores matched lines beginning after position, returns tuple: (offset after
+        the last whole line, primary key of this line, pair (offset, primary key)
+        of the first line with primary key, number of stored lines).
+        The last line without newline is stored too, but it's ingested again next time.
+        """
+        ingested_size, ingested_key = position, last_key
+        rows = []
+        lines_count = 0
+        for line, line_offset, primary_key, extracted_params in self._match_lines(
+            opened_file, position, limit, super_parser, parser_subset
+        ):
+            if primary_key is not None:
+                if last_key is None:
+                    first_key = (line_offset, primary_key)
+                last_key = primary_key
+            for parser_name, groups in six.iteritems(extracted_params):
+                rows.append((file_id, parser_name, last_key, line_offset, json.dumps(groups)))
+            lines_count += len(extracted_params)
+            if len(rows) >= LogDatabaseConsts.INSERT_BATCH_SIZE:
+                self._insert_clues(rows)
+            if line.endswith(LineConsts.NEWLINE):
+                ingested_size, ingested_key = line_offset + len(line), last_key
+        self._insert_clues(rows)
+        return ingested_size, ingested_key, first_key, lines_count
+
+    @classmethod
+    def _match_lines(cls, opened_file, position, limit, super_parser, parser_subset):
+        """
+        a generator that returns tuples (line, line offset, encoded primary key of line,
+        params extracted by parser subset) of lines beginning between position and limit
+        """
+        opened_file.seek(position)
+        while limit is None or position < limit:
+            line = opened_file.readline()
+            if not line:
+                return
+            content = ReverseLineReader.decode_line(line.rstrip(LineConsts.NEWLINE))
+            yield (
+                line, position, cls._get_encoded_primary_key(super_parser, content),
+                parser_subset.get_extracted_parsers_params(content)
+            )
+            position += len(line)
+
+    def _insert_clues(self, rows):
+        self._connection.executemany(
+            "INSERT INTO clues (file_id, parser_name, primary_key, line_offset, groups) "
+            "VALUES (?, ?, ?, ?, ?)", rows
+        )
+        del rows[:]
+
+    def find_file(self, file_path, super_parser, parsers):
+        """
+        returns tuple (file id, host) of file ingested with all given parsers, which wasn't
+        changed or was only appended since its ingestion, or None when clues from the file
+        can't be found in database
+        """
+        required_parsers = set((parser.name, parser.regex_str) for parser in parsers)
+        primary_key_type = super_parser.get_primary_key_type()
+        for file_row in self._connection.execute(
+            "SELECT %s FROM files WHERE path = ?" % (self.FILE_COLUMNS,), (file_path,)
+        ):
+            ingested_parsers = set(tuple(parser) for parser in json.loads(file_row[1]))
+            if required_parsers <= ingested_parsers and (
+                self._is_fresh(file_row, file_path, primary_key_type) or
+                self._is_appended(file_row, file_path, primary_key_type)
+            ):
+                return file_row[0], file_row[12]
+
+    @classmethod
+    def _are_headless_lines_searched(cls, first_key, left_key, before):
+        if before is None:
+            return False
+        first_key_offset, first_primary_key = first_key
+        if left_key is None or first_key_offset is None:
+            return True
+        return first_key_offset >= before or first_primary_key >= left_key
+
+    @classmethod
+    def _is_in_key_range(cls, primary_key, left_key, right_key, headless_lines_searched):
+        if left_key is None and right_key is None:
+            return True
+        if primary_key is None:
+            return headless_lines_searched
+        return all((
+            left_key is None or primary_key >= left_key,
+            right_key is None or primary_key <= right_key
+        ))  # yapf: disable
+
+    @classmethod
+    def _find_appended_clues(
+        cls, file_path, ingested_size, last_key, first_key, parsers, super_parser, before
+    ):
+        """
+        returns list of tuples (parser name, encoded primary key, line offset, groups)
+        of lines appended after ingestion and beginning before given offset, together with
+        pair (offset, primary key) of the first line with primary key of the whole file
+        """
+        parser_subset = ParserSubsetFactory.create(
+            ParserSubsetType.REGEX_SET, parsers, buffer_scanning=False
+        )
+        rows = []
+        with LogFileOpener.open_file(file_path) as opened_file:
+            for _, line_offset, primary_key, extracted_params in cls._match_lines(
+                opened_file, ingested_size, before, super_parser, parser_subset
+            ):
+                if primary_key is not None:
+                    if last_key is None:
+                        first_key = (line_offset, primary_key)
+                    last_key = primary_key
+                for parser_name, groups in six.iteritems(extracted_params):
+                    rows.append((parser_name, last_key, line_offset, tuple(groups)))
+        return rows, first_key
+
+    def find_clues(
+        self, file_id, parsers, super_parser, left_key=None, right_key=None, before=None
+    ):
+        """
+        a generator that returns tuples (parser name, line offset, groups) of lines of file
+        matched by given parsers, in reverse order. Only lines with encoded primary keys
+        from range [left_key, right_key] and lines beginning before given offset are returned,
+        None means unbounded range.
+        Lines before the first line with primary key are returned like by BacktrackSearcher:
+        when the whole file is searched, or when lines before given offset are searched
+        and no earlier line has primary key lower than left_key.
+        Lines appended to file after its ingestion are matched by parsers while they are read,
+        other lines are found by query.
+        """
+        file_row = self._connection.execute(
+            "SELECT path, ingested_size, last_primary_key, first_key_offset, first_primary_key "
+            "FROM files WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        file_path, ingested_size, last_key = file_row[:3]
+        first_key = file_row[3:5]
+        appended_rows = []
+        if before is None or ingested_size < before:
+            appended_rows, first_key = self._find_appended_clues(
+                file_path, ingested_size, last_key, first_key, parsers, super_parser, before
+            )
+        headless_lines_searched = self._are_headless_lines_searched(first_key, left_key, before)
+        # rows of one line are kept in order of matching, like rows found by query
+        appended_rows.sort(key=lambda row: row[2], reverse=True)
+        for parser_name, primary_key, line_offset, groups in appended_rows:
+            if self._is_in_key_range(primary_key, left_key, right_key, headless_lines_searched):
+                yield parser_name, line_offset, groups
+
+        parser_names = [parser.name for parser in parsers]
+        params = [file_id] + parser_names
+        key_conditions = []
+        for condition, key in (("primary_key >= ?", left_key), ("primary_key <= ?", right_key)):
+            if key is not None:
+                key_conditions.append(condition)
+                params.append(key)
+        conditions = ["file_id = ?", "parser_name IN (%s)" % (', '.join('?' * len(parser_names)),)]
+        if key_conditions:
+            key_condition = ' AND '.join(key_conditions)
+            if headless_lines_searched:
+                key_condition = "(primary_key IS NULL OR (%s))" % (key_condition,)
+            conditions.append(key_condition)
+        # the last line without newline is stored, but it's searched with appended lines
+        conditions.append("line_offset < ?")
+        params.append(ingested_size if before is None else min(before, ingested_size))
+        query = (
+            "SELECT parser_name, line_offset, groups FROM clues WHERE %s "
+            "ORDER BY line_offset DESC, rowid"
+        ) % (' AND '.join(conditions),)
+        for parser_name, line_offset, groups in self._connection.execute(query, params):
+            yield parser_name, line_offset, tuple(json.loads(groups))
+
+
+def main(argv=None):
+    """
+    ingests log files of whylog config found by SettingsFactorySelector,
+    usage: python -m whylog.log_reader.log_database [database path]
+    """
+    # imported here, so searchers using database don't import whole config package
+    from whylog.config import SettingsFactorySelector
+
+    argv = sys.argv[1:] if argv is None else argv
+    database_path = argv[0] if argv else LogDatabaseConsts.DEFAULT_PATH
+    config = SettingsFactorySelector.get_settings()['config']
+    database = LogDatabase(database_path)
+    try:
+        lines_count = database.ingest(config)
+    finally:
+        database.close()
+    sys.stdout.write("%s lines ingested into %s\n" % (lines_count, os.path.abspath(database_path)))
+
+
+if __name__ == '__main__':
+    main()
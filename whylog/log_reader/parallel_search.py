@@ -0,0 +1,72 @@
+from six.moves import cPickle as pickle
+
+_worker_searcher_class = None
+_worker_investigation_steps = (None, None)
+
+
+def _init_worker(searcher_class):
+    global _worker_searcher_class
+    _worker_searcher_class = searcher_class
+
+
+def _get_investigation_steps(search_nr, pickled_steps):
+    """
+    Unpickling investigation steps compiles regexes of their parser subsets,
+    so it's done only once per worker and search, not once per searched file.
+    """
+    global _worker_investigation_steps
+    if _worker_investigation_steps[0] != search_nr:
+        _worker_investigation_steps = (search_nr, pickle.loads(pickled_steps))
+    return _worker_investigation_steps[1]
+
+
+def _search_file(task):
+    search_nr, pickled_steps, step_nr, path, super_parser, original_front_input = task
+    investigation_steps = _get_investigation_steps(search_nr, pickled_steps)
+    searcher = _worker_searcher_class(path, investigation_steps[step_nr], super_parser)
+    return searcher.search(original_front_input)
+
+
+class ParallelSearch(object):
+    """
+    Scans files of all investigation steps in a pool of worker processes.
+    Results are returned in order of tasks, so merging them gives
+    the same clues in the same order as scanning files one after another.
+    Pool is started by the first search and reused by next ones, so caches of workers
+    (e.g. key ranges of files and sparse indexes) are kept between investigations,
+    until the pool is closed.
+    """
+    def __init__(self, searcher_class, workers):
+        self._searcher_class = searcher_class
+        self._workers = workers
+        self._pool = None
+        self._searches_count = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            # imported only by parallel investigations, since multiprocessing is missing
+            # e.g. in Jython
+            import multiprocessing
+
+            self._pool = multiprocessing.Pool(self._workers, _init_worker, (self._searcher_class,))
+        return self._pool
+
+    def search(self, investigation_steps, tasks):
+        """
+        :param tasks: list of (step number, file path, super parser, original front input)
+        :return: list of clues dicts, one for every task
+        """
+        self._searches_count += 1
+        pickled_steps = pickle.dumps(investigation_steps, pickle.HIGHEST_PROTOCOL)
+        return self._get_pool().map(
+            _search_file, [(self._searches_count, pickled_steps) + task for task in tasks]
+        )
+
+    def close(self):
+        """
+        stops worker processes, the next search starts new ones
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,64 @@
+import os
+import threading
+
+import six
+
+from whylog.log_reader.const import ReadAheadConsts
+
+
+class ReadAhead(object):
+    """
+    Reads parts of file, which will be scanned next, on a background thread,
+    so they are in page cache when memory-mapped content of file is accessed
+    and disk (or network file system) latency overlaps with matching of lines.
+    Where posix_fadvise is available, kernel is also asked to read them asynchronously.
+    Prefetching is only a hint, so errors of background reads are ignored.
+    """
+    def __init__(self, file_path, chunk_size=ReadAheadConsts.CHUNK_SIZE):
+        self._chunk_size = chunk_size
+        self._opened_file = open(file_path, 'rb', 0)
+        self._requests = six.moves.queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch_requested)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def prefetch(self, begin, end):
+        """
+        requests reading of file content between begin and end offsets in background
+        """
+        if begin < end:
+            self._requests.put((begin, end))
+
+    def close(self):
+        """
+        stops prefetching, requested parts which aren't read yet are skipped
+        """
+        self._closed.set()
+        self._requests.put(None)
+
+    def _prefetch_requested(self):
+        try:
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    return
+                self._prefetch(*request)
+        finally:
+            self._opened_file.close()
+
+    def _advise(self, begin, end):
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(self._opened_file.fileno(), begin, end - begin, os.POSIX_FADV_WILLNEED)
+
+    def _prefetch(self, begin, end):
+        try:
+            self._advise(begin, end)
+            self._opened_file.seek(begin)
+            while begin < end and not self._closed.is_set():
+                chunk = self._opened_file.read(min(self._chunk_size, end - begin))
+                if not chunk:
+                    return
+                begin += len(chunk)
+        except (IOError, OSError):
+            return
@@ -1,7 +1,11 @@
 import os
-from datetime import datetime
 
+from whylog.config.investigation_plan import InvestigationStep
+from whylog.config.utils import CompareResult
+from whylog.log_reader.compressed_files import LogFileOpener
+from whylog.log_reader.const import LineConsts
 from whylog.log_reader.exceptions import EmptyFile, OffsetBiggerThanFileSize
+from whylog.log_reader.reverse_reader import ReverseLineReader
 
 
 class ReadUtils(object):
@@ -20,10 +24,17 @@ class ReadUtils(object):
         fd.seek(position)
         return fd.read(buf_size)
 
+    @classmethod
+    def _newline(cls, content):
+        if hasattr(content, 'decode'):
+            # content was read from file opened in binary mode
+            return LineConsts.NEWLINE
+        return '\n'
+
     @classmethod
     def _read_split_lines(cls, fd, position, buf_size):
         content = cls._read_content(fd, position, buf_size)
-        return content.split('\n')
+        return content.split(cls._newline(content))
 
     @classmethod
     def _join_results(cls, first_part, second_part):
@@ -33,7 +44,7 @@ class ReadUtils(object):
             return second_part
         if not second_part:
             return first_part
-        return first_part[:-1] + ["".join((first_part[-1], second_part[0]))] + second_part[1:]
+        return first_part[:-1] + [first_part[-1] + second_part[0]] + second_part[1:]
 
     @classmethod
     def _expand_after(cls, fd, position):
@@ -41,7 +52,7 @@ class ReadUtils(object):
         line = fd.readline()
         if not line:
             raise OffsetBiggerThanFileSize(position)
-        return line.rstrip('\n')
+        return line.rstrip(cls._newline(line))
 
     @classmethod
     def _expand_before(cls, fd, position, buf_size):
@@ -74,42 +85,93 @@ class ReadUtils(object):
         return cls._read_entire_line(fd, offset, buf_size)
 
     @classmethod
-    def binary_search_left(cls, fd, left, right, value, super_parser):
-        while left + 1 < right:
-            curr = (left + right) // 2
-            line, line_begin, line_end = cls.get_line_containing_offset(
-                fd, curr, cls.STANDARD_BUFFER_SIZE
-            )
-            # TODO: mock fragment begin, replace it with right implementation
-            date = datetime.strptime(line.split(' r')[0], "%c")
-            # hack basing on specific lines construction in file_reader.py, it's mock, it should be removed later
-            if date < value:  # TODO: comparison between value and lines primary key value
-                # TODO: mock fragment end
-                # omit actual line and go right
-                left = line_end + 1
-            else:
-                # going left, omit actual line, but maybe it will be returned
-                right = line_begin
-        return right
+    def load_line(cls, file_path, offset):
+        """
+        returns decoded content of line of log file beginning at the specified offset
+        """
+        with LogFileOpener.open_file(file_path) as opened_file:
+            opened_file.seek(offset)
+            line = opened_file.readline()
+        return ReverseLineReader.decode_line(line.rstrip(LineConsts.NEWLINE))
+
+    @classmethod
+    def _get_primary_key_groups(cls, line, super_parser):
+        if hasattr(line, 'decode'):
+            # line was read from file opened in binary mode
+            line = line.decode(LineConsts.ENCODING, LineConsts.DECODING_ERRORS)
+        return super_parser.get_ordered_groups(line)
 
     @classmethod
-    def binary_search_right(cls, fd, left, right, value, super_parser):
-        while left + 1 < right:
-            curr = (left + right) // 2
-            line, line_begin, line_end = cls.get_line_containing_offset(
-                fd, curr, cls.STANDARD_BUFFER_SIZE
-            )
-            # TODO: mock fragment begin, replace it with right implementation
-            date = datetime.strptime(line.split(' r')[0], "%c")
-            # hack basing on specific lines construction in file_reader.py, it's mock, it should be removed later
-            if value >= date:  # TODO: comparison between value and lines primary key value
-                # TODO: mock fragment end
-                # go to the end of current line, maybe it will be returned
-                left = line_end
+    def find_line_with_primary_key(cls, fd, offset, right, super_parser):
+        """
+        returns the first line, beginning before right offset and not before the line
+        containing specified offset, that has primary key. Lines without primary key
+        (e.g. continuation lines of multi-line log entries) are skipped.
+        Returned value is a tuple: (line beginning, next line beginning, primary key groups),
+        or None when such line doesn't exist
+        """
+        line, line_begin, line_end = cls.get_line_containing_offset(
+            fd, offset, cls.STANDARD_BUFFER_SIZE
+        )
+        groups = cls._get_primary_key_groups(line, super_parser)
+        if groups:
+            return line_begin, line_end + 1, groups
+        position = line_end + 1
+        fd.seek(position)
+        while position < right:
+            line = fd.readline()
+            if not line:
+                break
+            groups = cls._get_primary_key_groups(line.rstrip(), super_parser)
+            if groups:
+                return position, position + len(line), groups
+            position += len(line)
+
+    @classmethod
+    def _binary_search(cls, fd, left, right, super_parser, is_searched_line):
+        """
+        returns beginning of the first line between left and right offsets whose primary key
+        groups satisfy is_searched_line predicate, or right offset if there is no such line.
+        The predicate has to be monotonic with respect to file order and left offset
+        has to be beginning of some line
+        """
+        result = right
+        while left < right:
+            middle = (left + right) // 2
+            found_line = cls.find_line_with_primary_key(fd, middle, right, super_parser)
+            if found_line is None:
+                # there is no line with primary key between middle and right
+                right = middle
+                continue
+            line_begin, next_line_begin, groups = found_line
+            if is_searched_line(groups):
+                result = line_begin
+                right = min(line_begin, middle)
             else:
-                # going left, current line is not interesting
-                right = line_begin - 1
-        if right == 0:
-            return 0
-        _, offset, _ = cls.get_line_containing_offset(fd, right - 1, cls.STANDARD_BUFFER_SIZE)
-        return offset
+                left = next_line_begin
+        return result
+
+    @classmethod
+    def binary_search_left(cls, fd, left, right, investigation_step, super_parser):
+        """
+        returns beginning of the first line whose primary key isn't lower than
+        the left bound of investigation_step search range
+        """
+        return cls._binary_search(
+            fd, left, right, super_parser, lambda groups: investigation_step.compare_with_bound(
+                InvestigationStep.LEFT_BOUND, groups
+            ) != CompareResult.LT
+        )
+
+    @classmethod
+    def binary_search_right(cls, fd, left, right, investigation_step, super_parser):
+        """
+        returns beginning of the first line whose primary key is greater than
+        the right bound of investigation_step search range, so it is the offset
+        just after the last line (with its continuation lines) that lies in search range
+        """
+        return cls._binary_search(
+            fd, left, right, super_parser, lambda groups: investigation_step.compare_with_bound(
+                InvestigationStep.RIGHT_BOUND, groups
+            ) == CompareResult.GT
+        )
@@ -0,0 +1,142 @@
+import itertools
+
+from whylog.config.investigation_plan import ReadSizePolicy
+from whylog.log_reader.compressed_files import LogFileOpener
+from whylog.log_reader.const import LineConsts
+from whylog.log_reader.read_ahead import ReadAhead
+
+
+class ReverseLineReader(object):
+    """
+    Reads lines of a log file in reverse order.
+    File content is memory-mapped and line ends are found by rfind called on the map,
+    so only single lines are copied out of the map and memory usage does not depend
+    on block size. Block size only limits the area searched by single rfind call.
+    Compressed files are read through their decompressed content.
+    Blocks have constant block_size when it's given, otherwise their sizes
+    grow according to read_size_policy (or default ReadSizePolicy).
+    When more than one block is scanned, the block preceding the scanned one
+    is prefetched by ReadAhead (unless read_ahead is False).
+    """
+    def __init__(self, file_path, block_size=None, read_ahead=True, read_size_policy=None):
+        self._file_path = file_path
+        self._block_size = block_size
+        self._read_ahead = read_ahead
+        self._read_size_policy = read_size_policy or ReadSizePolicy()
+
+    def _block_sizes(self):
+        if self._block_size is not None:
+            return itertools.repeat(self._block_size)
+        return self._read_size_policy.block_sizes()
+
+    def _start_read_ahead(self, end, lower_offset, block_size):
+        """
+        returns ReadAhead of mapped file, or None when scanned part of file fits in the first block
+        or file content is decompressed while it's read
+        """
+        if not self._read_ahead or end - lower_offset <= block_size:
+            return None
+        mapped_path = LogFileOpener.get_mapped_path(self._file_path)
+        if mapped_path is None:
+            return None
+        return ReadAhead(mapped_path)
+
+    @classmethod
+    def _prefetch_preceding_block(cls, read_ahead, block_start, lower_offset, block_size):
+        if read_ahead is not None:
+            read_ahead.prefetch(max(lower_offset, block_start - block_size), block_start)
+
+    def reverse_lines(self, offset, lower_offset=0):
+        """
+        a generator that returns the pairs consisting of not empty lines (as bytes)
+        in reverse order and byte offsets of their beginnings.
+        Only lines lying before offset and not before lower_offset are returned,
+        when offset points inside some line, the part of this line before offset is returned
+        """
+        mapped = LogFileOpener.open_map(self._file_path)
+        if mapped is None:
+            return
+        read_ahead = None
+        try:
+            end = min(offset, len(mapped))
+            if end <= lower_offset:
+                return
+            block_sizes = self._block_sizes()
+            block_size = next(block_sizes)
+            read_ahead = self._start_read_ahead(end, lower_offset, block_size)
+            for line, line_offset in self._reverse_lines_in_map(
+                mapped, end, lower_offset, itertools.chain([block_size], block_sizes), read_ahead
+            ):
+                yield line, line_offset
+        finally:
+            if read_ahead is not None:
+                read_ahead.close()
+            mapped.close()
+
+    def reverse_blocks(self, offset, lower_offset=0):
+        """
+        a generator that returns the pairs consisting of blocks of whole lines (as bytes)
+        in reverse order and byte offsets of their beginnings. Blocks cover the same part
+        of file as lines returned by reverse_lines, so the first returned block
+        ends with the part of line before offset, when offset points inside some line.
+        Block is longer than block size only when it contains single line longer than it.
+        """
+        mapped = LogFileOpener.open_map(self._file_path)
+        if mapped is None:
+            return
+        read_ahead = None
+        try:
+            block_end = min(offset, len(mapped))
+            block_sizes = self._block_sizes()
+            base_block_size = next(block_sizes)
+            read_ahead = self._start_read_ahead(block_end, lower_offset, base_block_size)
+            block_size = base_block_size
+            while block_end > lower_offset:
+                block_start = max(lower_offset, block_end - block_size)
+                block = mapped[block_start:block_end]
+                if block_start > lower_offset:
+                    # newline ending the block doesn't begin any line inside of it
+                    newline_pos = block.find(LineConsts.NEWLINE, 0, len(block) - 1)
+                    if newline_pos == -1:
+                        block_size *= 2
+                        continue
+                    block = block[newline_pos + 1:]
+                    block_start += newline_pos + 1
+                base_block_size = next(block_sizes)
+                self._prefetch_preceding_block(
+                    read_ahead, block_start, lower_offset, base_block_size
+                )
+                yield block, block_start
+                block_end = block_start
+                block_size = base_block_size
+        finally:
+            if read_ahead is not None:
+                read_ahead.close()
+            mapped.close()
+
+    def _reverse_lines_in_map(self, mapped, end, lower_offset, block_sizes, read_ahead=None):
+        line_end = block_end = end
+        block_size = next(block_sizes)
+        while block_end > lower_offset:
+            block_start = max(lower_offset, block_end - block_size)
+            block_size = next(block_sizes)
+            self._prefetch_preceding_block(read_ahead, block_start, lower_offset, block_size)
+            newline_pos = mapped.rfind(LineConsts.NEWLINE, block_start, block_end)
+            while newline_pos != -1:
+                if newline_pos + 1 < line_end:
+                    yield mapped[newline_pos + 1:line_end], newline_pos + 1
+                line_end = newline_pos
+                newline_pos = mapped.rfind(LineConsts.NEWLINE, block_start, line_end)
+            block_end = block_start
+        if lower_offset < line_end:
+            yield mapped[lower_offset:line_end], lower_offset
+
+    @classmethod
+    def strip_line(cls, line):
+        if line.endswith(LineConsts.CARRIAGE_RETURN):
+            return line[:-1]
+        return line
+
+    @classmethod
+    def decode_line(cls, line):
+        return cls.strip_line(line).decode(LineConsts.ENCODING, LineConsts.DECODING_ERRORS)
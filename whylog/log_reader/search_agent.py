@@ -0,0 +1,265 @@
+import json
+import socket
+import sys
+import threading
+
+import six
+from six.moves import socketserver
+
+from whylog.config.consts import LogEncoding
+from whylog.config.filename_matchers import WildCardFilenameMatcher
+from whylog.config.investigation_plan import InvestigationStepFactory, LineSource
+from whylog.config.super_parser import RegexSuperParserFactory
+from whylog.front.utils import FrontInput
+from whylog.log_reader.clue_store import ClueStore
+from whylog.log_reader.const import SearchAgentConsts
+from whylog.log_reader.exceptions import SearchAgentError
+from whylog.log_reader.searchers import BacktrackSearcher
+
+
+class AgentProtocol(object):
+    """
+    Messages between search agent and coordinator are JSON documents, one per line.
+    Request: {'step': serialized InvestigationStep, 'super_parser': serialized super parser,
+    'path_pattern': glob of searched files, 'front_input': {'path', 'offset'} of effect line
+    or None when effect line isn't on agent host}.
+    Agent answers with messages {'clue': [parser name, groups, line offset, path, line]},
+    finished by {'end': True}, or by {'error': message} when search failed.
+    """
+    @classmethod
+    def write_message(cls, opened_socket_file, message):
+        opened_socket_file.write(
+            json.dumps(message).encode(SearchAgentConsts.MESSAGE_ENCODING) + b'\n'
+        )
+
+    @classmethod
+    def read_message(cls, opened_socket_file):
+        """
+        returns the next message, or None when connection was closed
+        """
+        line = opened_socket_file.readline()
+        if not line:
+            return None
+        return json.loads(line.decode(SearchAgentConsts.MESSAGE_ENCODING))
+
+    @classmethod
+    def create_request(cls, host, investigation_step, path_pattern, super_parser, front_input):
+        serialized_front_input = None
+        if front_input.line_source.host == host:
+            serialized_front_input = {
+                'path': front_input.line_source.path,
+                'offset': front_input.offset
+            }
+        return {
+            'step': investigation_step.serialize(),
+            'super_parser': super_parser.serialize(),
+            'path_pattern': path_pattern,
+            'front_input': serialized_front_input
+        }
+
+    @classmethod
+    def super_parser_from_dao(cls, serialized):
+        serialized = dict(serialized)
+        # JSON object keys are always strings
+        serialized['convertions'] = dict(
+            (int(group), converter)
+            for group, converter in six.iteritems(serialized['convertions'])
+        )
+        return RegexSuperParserFactory.from_dao(serialized)
+
+    @classmethod
+    def front_input_from_dao(cls, serialized):
+        if serialized is None:
+            # no searched file is the effect file
+            return FrontInput(0, '', LineSource('localhost', None))
+        return FrontInput(serialized['offset'], '', LineSource('localhost', serialized['path']))
+
+
+class SearchAgentRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = AgentProtocol.read_message(self.rfile)
+        if request is None:
+            return
+        try:
+            for message in self._find_clues(request):
+                AgentProtocol.write_message(self.wfile, message)
+        except socket.error:
+            # coordinator has closed connection
+            return
+        except Exception as exception:
+            AgentProtocol.write_message(self.wfile, {'error': str(exception)})
+            return
+        AgentProtocol.write_message(self.wfile, {'end': True})
+
+    def _find_clues(self, request):
+        investigation_step = InvestigationStepFactory.from_dao(request['step'])
+        super_parser = AgentProtocol.super_parser_from_dao(request['super_parser'])
+        front_input = AgentProtocol.front_input_from_dao(request['front_input'])
+        bytes_lines = investigation_step.bytes_lines
+        for path in WildCardFilenameMatcher.glob_log_files(request['path_pattern']):
+            searcher = self.server.searcher_class(path, investigation_step, super_parser)
+            for line, line_offset in searcher.lines_to_search(front_input):
+                extracted_groups = investigation_step.get_extracted_groups(line)
+                if not extracted_groups:
+                    continue
+                if bytes_lines:
+                    line = LogEncoding.decode(line)
+                for parser, groups in extracted_groups:
+                    if bytes_lines:
+                        groups = [LogEncoding.decode(group) for group in groups]
+                    yield {'clue': [parser.name, groups, line_offset, path, line]}
+
+
+class SearchAgent(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Searches log files of host on which it runs, for LogReader running on other host.
+    Files matching requested path pattern are scanned locally by searcher_class (which
+    should provide lines_to_search, like BacktrackSearcher) and only lines matched by parsers
+    of requested investigation step are sent back, so log files don't cross the network.
+    Agent reads every requested file readable by its process, so it should listen
+    only on addresses reachable from trusted hosts.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, searcher_class=BacktrackSearcher):
+        socketserver.TCPServer.__init__(self, address, SearchAgentRequestHandler)
+        self.searcher_class = searcher_class
+
+
+class ReceivedLines(object):
+    """
+    Line loader of clues found by search agent, contents of their lines are sent with clues.
+    """
+    def __init__(self):
+        self._lines = {}
+
+    def add_line(self, file_path, offset, line):
+        self._lines[(file_path, offset)] = line
+
+    def load_line(self, file_path, offset):
+        return self._lines[(file_path, offset)]
+
+
+class SearchAgentClient(object):
+    """
+    Sends search requests to SearchAgent of host. Host is given as 'name:port',
+    or as 'name' of host on which agent listens on default port.
+    """
+    def __init__(self, host, timeout=SearchAgentConsts.TIMEOUT):
+        self._host = host
+        self._timeout = timeout
+
+    def _get_address(self):
+        name, _, port = self._host.rpartition(':')
+        if not name:
+            return self._host, SearchAgentConsts.DEFAULT_PORT
+        return name, int(port)
+
+    def search(self, investigation_step, path_pattern, super_parser, original_front_input):
+        """
+        returns ClueStore of clues found by agent in files matching path pattern
+        """
+        request = AgentProtocol.create_request(
+            self._host, investigation_step, path_pattern, super_parser, original_front_input
+        )
+        parsers = dict((parser.name, parser) for parser in investigation_step.get_parsers())
+        lines = ReceivedLines()
+        clues = ClueStore(lines, investigation_step.clue_retention)
+        line_sources = {}
+        try:
+            connection = socket.create_connection(self._get_address(), self._timeout)
+        except socket.error as error:
+            raise SearchAgentError(self._host, error)
+        try:
+            opened_socket_file = connection.makefile('rwb')
+            AgentProtocol.write_message(opened_socket_file, request)
+            opened_socket_file.flush()
+            while True:
+                message = AgentProtocol.read_message(opened_socket_file)
+                if message is None:
+                    raise SearchAgentError(self._host, 'connection closed before end of search')
+                if 'end' in message:
+                    return clues
+                if 'error' in message:
+                    raise SearchAgentError(self._host, message['error'])
+                parser_name, groups, line_offset, path, line = message['clue']
+                line_source = line_sources.get(path)
+                if line_source is None:
+                    line_source = LineSource(self._host, path)
+                    line_sources[path] = line_source
+                lines.add_line(path, line_offset, line)
+                clues.add(parsers[parser_name], tuple(groups), False, line_offset, line_source)
+        except socket.error as error:
+            raise SearchAgentError(self._host, error)
+        finally:
+            connection.close()
+
+
+class RemoteSearch(object):
+    """
+    Queries search agents concurrently, every request is sent by separate thread,
+    so files of other hosts are searched while files of localhost are scanned.
+    """
+    def __init__(self, requests, client_class=SearchAgentClient):
+        """
+        :param requests: list of tuples (host, investigation step, path pattern, super parser,
+                         original front input)
+        """
+        self._requests = requests
+        self._client_class = client_class
+        self._results = [None] * len(requests)
+        self._errors = []
+        self._threads = []
+
+    def _search(self, request_nr):
+        host, investigation_step, path_pattern, super_parser, original_front_input = \
+            self._requests[request_nr]
+        try:
+            self._results[request_nr] = self._client_class(host).search(
+                investigation_step, path_pattern, super_parser, original_front_input
+            )
+        except Exception as exception:
+            self._errors.append(exception)
+
+    def start(self):
+        for request_nr in six.moves.range(len(self._requests)):
+            thread = threading.Thread(target=self._search, args=(request_nr,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wait(self):
+        """
+        returns list of ClueStores, one for every request, in order of requests
+        """
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return self._results
+
+    def search(self):
+        clues = ClueStore()
+        for clues_from_host in self.start().wait():
+            clues.merge(clues_from_host)
+        return clues
+
+
+def main(argv=None):
+    """
+    runs search agent, usage: python -m whylog.log_reader.search_agent [address] [port]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    address = argv[0] if argv else 'localhost'
+    port = int(argv[1]) if len(argv) > 1 else SearchAgentConsts.DEFAULT_PORT
+    agent = SearchAgent((address, port))
+    try:
+        agent.serve_forever()
+    finally:
+        agent.server_close()
+
+
+if __name__ == '__main__':
+    main()
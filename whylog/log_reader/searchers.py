@@ -1,123 +1,333 @@
-import os.path
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
-from os import SEEK_SET
 
 import six
 
 from whylog.config.investigation_plan import LineSource
-from whylog.log_reader.const import BufsizeConsts
+from whylog.log_reader.clue_store import ClueStore
+from whylog.log_reader.compressed_files import LogFileOpener
+from whylog.log_reader.const import LineConsts
+from whylog.log_reader.key_ranges import KeyRangeCache
 from whylog.log_reader.read_utils import ReadUtils
+from whylog.log_reader.reverse_reader import ReverseLineReader
+from whylog.log_reader.sparse_index import IndexMaintainer, PrimaryKeyEncoder
 
 
 @six.add_metaclass(ABCMeta)
 class AbstractSearcher(object):
     @abstractmethod
-    def search(self, search_data, original_front_input):
+    def search(self, original_front_input):
         """
         transfer investigation to searcher
         """
         pass
 
 
-class IndexSearcher(AbstractSearcher):
-    def search(self, search_data, original_front_input):
-        pass
-
-
-class DatabaseSearcher(AbstractSearcher):
-    def search(self, search_data, original_front_input):
-        pass
-
-
 class BacktrackSearcher(AbstractSearcher):
+    """
+    Searches file backwards, from the effect line or from the end of search range
+    found by bisection. Files ordered by search range whose primary keys (kept in KEY_RANGES)
+    lie outside of it are skipped without being opened.
+    """
+    KEY_RANGES = KeyRangeCache()
+
     def __init__(self, file_path, investigation_step, super_parser):
         self._file_path = file_path
         self._investigation_step = investigation_step
         self._super_parser = super_parser
 
-    def _deduce_offset(self):
+    def _deduce_offsets_range(self):
         """
-        returns offset of the line with the specified time
+        returns a pair of offsets between whose lines from the search range lie
         """
-        for line in self._reverse_from_offset(os.path.getsize(self._file_path)):
-            line_content, line_offset = line
-            if self._investigation_step.is_line_in_search_range(line_content):
-                return line_offset + len(line_content) + 1
+        with LogFileOpener.open_file(self._file_path) as opened_file:
+            return self._find_offsets_range(opened_file)
 
-    def _find_left(self, opened_file, value, super_parser):
+    def _find_left(self, opened_file, left=0, right=None):
+        if right is None:
+            right = ReadUtils.size_of_opened_file(opened_file)
         return ReadUtils.binary_search_left(
-            opened_file, 0, ReadUtils.size_of_opened_file(opened_file), value, super_parser
+            opened_file, left, right, self._investigation_step, self._super_parser
         )
 
-    def _find_right(self, opened_file, value, super_parser):
+    def _find_right(self, opened_file, left=0, right=None):
+        if right is None:
+            right = ReadUtils.size_of_opened_file(opened_file)
         return ReadUtils.binary_search_right(
-            opened_file, 0, ReadUtils.size_of_opened_file(opened_file), value, super_parser
+            opened_file, left, right, self._investigation_step, self._super_parser
+        )
+
+    def _is_file_ordered_by_search_range(self):
+        return self._investigation_step.is_bounded(self._super_parser.get_primary_key_type())
+
+    def _is_file_outside_search_range(self):
+        if not self._is_file_ordered_by_search_range():
+            return False
+        key_range = self.KEY_RANGES.get_range(self._file_path, self._super_parser)
+        return not key_range.intersects(
+            *self._investigation_step.get_bounds(self._super_parser.get_primary_key_type())
         )
 
-    def _find_offsets_range(self, opened_file, search_range, super_parser):
+    def _find_offsets_range(self, opened_file):
         """
         returns a pair of offsets between whose the investigation
         in file should be provided
         """
-        # TODO: run function _find_left on left bound from search_range
-        # TODO: and run functions _find_right on right bound from search_range
-        pass
-
-    @classmethod
-    def _merge_clues(cls, collector, clues_from_line):
-        for parser_name, clue in six.iteritems(clues_from_line):
-            collector[parser_name].append(clue)
+        if not self._is_file_ordered_by_search_range():
+            return 0, ReadUtils.size_of_opened_file(opened_file)
+        left = self._find_left(opened_file)
+        return left, self._find_right(opened_file, left)
 
-    @classmethod
-    def _decrease_actual_offset_properly(cls, actual_offset, drop_string):
-        return actual_offset - len(drop_string) - 1
-
-    def _reverse_from_offset(self, offset, buf_size=BufsizeConsts.STANDARD_BUF_SIZE):
+    def _reverse_from_offset(
+        self, offset, buf_size=None, lower_offset=0, decode=True, read_size_policy=None
+    ):
         """
         a generator that returns the pairs consisting of
-        lines in reverse order and offsets corresponding to them,
-        beginning with the specified offset
-        """
-        with open(self._file_path) as fh:
-            fh.seek(offset)
-            total_size = remaining_size = fh.tell()
-            reverse_offset = 0
-            actual_offset = offset
-            truncated = None
-            while remaining_size > 0:
-                reverse_offset = min(total_size, reverse_offset + buf_size)
-                fh.seek(total_size - reverse_offset, SEEK_SET)
-                buffer_ = fh.read(min(remaining_size, buf_size))
-                lines = buffer_.split('\n')
-                remaining_size -= buf_size
-                if truncated is not None:
-                    if buffer_[-1] is not '\n':
-                        lines[-1] += truncated
-                    else:
-                        actual_offset = self._decrease_actual_offset_properly(
-                            actual_offset, truncated
-                        )
-                        yield truncated, actual_offset
-                truncated = lines[0]
-                for line in reversed(lines[1:]):
-                    if len(line):
-                        actual_offset = self._decrease_actual_offset_properly(actual_offset, line)
-                        yield line, actual_offset
-            if truncated:
-                actual_offset = self._decrease_actual_offset_properly(actual_offset, truncated)
-                yield truncated, actual_offset
+        lines in reverse order and byte offsets corresponding to them,
+        beginning with the specified offset and ending at lower_offset.
+        Lines are returned as bytes when decode is False.
+        File is read in blocks of buf_size, or of sizes given by read_size_policy
+        when buf_size is None
+        """
+        reader = ReverseLineReader(self._file_path, buf_size, read_size_policy=read_size_policy)
+        if not decode:
+            for line, line_offset in reader.reverse_lines(offset, lower_offset):
+                yield ReverseLineReader.strip_line(line), line_offset
+            return
+        for line, line_offset in reader.reverse_lines(offset, lower_offset):
+            yield ReverseLineReader.decode_line(line), line_offset
 
-    def search(self, original_front_input):
-        clues = defaultdict(list)
+    def lines_to_search(self, original_front_input):
+        """
+        returns a generator of pairs (line, offset) of lines in which
+        clues should be looked for, in reverse order
+        """
         if original_front_input.line_source.path == self._file_path:
             # TODO checking if host is also the same
             offset = original_front_input.offset
+            lower_offset = 0
+        elif self._is_file_outside_search_range():
+            return iter(())
+        else:
+            lower_offset, offset = self._deduce_offsets_range()
+        buffer_scanner = self._investigation_step.buffer_scanner
+        if buffer_scanner is not None:
+            lines = self._scan_blocks(buffer_scanner, offset, lower_offset)
         else:
-            offset = self._deduce_offset()
-        for line, actual_offset in self._reverse_from_offset(offset):
-            # TODO: remove mock
-            line_source = LineSource('localhost', self._file_path)
-            clues_from_line = self._investigation_step.get_clues(line, actual_offset, line_source)
-            self._merge_clues(clues, clues_from_line)
+            lines = self._reverse_from_offset(
+                offset,
+                lower_offset=lower_offset,
+                decode=not self._investigation_step.bytes_lines,
+                read_size_policy=self._investigation_step.read_size_policy
+            )
+        if self._is_file_ordered_by_search_range():
+            return self._stop_before_search_range(lines)
+        return lines
+
+    def _scan_blocks(self, buffer_scanner, offset, lower_offset, buf_size=None):
+        """
+        a generator that returns the pairs (line, offset) like _reverse_from_offset,
+        but only of lines which can be matched by parser subset. These lines are found
+        by buffer scanner in whole blocks of file, so python code is run only for them.
+        For file ordered by primary key also some lines with primary key are returned,
+        so _stop_before_search_range stops scan in the same place as for all lines.
+        Blocks in which buffer scanner can't be used are split into lines.
+        """
+        reader = ReverseLineReader(
+            self._file_path, buf_size, read_size_policy=self._investigation_step.read_size_policy
+        )
+        for block, block_offset in reader.reverse_blocks(offset, lower_offset):
+            text = self._get_block_text(block)
+            if text is None:
+                lines = self._split_block(block, block_offset)
+            else:
+                line_starts = buffer_scanner.find_line_starts(text)
+                if self._is_file_ordered_by_search_range():
+                    line_starts = self._add_lines_with_primary_key(text, line_starts)
+                lines = self._extract_lines(text, block, block_offset, line_starts)
+            for line in reversed(lines):
+                yield line
+
+    def _get_block_text(self, block):
+        """
+        returns content of block in the form matched by parser subset, or None when
+        lines of block would be different than lines returned by _reverse_from_offset
+        (block with carriage returns or not decodable block)
+        """
+        if LineConsts.CARRIAGE_RETURN in block:
+            return None
+        if self._investigation_step.bytes_lines:
+            return block
+        try:
+            return block.decode(LineConsts.ENCODING)
+        except UnicodeDecodeError:
+            return None
+
+    def _get_newline(self):
+        if self._investigation_step.bytes_lines:
+            return LineConsts.NEWLINE
+        return LineConsts.NEWLINE.decode(LineConsts.ENCODING)
+
+    def _split_block(self, block, block_offset):
+        lines = []
+        line_offset = block_offset
+        for line in block.split(LineConsts.NEWLINE):
+            if line and self._investigation_step.bytes_lines:
+                lines.append((ReverseLineReader.strip_line(line), line_offset))
+            elif line:
+                lines.append((ReverseLineReader.decode_line(line), line_offset))
+            line_offset += len(line) + 1
+        return lines
+
+    @classmethod
+    def _get_line_end(cls, text, newline, line_start):
+        line_end = text.find(newline, line_start)
+        if line_end == -1:
+            return len(text)
+        return line_end
+
+    def _extract_lines(self, text, block, block_offset, line_starts):
+        """
+        returns list of pairs (line, offset) of not empty lines beginning at line_starts
+        """
+        newline = self._get_newline()
+        # text has the same length as block only if every character is encoded as single byte
+        single_byte_characters = len(text) == len(block)
+        lines = []
+        line_offset = block_offset
+        previous_line_start = 0
+        for line_start in line_starts:
+            line_end = self._get_line_end(text, newline, line_start)
+            if line_end == line_start:
+                continue
+            if single_byte_characters:
+                line_offset = block_offset + line_start
+            else:
+                line_offset += len(text[previous_line_start:line_start].encode(LineConsts.ENCODING))
+                previous_line_start = line_start
+            lines.append((text[line_start:line_end], line_offset))
+        return lines
+
+    def _add_lines_with_primary_key(self, text, line_starts):
+        """
+        returns line_starts extended by beginnings of these lines with primary key,
+        after which _stop_before_search_range decides the same for found lines
+        as when it's given all lines: the first and the last line with primary key in text
+        and lines beginning entries of found lines without primary key.
+        Found lines before the first line with primary key in text belong to entry
+        beginning with the last line with primary key of some previous block.
+        """
+        newline = self._get_newline()
+        entry_start = self._find_line_with_primary_key(text, newline, 0, len(text))
+        if entry_start is None:
+            return line_starts
+        last_with_primary_key = self._find_line_with_primary_key(text, newline, 0, len(text), True)
+        lines_with_primary_key = set([entry_start, last_with_primary_key])
+        # lines before scanned_end are known to belong to entry beginning at entry_start
+        scanned_end = entry_start
+        for line_start in line_starts:
+            if line_start <= scanned_end:
+                continue
+            line = text[line_start:self._get_line_end(text, newline, line_start)]
+            if self._get_primary_key_groups(line):
+                entry_start = line_start
+            else:
+                found_entry_start = self._find_line_with_primary_key(
+                    text, newline, scanned_end, line_start, True
+                )
+                if found_entry_start is not None:
+                    entry_start = found_entry_start
+                lines_with_primary_key.add(entry_start)
+            scanned_end = line_start
+        lines_with_primary_key.update(line_starts)
+        return sorted(lines_with_primary_key)
+
+    def _find_line_with_primary_key(self, text, newline, begin, end, reverse=False):
+        """
+        returns beginning of the first (or the last one when reverse is set) line
+        with primary key lying between begin and end, or None if there is no such line.
+        begin should be beginning of line.
+        """
+        if not reverse:
+            line_start = begin
+            while line_start < end:
+                line_end = self._get_line_end(text, newline, line_start)
+                if self._get_primary_key_groups(text[line_start:line_end]):
+                    return line_start
+                line_start = line_end + 1
+            return None
+        line_end = end
+        while line_end > begin:
+            line_start = max(begin, text.rfind(newline, begin, line_end - 1) + 1)
+            if self._get_primary_key_groups(text[line_start:line_end].rstrip(newline)):
+                return line_start
+            line_end = line_start
+        return None
+
+    def _get_primary_key_groups(self, line):
+        if self._investigation_step.bytes_lines:
+            return self._super_parser.get_ordered_groups_from_bytes(line)
+        return self._super_parser.get_ordered_groups(line)
+
+    def _stop_before_search_range(self, lines):
+        """
+        passes lines of file ordered by primary key until the first line before search range.
+        Lines without primary key (e.g. continuation lines of multi-line entries) are held
+        until the line beginning their entry is found, so lines of the entry before
+        search range are not passed.
+        """
+        lines_without_primary_key = []
+        for line, line_offset in lines:
+            super_parser_groups = self._get_primary_key_groups(line)
+            if not super_parser_groups:
+                lines_without_primary_key.append((line, line_offset))
+                continue
+            if self._investigation_step.is_line_before_search_range(super_parser_groups):
+                return
+            for held_line in lines_without_primary_key:
+                yield held_line
+            lines_without_primary_key = []
+            yield line, line_offset
+        for held_line in lines_without_primary_key:
+            yield held_line
+
+    def create_clue_store(self):
+        return ClueStore(ReadUtils, self._investigation_step.clue_retention)
+
+    def collect_clues(self, collector, line, line_offset):
+        # TODO: remove mock
+        line_source = LineSource('localhost', self._file_path)
+        bytes_groups = self._investigation_step.bytes_lines
+        for parser, groups in self._investigation_step.get_extracted_groups(line):
+            collector.add(parser, groups, bytes_groups, line_offset, line_source)
+
+    def search(self, original_front_input):
+        clues = self.create_clue_store()
+        for line, actual_offset in self.lines_to_search(original_front_input):
+            self.collect_clues(clues, line, actual_offset)
         return clues
+
+
+class IndexSearcher(BacktrackSearcher):
+    """
+    Narrows the range of file bisected by BacktrackSearcher using sparse index
+    of primary key values. Index is stored next to the log file and kept valid
+    by IndexMaintainer, so repeated investigations on the same file
+    find their search range almost without reading the file.
+    Compressed files, which are not appended, are only bisected.
+    """
+    INDEX_MAINTAINER = IndexMaintainer()
+
+    def _find_offsets_range(self, opened_file):
+        primary_key_type = self._super_parser.get_primary_key_type()
+        if not all((
+            self._is_file_ordered_by_search_range(),
+            PrimaryKeyEncoder.is_encodable(primary_key_type),
+            not LogFileOpener.is_compressed(self._file_path)
+        )):  # yapf: disable
+            return super(IndexSearcher, self)._find_offsets_range(opened_file)
+        index = self.INDEX_MAINTAINER.get_fresh_index(self._file_path, self._super_parser)
+        left, right = index.find_offsets_range(
+            *self._investigation_step.get_bounds(primary_key_type)
+        )
+        left = self._find_left(opened_file, left, right)
+        return left, self._find_right(opened_file, left, right)
@@ -0,0 +1,280 @@
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+from whylog.converters import ConverterType
+from whylog.log_reader.const import IndexConsts
+from whylog.log_reader.read_utils import ReadUtils
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class PrimaryKeyEncoder(object):
+    """
+    Encodes primary key values as floats, so they can be kept in compact typed arrays.
+    Only numeric and date primary keys can be encoded.
+    """
+    ENCODABLE_TYPES = frozenset(
+        [ConverterType.TO_DATE, ConverterType.TO_INT, ConverterType.TO_FLOAT]
+    )
+
+    @classmethod
+    def is_encodable(cls, primary_key_type):
+        return primary_key_type in cls.ENCODABLE_TYPES
+
+    @classmethod
+    def encode(cls, primary_key_type, value):
+        if primary_key_type == ConverterType.TO_DATE:
+            return cls._encode_date(value)
+        return float(value)
+
+    @classmethod
+    def decode(cls, primary_key_type, encoded):
+        """
+        inverse of encode, dates with time zones are decoded as naive UTC dates
+        """
+        if primary_key_type == ConverterType.TO_DATE:
+            return EPOCH + timedelta(seconds=encoded)
+        if primary_key_type == ConverterType.TO_INT:
+            return int(encoded)
+        return encoded
+
+    @classmethod
+    def _encode_date(cls, value):
+        offset = value.utcoffset()
+        if offset is not None:
+            value = value.replace(tzinfo=None) - offset
+        delta = value - EPOCH
+        return delta.days * 86400 + delta.seconds + delta.microseconds / 1e6
+
+
+class FileIdentity(object):
+    """
+    Identifies the content of log file: device and inode numbers distinguish
+    a file renamed by logrotate from the new one, checksum of the head block detects
+    a file truncated and written again (copytruncate). Appended file keeps its identity
+    and only its size grows.
+    """
+    def __init__(self, device, inode, size, head_length, head_checksum):
+        self.device = device
+        self.inode = inode
+        self.size = size
+        self.head_length = head_length
+        self.head_checksum = head_checksum
+
+    @classmethod
+    def _head_checksum(cls, opened_file, head_length):
+        opened_file.seek(0)
+        return zlib.crc32(opened_file.read(head_length)) & 0xffffffff
+
+    @classmethod
+    def of_file(cls, file_path, head_length=IndexConsts.HEAD_BLOCK_SIZE):
+        with open(file_path, 'rb') as opened_file:
+            stat = os.fstat(opened_file.fileno())
+            head_length = min(head_length, stat.st_size)
+            return FileIdentity(
+                stat.st_dev, stat.st_ino, stat.st_size, head_length,
+                cls._head_checksum(opened_file, head_length)
+            )
+
+    def is_same_file(self, other):
+        return all((
+            self.device == other.device,
+            self.inode == other.inode,
+            self.head_length <= other.size,
+            self.head_checksum == other.head_checksum
+        ))  # yapf: disable
+
+    def __repr__(self):
+        return "(FileIdentity: %s, %s, %s, %s, %s)" % (
+            self.device, self.inode, self.size, self.head_length, self.head_checksum
+        )
+
+
+class SparseIndex(object):
+    """
+    Sparse index of log file ordered by primary key. It keeps pairs (encoded primary key,
+    byte offset) of the first lines with primary key found after every sample_spacing bytes
+    of file. The pairs are kept in two typed arrays, what allows to find range of offsets
+    containing given primary key range by bisection, without reading the log file.
+    """
+    HEADER = struct.Struct('<6sBBBQQQQLQQ')
+    MAGIC = b'WLGIDX'
+    VERSION = 2
+    BYTE_ORDERS = ('little', 'big')
+
+    def __init__(
+        self,
+        primary_key_type,
+        identity,
+        sample_spacing=IndexConsts.SAMPLE_SPACING,
+        keys=None,
+        offsets=None
+    ):
+        self.primary_key_type = primary_key_type
+        self.identity = identity
+        self.sample_spacing = sample_spacing
+        self.keys = keys or array('d')
+        self.offsets = offsets or array('d')
+
+    @property
+    def indexed_size(self):
+        return self.identity.size
+
+    @classmethod
+    def index_path(cls, file_path):
+        return file_path + IndexConsts.FILE_SUFFIX
+
+    @classmethod
+    def build(cls, file_path, super_parser, sample_spacing=IndexConsts.SAMPLE_SPACING):
+        index = SparseIndex(
+            super_parser.get_primary_key_type(), FileIdentity.of_file(file_path), sample_spacing
+        )
+        with open(file_path, 'rb') as opened_file:
+            index._add_samples(opened_file, super_parser, 0, index.indexed_size)
+        return index
+
+    def extend(self, file_path, super_parser, identity):
+        """
+        adds samples from the part of file appended after the index was built
+        """
+        position = 0
+        if self.offsets:
+            position = int(self.offsets[-1]) + self.sample_spacing
+        with open(file_path, 'rb') as opened_file:
+            self._add_samples(opened_file, super_parser, position, identity.size)
+        self.identity = identity
+
+    def _add_samples(self, opened_file, super_parser, position, file_size):
+        while position < file_size:
+            found_line = ReadUtils.find_line_with_primary_key(
+                opened_file, position, file_size, super_parser
+            )
+            if found_line is None:
+                return
+            line_begin, next_line_begin, groups = found_line
+            if not self.offsets or line_begin > self.offsets[-1]:
+                self.keys.append(PrimaryKeyEncoder.encode(self.primary_key_type, groups[0][1]))
+                self.offsets.append(line_begin)
+            position = max(position + self.sample_spacing, next_line_begin)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        returns index stored for given log file, or None if there is no valid index
+        """
+        try:
+            with open(cls.index_path(file_path), 'rb') as index_file:
+                return cls._read(index_file)
+        except (IOError, OSError, struct.error, EOFError, ValueError):
+            return None
+
+    @classmethod
+    def _read(cls, index_file):
+        (
+            magic, version, byte_order, type_length, sample_spacing, device, inode, size,
+            head_checksum, head_length, count
+        ) = cls.HEADER.unpack(index_file.read(cls.HEADER.size))
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return None
+        primary_key_type = index_file.read(type_length).decode('ascii')
+        keys = array('d')
+        offsets = array('d')
+        keys.fromfile(index_file, count)
+        offsets.fromfile(index_file, count)
+        if cls.BYTE_ORDERS[byte_order] != sys.byteorder:
+            keys.byteswap()
+            offsets.byteswap()
+        identity = FileIdentity(device, inode, size, head_length, head_checksum)
+        return SparseIndex(primary_key_type, identity, sample_spacing, keys, offsets)
+
+    def save(self, file_path):
+        """
+        stores index next to the log file, returns False when it's not possible
+        (e.g. log directory is read only)
+        """
+        index_path = self.index_path(file_path)
+        tmp_path = index_path + IndexConsts.TMP_SUFFIX
+        encoded_type = self.primary_key_type.encode('ascii')
+        identity = self.identity
+        try:
+            with open(tmp_path, 'wb') as index_file:
+                index_file.write(
+                    self.HEADER.pack(
+                        self.MAGIC, self.VERSION, self.BYTE_ORDERS.index(sys.byteorder),
+                        len(encoded_type), self.sample_spacing, identity.device, identity.inode,
+                        identity.size, identity.head_checksum, identity.head_length, len(self.keys)
+                    )
+                )
+                index_file.write(encoded_type)
+                self.keys.tofile(index_file)
+                self.offsets.tofile(index_file)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            os.rename(tmp_path, index_path)
+        except (IOError, OSError):
+            return False
+        return True
+
+    def find_offsets_range(self, left_bound, right_bound):
+        """
+        returns a pair of offsets, between whose all lines with primary key
+        from range [left_bound, right_bound] lie. None bound means unbounded range.
+        """
+        left = 0
+        if left_bound is not None:
+            sample_nr = bisect_left(
+                self.keys, PrimaryKeyEncoder.encode(self.primary_key_type, left_bound)
+            )
+            if sample_nr > 0:
+                left = int(self.offsets[sample_nr - 1])
+        right = self.indexed_size
+        if right_bound is not None:
+            sample_nr = bisect_right(
+                self.keys, PrimaryKeyEncoder.encode(self.primary_key_type, right_bound)
+            )
+            if sample_nr < len(self.offsets):
+                right = int(self.offsets[sample_nr])
+        return left, right
+
+
+class IndexMaintainer(object):
+    """
+    Keeps sparse indexes of log files valid while logs are appended and rotated.
+    Loaded indexes are cached in memory, so checking freshness of index costs
+    only single stat and read of file head block. When the file grew, index is extended
+    from the last indexed offset, it's rebuilt only when the file was truncated or replaced.
+    """
+    def __init__(self):
+        self._indexes = {}
+
+    def get_fresh_index(self, file_path, super_parser):
+        """
+        returns index of log file, which covers the whole current content of the file
+        """
+        index = self._indexes.get(file_path)
+        if index is None:
+            index = SparseIndex.load(file_path)
+        identity = FileIdentity.of_file(file_path, index.identity.head_length if index else 0)
+        if not self._is_index_valid(index, identity, super_parser):
+            index = SparseIndex.build(file_path, super_parser)
+            index.save(file_path)
+        elif identity.size > index.indexed_size:
+            index.extend(file_path, super_parser, FileIdentity.of_file(file_path))
+            index.save(file_path)
+        self._indexes[file_path] = index
+        return index
+
+    @classmethod
+    def _is_index_valid(cls, index, identity, super_parser):
+        if index is None:
+            return False
+        return all((
+            index.primary_key_type == super_parser.get_primary_key_type(),
+            index.identity.is_same_file(identity),
+            index.indexed_size <= identity.size
+        ))  # yapf: disable
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from whylog.config.buffer_scanner import BufferScanner, LineLocalityChecker
+from whylog.config.literal_prefilter import LiteralPrefilter
+
+
+class TestLineLocalityChecker(TestCase):
+    def test_line_local_regexes(self):
+        assert LineLocalityChecker.is_line_local("^(\d+) root cause$")
+        assert LineLocalityChecker.is_line_local("^(error|warning): (?P<host>\w+)")
+        assert LineLocalityChecker.is_line_local("^(\w+) (?=lost).* (\\1)?")
+
+    def test_regexes_depending_on_text_after_line(self):
+        assert not LineLocalityChecker.is_line_local("^(\d+) (?!ok)")
+        assert not LineLocalityChecker.is_line_local("(?<=a)b")
+        assert not LineLocalityChecker.is_line_local("^root cause\Z")
+        assert not LineLocalityChecker.is_line_local("\Aroot cause")
+        assert not LineLocalityChecker.is_line_local("^(a)?(?(1)b|c)")
+
+    def test_unparsable_regex(self):
+        assert not LineLocalityChecker.is_line_local("^(unclosed group")
+
+
+class TestBufferScanner(TestCase):
+    def test_finds_lines_matched_by_any_regex(self):
+        scanner = BufferScanner.create(["^(\d+) root cause$", "^(\d+) effect"])
+        buffer = "1 root cause\n2 other\n\n3 effect\n4 root cause"
+
+        assert scanner.find_line_starts(buffer) == [
+            0, buffer.index("3 effect"), buffer.index("4 root")
+        ]
+
+    def test_match_spanning_many_lines_doesnt_hide_next_lines(self):
+        scanner = BufferScanner.create(["^cause\s+id", "^id"])
+        buffer = "cause\nid\nother"
+
+        assert scanner.find_line_starts(buffer) == [0, buffer.index("id")]
+
+    def test_bytes_buffer(self):
+        scanner = BufferScanner.create(["^(\d+) root cause$"], bytes_lines=True)
+
+        assert scanner.find_line_starts(b"1 other\n2 root cause\n") == [8]
+
+    def test_lines_containing_required_literals(self):
+        regexes = ["^(\d+) root cause$", "^(\d+) effect"]
+        scanner = BufferScanner.create(regexes, prefilter=LiteralPrefilter.create(regexes))
+        buffer = "1 root cause\n2 other effect\n3 effect\n4 root cause"
+
+        assert scanner.find_line_starts(buffer) == [
+            0, buffer.index("3 effect"), buffer.index("4 root")
+        ]
+
+    def test_no_scanner_for_regexes_which_arent_line_local(self):
+        assert BufferScanner.create(["^(\d+) root cause$", "^(\d+) (?!ok)"]) is None
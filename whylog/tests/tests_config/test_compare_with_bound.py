@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest import TestCase
 
 from whylog.config.investigation_plan import InvestigationStep
@@ -44,3 +44,42 @@ class TestBoundCompare(TestCase):
                                                          ) == CompareResult.LT
         assert self.investigation_step.compare_with_bound(InvestigationStep.RIGHT_BOUND, []
                                                          ) == CompareResult.GT
+
+    def test_line_before_search_range(self):
+        assert self.investigation_step.is_line_before_search_range(
+            [('date', datetime(2015, 12, 3, 12, 7, 59))]
+        )
+        assert not self.investigation_step.is_line_before_search_range(
+            [('date', datetime(2015, 12, 3, 12, 8, 0))]
+        )
+        assert not self.investigation_step.is_line_before_search_range([])
+        assert not self.investigation_step.is_line_before_search_range([('int', 1)])
+
+    def test_left_bound_tolerance(self):
+        investigation_step = InvestigationStep(
+            None, {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, 0),
+                    InvestigationStep.RIGHT_BOUND: datetime(2015, 12, 3, 12, 8, 11)
+                }
+            }, {'date': timedelta(seconds=2)}
+        )  # yapf: disable
+        super_parser_groups = [('date', datetime(2015, 12, 3, 12, 7, 59))]
+        assert not investigation_step.is_line_before_search_range(super_parser_groups)
+        assert investigation_step.compare_with_bound(
+            InvestigationStep.LEFT_BOUND, super_parser_groups
+        ) == CompareResult.GT
+        assert investigation_step.get_bounds('date') == (
+            datetime(2015, 12, 3, 12, 7, 58), datetime(2015, 12, 3, 12, 8, 11)
+        )
+
+    def test_half_open_search_range(self):
+        search_ranges = {'date': {InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, 0)}}
+        investigation_step = InvestigationStep(None, search_ranges)
+        super_parser_groups = [('date', datetime(2015, 12, 3, 12, 8, 9))]
+        assert investigation_step.compare_with_bound(
+            InvestigationStep.LEFT_BOUND, super_parser_groups
+        ) == CompareResult.GT
+        assert investigation_step.compare_with_bound(
+            InvestigationStep.RIGHT_BOUND, super_parser_groups
+        ) == CompareResult.LT
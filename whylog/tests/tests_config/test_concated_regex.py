@@ -4,8 +4,11 @@ from unittest import TestCase
 import six
 
 from whylog.assistant.const import AssistantType
-from whylog.config.parser_subset import ConcatenatedRegexParser
-from whylog.config.parsers import RegexParserFactory
+from whylog.config.exceptions import UnsupportedParserSubsetType
+from whylog.config.parser_subset import (
+    ConcatenatedRegexParser, ParserSubsetFactory, RegexSetParser
+)
+from whylog.config.parsers import RegexParser, RegexParserFactory
 from whylog.teacher.user_intent import LineParamGroup, UserParserIntent
 
 # convertions
@@ -15,6 +18,8 @@ to_float = "float"
 
 
 class TestConcatedRegexParser(TestCase):
+    parser_subset_class = ConcatenatedRegexParser
+
     @classmethod
     def setUpClass(cls):
         cls.connection_error_line = "2015-12-03 12:08:09 Connection error occurred on alfa36. Host name: 2"
@@ -118,7 +123,7 @@ class TestConcatedRegexParser(TestCase):
         }
 
     def test_common_cases(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [
                 self.connection_error, self.data_migration, self.lost_data, self.root_cause,
                 self.lost_data_date, self.lost_data_suffix
@@ -142,7 +147,7 @@ class TestConcatedRegexParser(TestCase):
         }
 
     def test_all_subregexes_matches(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [
                 self.lost_data, self.lost_data_suffix, self.lost_data_date
             ]
@@ -151,7 +156,7 @@ class TestConcatedRegexParser(TestCase):
         self.is_three_lost_data_parsers_matched(concatenated)
 
     def test_matches_first_and_last_and_one_in_middle(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [
                 self.lost_data, self.dummy_parser, self.dummy_parser, self.lost_data_suffix,
                 self.dummy_parser, self.dummy_parser, self.lost_data_date
@@ -164,17 +169,17 @@ class TestConcatedRegexParser(TestCase):
         for parser_list in itertools.permutations(
             [self.data_migration, self.connection_error, self.lost_data_suffix, self.lost_data], 4
         ):
-            concatenated = ConcatenatedRegexParser(parser_list)
+            concatenated = self.parser_subset_class(parser_list)
             self.is_two_lost_data_parsers_matched(concatenated)
 
     def test_single_subregex(self):
-        concatenated = ConcatenatedRegexParser([self.lost_data])
+        concatenated = self.parser_subset_class([self.lost_data])
 
         assert concatenated.get_extracted_parsers_params(self.lost_data_line) == {
             self.lost_data.name: ("2015-12-03 12:11:00", "alfa21", "567.02", "101"),
         }
 
-        concatenated = ConcatenatedRegexParser([self.lost_data_suffix])
+        concatenated = self.parser_subset_class([self.lost_data_suffix])
 
         assert concatenated.get_extracted_parsers_params(self.lost_data_line) == {
             self.lost_data_suffix.name:
@@ -182,14 +187,14 @@ class TestConcatedRegexParser(TestCase):
         }
 
     def test_large_matches_first_and_second(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [self.lost_data, self.lost_data_suffix] + self.no_lost_data_parser_list
         )
 
         self.is_two_lost_data_parsers_matched(concatenated)
 
     def test_large_matches_first_second_and_last(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [
                 self.lost_data, self.lost_data_suffix
             ] + self.no_lost_data_parser_list + [self.lost_data_date]
@@ -198,10 +203,95 @@ class TestConcatedRegexParser(TestCase):
         self.is_three_lost_data_parsers_matched(concatenated)
 
     def test_large_matches_first_and_last_two(self):
-        concatenated = ConcatenatedRegexParser(
+        concatenated = self.parser_subset_class(
             [self.lost_data_suffix] + self.no_lost_data_parser_list + [
                 self.lost_data, self.lost_data_date
             ]
         )
 
         self.is_three_lost_data_parsers_matched(concatenated)
+
+    def test_bytes_lines(self):
+        parser_list = [
+            self.connection_error, self.data_migration, self.lost_data, self.root_cause,
+            self.lost_data_date, self.lost_data_suffix
+        ]
+        concatenated = self.parser_subset_class(parser_list)
+        bytes_concatenated = self.parser_subset_class(parser_list, bytes_lines=True)
+
+        assert bytes_concatenated.get_extracted_parsers_params(b"aaaaa") == {}
+        assert bytes_concatenated.get_extracted_parsers_params(
+            self.connection_error_line.encode('utf-8')
+        ) == {
+            self.connection_error.name: (b"2015-12-03 12:08:09", b"alfa36", b"2")
+        }
+        for line in [
+            self.connection_error_line, self.data_migration_line, self.lost_data_line,
+            self.root_cause_line
+        ]:
+            assert bytes_concatenated.convert_parsers_groups_from_matched_line(
+                line.encode('utf-8')
+            ) == concatenated.convert_parsers_groups_from_matched_line(line)
+
+    def test_bytes_lines_with_non_ascii_groups(self):
+        concatenated = self.parser_subset_class([self.lost_data_suffix], bytes_lines=True)
+        group = b'za\xc5\xbc\xc3\xb3\xc5\x82\xc4\x87'.decode('utf-8')
+        line = "2015-12-03 12:11:00 Data is missing at " + group
+
+        converted_params = concatenated.convert_parsers_groups_from_matched_line(
+            line.encode('utf-8')
+        )
+
+        assert converted_params[self.lost_data_suffix.name][1] == group
+        assert concatenated.decode_line(line.encode('utf-8')) == line
+
+    def test_matching_parsers_in_order_of_subset(self):
+        for parser_list in itertools.permutations(
+            [self.lost_data_date, self.connection_error, self.lost_data_suffix, self.lost_data], 4
+        ):
+            concatenated = self.parser_subset_class(list(parser_list) + [self.dummy_parser])
+            matching_parsers, params = concatenated.get_matching_parsers(self.lost_data_line)
+
+            assert matching_parsers == [
+                parser for parser in parser_list
+                if parser.get_regex_params(self.lost_data_line) is not None
+            ]
+            assert params == dict(
+                (parser.name, parser.get_regex_params(self.lost_data_line))
+                for parser in matching_parsers
+            )
+
+        concatenated = self.parser_subset_class([self.connection_error, self.lost_data])
+        assert concatenated.get_matching_parsers(self.root_cause_line) == ([], {})
+
+
+class TestRegexSetParser(TestConcatedRegexParser):
+    parser_subset_class = RegexSetParser
+
+    def test_parser_without_literal_matched(self):
+        year_parser = RegexParser(
+            "year", self.lost_data_line, "^(\d\d\d\d)\D", [], "filesystem", {}
+        )
+        parser_subset = self.parser_subset_class([self.lost_data, year_parser, self.dummy_parser])
+
+        assert parser_subset.get_extracted_parsers_params(self.lost_data_line) == {
+            self.lost_data.name: ("2015-12-03 12:11:00", "alfa21", "567.02", "101"),
+            year_parser.name: ("2015",),
+        }
+        assert parser_subset.get_extracted_parsers_params(self.root_cause_line) == {}
+
+    def test_unsupported_parser_subset_type(self):
+        try:
+            ParserSubsetFactory.create('unknown', [self.lost_data])
+        except UnsupportedParserSubsetType as error:
+            assert error.unsupported_type == 'unknown'
+        else:
+            assert False
+
+
+class AutomatonRegexSetParser(RegexSetParser):
+    MAX_LITERALS_WITHOUT_AUTOMATON = 0
+
+
+class TestRegexSetParserWithAutomaton(TestRegexSetParser):
+    parser_subset_class = AutomatonRegexSetParser
@@ -0,0 +1,94 @@
+import os.path
+import shutil
+import tempfile
+from unittest import TestCase
+
+import six
+
+from whylog.config import YamlConfig
+from whylog.config.config_cache import ConfigCache
+from whylog.tests.utils import ConfigPathFactory
+
+path_test_files = ['whylog', 'tests', 'tests_config', 'test_files']
+
+
+class TestConfigCache(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ConfigCache(os.path.join(self.tmp_dir, 'cache'))
+        for path in ConfigPathFactory.get_path_to_config_files(
+            os.path.join(*path_test_files), False
+        ):
+            shutil.copy(path, self.tmp_dir)
+        self.config_paths = ConfigPathFactory.get_path_to_config_files(self.tmp_dir, False)
+        self.rules_path = self.config_paths[1]
+        self.loaded_paths = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _load_documents(self, path):
+        self.loaded_paths.append(path)
+        return YamlConfig._parse_file_with_config(path)
+
+    def _load(self, path):
+        return self.cache.load(path, self._load_documents)
+
+    def test_documents_loaded_once(self):
+        documents = self._load(self.rules_path)
+        cache_path = self.cache.get_cache_path(self.rules_path)
+        # temporary file is renamed to cache file
+        assert os.listdir(os.path.dirname(cache_path)) == [os.path.basename(cache_path)]
+
+        assert self._load(self.rules_path) == documents
+        assert self.loaded_paths == [self.rules_path]
+
+    def test_documents_loaded_again_when_file_is_modified(self):
+        documents = self._load(self.rules_path)
+        stat = os.stat(self.rules_path)
+        with open(self.rules_path, 'r+') as rules_file:
+            content = rules_file.read()
+            rules_file.seek(0)
+            # the same size, which is restored together with mtime
+            rules_file.write(content.replace('AND', 'OR '))
+        os.utime(self.rules_path, (stat.st_atime, stat.st_mtime))
+
+        modified_documents = self._load(self.rules_path)
+
+        assert self.loaded_paths == [self.rules_path, self.rules_path]
+        assert modified_documents != documents
+        assert self._load(self.rules_path) == modified_documents
+        assert len(self.loaded_paths) == 2
+
+    def test_broken_cache_is_replaced(self):
+        self._load(self.rules_path)
+        with open(self.cache.get_cache_path(self.rules_path), 'wb') as cache_file:
+            cache_file.write(b'not a cache')
+
+        documents = self._load(self.rules_path)
+
+        assert self._load(self.rules_path) == documents
+        assert self.loaded_paths == [self.rules_path, self.rules_path]
+
+    def test_config_loaded_from_cache(self):
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        YamlConfig(*self.config_paths, config_cache_dir=cache_dir)
+        cached_config = YamlConfig(*self.config_paths, config_cache_dir=cache_dir)
+        config = YamlConfig(*self.config_paths)
+
+        assert all(os.path.isfile(self.cache.get_cache_path(path)) for path in self.config_paths)
+        assert sorted(six.iterkeys(cached_config._parsers)) == sorted(six.iterkeys(config._parsers))
+        for name, parser in six.iteritems(config._parsers):
+            assert cached_config._parsers[name].serialize() == parser.serialize()
+        assert sorted(six.iterkeys(cached_config._rules)) == sorted(six.iterkeys(config._rules))
+        for effect, rules in six.iteritems(config._rules):
+            assert [rule.serialize() for rule in cached_config._rules[effect]] == [
+                rule.serialize() for rule in rules
+            ]
+        assert [
+            [matcher.serialize() for matcher in log_type.filename_matchers]
+            for log_type in six.itervalues(cached_config._log_types)
+        ] == [
+            [matcher.serialize() for matcher in log_type.filename_matchers]
+            for log_type in six.itervalues(config._log_types)
+        ]
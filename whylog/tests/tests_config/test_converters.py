@@ -1,9 +1,12 @@
 from datetime import datetime
 from unittest import TestCase
 
+import dateutil.parser
+
 from whylog.config.parser_subset import ConcatenatedRegexParser
 from whylog.config.parsers import RegexParser
-from whylog.converters.exceptions import UnsupportedConverterError
+from whylog.converters import DateConverter
+from whylog.converters.exceptions import ConverterError, UnsupportedConverterError
 
 
 class TestBasic(TestCase):
@@ -35,3 +38,25 @@ class TestBasic(TestCase):
             UnsupportedConverterError, concatenated.convert_parsers_groups_from_matched_line,
             self.simple_line
         )
+
+    def test_iso_dates_converted_without_dateutil(self):
+        for date, expected in (
+            ('2015-12-03 12:10:10', datetime(2015, 12, 3, 12, 10, 10)),
+            ('2015-12-03T12:10:10', datetime(2015, 12, 3, 12, 10, 10)),
+            ('2015-12-03 12:10:10.5', datetime(2015, 12, 3, 12, 10, 10, 500000)),
+            ('2015-12-03 12:10:10,123', datetime(2015, 12, 3, 12, 10, 10, 123000)),
+            ('2015-12-03T12:10:10,000001', datetime(2015, 12, 3, 12, 10, 10, 1)),
+        ):
+            assert DateConverter.ISO_DATE_REGEX.match(date) is not None
+            assert DateConverter.convert(date) == expected
+            assert DateConverter.convert(date) == dateutil.parser.parse(date, fuzzy=True)
+
+    def test_other_dates_converted_by_dateutil(self):
+        for date in (
+            '2015-12-03 12:10:10+01:00', '2015-12-03T12:10:10.5Z', '2015-12-03 12:10:10.1234567',
+            'Dec 3 12:10:10 2015'
+        ):
+            assert DateConverter.ISO_DATE_REGEX.match(date) is None
+            assert DateConverter.convert(date) == dateutil.parser.parse(date, fuzzy=True)
+        assert DateConverter.convert('2015-12-03 12:10:10+01:00').tzinfo is not None
+        self.assertRaises(ConverterError, DateConverter.safe_convert, '2015-02-30 12:10:10')
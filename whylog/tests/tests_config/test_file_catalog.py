@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from whylog.config.file_catalog import FileCatalog
+
+
+class TestFileCatalog(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.catalog = FileCatalog()
+
+    def tearDown(self):
+        self.catalog.stop_refreshing()
+        shutil.rmtree(self.tmp_dir)
+
+    def _create_file(self, *path_parts):
+        path = os.path.join(self.tmp_dir, *path_parts)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+        return path
+
+    def _set_mtime(self, directory, mtime):
+        os.utime(directory, (mtime, mtime))
+
+    def test_files_cached_until_directory_is_modified(self):
+        pattern = os.path.join(self.tmp_dir, '*.log')
+        first_path = self._create_file('node_1.log')
+        an_hour_ago = time.time() - 3600
+        self._set_mtime(self.tmp_dir, an_hour_ago)
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        # modification is hidden by restored mtime, so cached list is returned
+        second_path = self._create_file('node_2.log')
+        self._set_mtime(self.tmp_dir, an_hour_ago)
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        self._set_mtime(self.tmp_dir, an_hour_ago + 1)
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path]
+
+    def test_recently_modified_directory_is_globbed_again(self):
+        pattern = os.path.join(self.tmp_dir, '*.log')
+        first_path = self._create_file('node_1.log')
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        mtime = os.stat(self.tmp_dir).st_mtime
+        second_path = self._create_file('node_2.log')
+        self._set_mtime(self.tmp_dir, mtime)
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path]
+
+    def test_directories_matched_by_pattern_are_checked(self):
+        pattern = os.path.join(self.tmp_dir, '*', 'app.log')
+        first_path = self._create_file('node_1', 'app.log')
+        os.mkdir(os.path.join(self.tmp_dir, 'node_2'))
+        an_hour_ago = time.time() - 3600
+        for directory in ['', 'node_1', 'node_2']:
+            self._set_mtime(os.path.join(self.tmp_dir, directory), an_hour_ago)
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        second_path = self._create_file('node_2', 'app.log')
+        self._set_mtime(os.path.join(self.tmp_dir, 'node_2'), an_hour_ago + 1)
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path]
+
+        third_path = self._create_file('node_3', 'app.log')
+        self._set_mtime(os.path.join(self.tmp_dir, 'node_3'), an_hour_ago)
+        self._set_mtime(self.tmp_dir, an_hour_ago + 1)
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path, third_path]
+
+    def test_directories_not_checked_by_queries_when_refreshed_in_background(self):
+        pattern = os.path.join(self.tmp_dir, '*.log')
+        first_path = self._create_file('node_1.log')
+        self.catalog.start_refreshing(3600)
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        second_path = self._create_file('node_2.log')
+        assert self.catalog.get_files(pattern) == [first_path]
+        self.catalog.refresh()
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path]
+
+    def test_catalog_refreshed_in_background(self):
+        pattern = os.path.join(self.tmp_dir, '*.log')
+        first_path = self._create_file('node_1.log')
+        an_hour_ago = time.time() - 3600
+        self._set_mtime(self.tmp_dir, an_hour_ago)
+        self.catalog.start_refreshing(0.01)
+        assert self.catalog.get_files(pattern) == [first_path]
+
+        second_path = self._create_file('node_2.log')
+        self._set_mtime(self.tmp_dir, an_hour_ago + 1)
+        deadline = time.time() + 5
+        while len(self.catalog.get_files(pattern)) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert sorted(self.catalog.get_files(pattern)) == [first_path, second_path]
@@ -1,5 +1,6 @@
 import os.path
 import shutil
+import tempfile
 from datetime import datetime
 from unittest import TestCase
 
@@ -31,6 +32,38 @@ class TestBasic(TestCase):
             ('localhost', os.path.join(path, 'node_2.log'), super_parser)
         ]
 
+    def test_sparse_indexes_not_matched(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            file_names = [
+                'app.log', 'app.log.1', 'app.log.whylog_index', 'app.log.whylog_index.tmp'
+            ]
+            for file_name in file_names:
+                open(os.path.join(tmp_dir, file_name), 'w').close()
+            super_parser = RegexSuperParser(
+                '^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d).*', [1], {1: 'date'}
+            )
+            matcher = WildCardFilenameMatcher(
+                'localhost', os.path.join(tmp_dir, 'app.log*'), 'test_log_type', super_parser
+            )
+
+            assert sorted(path for _, path, _ in matcher.get_matched_files()) == [
+                os.path.join(tmp_dir, 'app.log'),
+                os.path.join(tmp_dir, 'app.log.1')
+            ]
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_files_of_other_hosts_matched_by_agents(self):
+        super_parser = RegexSuperParser('^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d).*', [1], {1: 'date'})
+        matcher = WildCardFilenameMatcher(
+            'node_2:9797', '/var/log/node_*.log', 'test_log_type', super_parser
+        )
+
+        assert list(matcher.get_matched_files()) == [
+            ('node_2:9797', '/var/log/node_*.log', super_parser)
+        ]
+
     def test_add_log_type(self):
         SettingsFactorySelector.WHYLOG_DIR = TestPaths.WHYLOG_DIR
         config = SettingsFactorySelector.get_settings()['config']
@@ -4,8 +4,10 @@ import shutil
 import six
 
 from whylog.config import SettingsFactorySelector
-from whylog.config.consts import YamlFileNames
+from whylog.config.consts import ConfigCacheConsts, SqliteFileNames, YamlFileNames
+from whylog.config.exceptions import UnsupportedConfigType
 from whylog.config.settings_factory import YamlSettingsFactory
+from whylog.config.sqlite_config import SqliteConfig
 from whylog.tests.utils import TestRemovingSettings
 
 
@@ -15,6 +17,7 @@ class TestBasic(TestRemovingSettings):
         assert os.path.isdir(predicted_dir_path)
         assert config._parsers_path == os.path.join(predicted_dir_path, YamlFileNames.parsers)
         assert sorted(os.listdir(predicted_dir_path)) == [
+            ConfigCacheConsts.DIRECTORY_NAME,
             YamlFileNames.default_log_types,
             YamlFileNames.parsers,
             YamlFileNames.rules,
@@ -42,3 +45,22 @@ class TestBasic(TestRemovingSettings):
     def test_find_config_in_home_directory(self):
         self.find_config_in_parent_dir(SettingsFactorySelector.HOME_DIR)
         shutil.rmtree(SettingsFactorySelector._attach_whylog_dir(SettingsFactorySelector.HOME_DIR))
+
+    def test_create_sqlite_config(self):
+        self.remove_settings_dirs()
+        config = SettingsFactorySelector.get_settings('sqlite')['config']
+        try:
+            expected_path = SettingsFactorySelector._attach_whylog_dir(os.getcwd())
+            assert type(config) is SqliteConfig
+            assert config._database_path == os.path.join(expected_path, SqliteFileNames.config)
+            assert sorted(os.listdir(expected_path)) == [
+                SqliteFileNames.config,
+                YamlFileNames.settings,
+            ]
+        finally:
+            config.close()
+            self.remove_settings_dirs()
+
+    def test_create_config_of_unsupported_type(self):
+        self.remove_settings_dirs()
+        self.assertRaises(UnsupportedConfigType, SettingsFactorySelector.get_settings, 'xml')
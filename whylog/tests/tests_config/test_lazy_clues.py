@@ -0,0 +1,80 @@
+from datetime import datetime
+from unittest import TestCase
+
+from whylog.config.investigation_plan import (
+    Clue, ConvertedGroups, InvestigationStep, LazyClue, LineSource
+)
+from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parsers import RegexParser
+
+
+class ConversionsCountingParser(RegexParser):
+    def __init__(self, *args):
+        super(ConversionsCountingParser, self).__init__(*args)
+        self.conversions = []
+
+    def convert_param(self, group_index, param):
+        self.conversions.append(group_index)
+        return super(ConversionsCountingParser, self).convert_param(group_index, param)
+
+
+class LinesDict(object):
+    def __init__(self, lines):
+        self.lines = lines
+        self.loaded = []
+
+    def load_line(self, file_path, offset):
+        self.loaded.append((file_path, offset))
+        return self.lines[offset]
+
+
+class TestLazyClues(TestCase):
+    def setUp(self):
+        self.parser = ConversionsCountingParser(
+            "lost_data", "",
+            "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) Data lost at (\w+)\. Loss = (.*) GB$", [1],
+            "database", {
+                1: "date",
+                3: "float"
+            }
+        )
+        self.line = "2015-12-03 12:11:00 Data lost at alfa21. Loss = 567.02 GB"
+        self.line_source = LineSource('localhost', 'node_1.log')
+
+    def test_groups_are_converted_on_demand(self):
+        groups = ConvertedGroups(self.parser, self.parser.get_regex_params(self.line))
+
+        assert groups[2] == 567.02
+        assert groups[-1] == 567.02
+        assert self.parser.conversions == [2]
+        assert len(groups) == 3
+        assert groups == (datetime(2015, 12, 3, 12, 11), "alfa21", 567.02)
+        assert self.parser.conversions == [2, 0, 1]
+
+    def test_bytes_groups(self):
+        groups = ConvertedGroups(
+            self.parser, self.parser.get_bytes_regex_params(self.line.encode('utf-8')), True
+        )
+
+        assert groups == (datetime(2015, 12, 3, 12, 11), "alfa21", 567.02)
+
+    def test_line_is_loaded_on_demand(self):
+        lines = LinesDict({100: self.line})
+        groups = ConvertedGroups(self.parser, self.parser.get_regex_params(self.line))
+        clue = LazyClue(groups, lines, 100, self.line_source)
+
+        assert clue.regex_parameters[1] == "alfa21"
+        assert not lines.loaded
+        assert clue.line_prefix_content == self.line
+        assert clue.line_prefix_content == self.line
+        assert lines.loaded == [('node_1.log', 100)]
+
+    def test_lazy_clues_equal_to_converted_clues(self):
+        step = InvestigationStep(ConcatenatedRegexParser([self.parser]), {})
+        lazy_clues = step.get_clues(self.line, 100, self.line_source, LinesDict({100: self.line}))
+
+        assert lazy_clues == step.get_clues(self.line, 100, self.line_source)
+        assert lazy_clues['lost_data'] == Clue(
+            (datetime(2015, 12, 3, 12, 11), "alfa21", 567.02), self.line, 100, self.line_source
+        )
+        assert step.get_clues("other line", 0, self.line_source, LinesDict({})) == {}
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from whylog.config.literal_prefilter import (
+    LiteralAutomaton, LiteralPrefilter, RequiredLiteralExtractor
+)
+from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parsers import RegexParser
+
+
+class TestRequiredLiteralExtractor(TestCase):
+    def test_longest_literal(self):
+        assert RequiredLiteralExtractor.get_longest_literal(
+            "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) Data is missing at (.*)\. Loss = (.*) GB\."
+        ) == " Data is missing at "
+        assert RequiredLiteralExtractor.get_longest_literal("^root cause$") == "root cause"
+        literal = RequiredLiteralExtractor.get_longest_literal("^(\d+) (?:connection )+lost")
+        assert literal == "connection "
+
+    def test_literals_which_are_not_required(self):
+        assert RequiredLiteralExtractor.get_longest_literal("^(error|warning) (\d+)") == " "
+        assert RequiredLiteralExtractor.get_longest_literal("^(\d+)(connection lost)?") is None
+        assert RequiredLiteralExtractor.get_longest_literal("^(\d+) (?i)connection lost") is None
+        assert RequiredLiteralExtractor.get_longest_literal("^(\d+) (?i:connection lost)") == " "
+        assert RequiredLiteralExtractor.get_longest_literal("^(.*)$") is None
+
+    def test_unparsable_regex(self):
+        assert RequiredLiteralExtractor.get_longest_literal("^(unclosed group") is None
+
+
+class TestLiteralPrefilter(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parsers = [
+            RegexParser(
+                "connection_error", "", "^(\d+) Connection error occurred on (.*)$", [1], "hydra",
+                {1: "int"}
+            ),
+            RegexParser(
+                "data_migration", "", "^(\d+) Data migration from (.*) failed$", [1], "hydra",
+                {1: "int"}
+            )
+        ]
+
+    def test_prefilter_rejects_lines_without_literals(self):
+        prefilter = LiteralPrefilter.create(parser.regex_str for parser in self.parsers)
+
+        assert prefilter.may_match("12 Connection error occurred on alfa36")
+        assert prefilter.may_match("12 Data migration from alfa36 failed")
+        assert not prefilter.may_match("12 Data copied from alfa36")
+        assert not prefilter.may_match("12 Connection established")
+
+    def test_bytes_prefilter(self):
+        prefilter = LiteralPrefilter.create(
+            (parser.regex_str for parser in self.parsers), bytes_lines=True
+        )
+
+        assert prefilter.may_match(b"12 Data migration from alfa36 failed")
+        assert not prefilter.may_match(b"12 Connection established")
+
+    def test_no_prefilter_when_some_regex_has_no_literal(self):
+        assert LiteralPrefilter.create(["^(\d+) Connection error", "^(\d+)$"]) is None
+        assert LiteralPrefilter.create(["^(\d+) Connection error", "^(\d+) o(\d+)"]) is None
+
+    def test_prefilter_does_not_change_matching(self):
+        lines = [
+            "12 Connection error occurred on alfa36",
+            "12 Data migration from alfa36 failed",
+            "12 Data migration from alfa36 succeeded",
+            "12 Connection established",
+        ]
+        prefiltered = ConcatenatedRegexParser(self.parsers)
+        not_prefiltered = ConcatenatedRegexParser(self.parsers, literal_prefilter=False)
+        for line in lines:
+            assert prefiltered.get_extracted_parsers_params(
+                line
+            ) == not_prefiltered.get_extracted_parsers_params(line)
+
+
+class TestLiteralAutomaton(TestCase):
+    def test_overlapping_literals_found(self):
+        literals = ['he', 'she', 'his', 'hers', 'disk full', 'disk', 'full']
+        automaton = LiteralAutomaton(literals)
+        for text in ['ushers', 'his disk is full', 'disk full', 'nothing', '', 'hhershe']:
+            assert automaton.find_literals(text) == set(
+                literal for literal in literals if literal in text
+            )
+
+    def test_bytes_literals(self):
+        automaton = LiteralAutomaton([b'error', b'rror 5'])
+        assert automaton.find_literals(b'disk error 5') == set([b'error', b'rror 5'])
+        assert automaton.find_literals(b'disk errors') == set([b'error'])
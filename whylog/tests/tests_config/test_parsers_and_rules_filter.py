@@ -59,6 +59,19 @@ class TestBasic(TestCase):
         assert self.get_names_of_parsers(parsers) == ['connectionerror']
         assert regex_params == {'connectionerror': ('2016-04-12 23:54:45', 'comp1', 'host1')}
 
+    def test_effect_matcher_created_once_for_log_type(self):
+        config = self.multiple_parsers_config
+        config._find_matching_parsers(self.lost_data_line, 'filesystem')
+        effect_matcher = config._effect_matchers['filesystem']
+
+        parsers, _ = config._find_matching_parsers(self.lost_data_line, 'filesystem')
+        assert config._effect_matchers['filesystem'] is effect_matcher
+        assert [parser.name for parser in parsers] == [
+            parser.name for parser in config.get_parsers_of_log_type('filesystem')
+            if parser.name in ('lostdata', 'lostdatadate')
+        ]
+        assert config._get_effect_matcher('dummy') is None
+
     def test_multiple_parser_matching(self):
         parsers, regex_params = self.multiple_parsers_config._find_matching_parsers(
             self.lost_data_line, 'filesystem'
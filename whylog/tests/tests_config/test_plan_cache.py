@@ -0,0 +1,50 @@
+import os.path
+from unittest import TestCase
+
+from whylog.config import YamlConfig
+from whylog.config.plan_cache import PlanSkeleton, PlanSkeletonCache
+from whylog.tests.utils import ConfigPathFactory
+
+path_test_files = ['whylog', 'tests', 'tests_config', 'test_files']
+
+
+class TestPlanSkeletonCache(TestCase):
+    def test_least_recently_used_skeleton_dropped(self):
+        cache = PlanSkeletonCache(2)
+        skeletons = [PlanSkeleton([], {}) for _ in range(3)]
+        cache.put(frozenset(['a']), skeletons[0])
+        cache.put(frozenset(['b']), skeletons[1])
+        assert cache.get(frozenset(['a'])) is skeletons[0]
+
+        cache.put(frozenset(['c']), skeletons[2])
+        assert len(cache) == 2
+        assert cache.get(frozenset(['b'])) is None
+        assert cache.get(frozenset(['a'])) is skeletons[0]
+        assert cache.get(frozenset(['c'])) is skeletons[2]
+
+        cache.clear()
+        assert cache.get(frozenset(['a'])) is None
+
+    def test_disabled_cache_keeps_nothing(self):
+        cache = PlanSkeletonCache(0)
+        cache.put(frozenset(['a']), PlanSkeleton([], {}))
+        assert len(cache) == 0
+
+
+class TestPlanSkeletonOfConfig(TestCase):
+    def setUp(self):
+        parsers_path, rules_path, log_types_path = ConfigPathFactory.get_path_to_config_files(
+            os.path.join(*path_test_files), False
+        )
+        self.config = YamlConfig(parsers_path, rules_path, log_types_path)
+        self.lost_data_line = "2016-04-12 23:54:43 Data is missing at comp2. Loss = 230 GB. Host name: host2"
+
+    def test_skeleton_reused_for_the_same_effect_parsers(self):
+        parsers, _ = self.config._find_matching_parsers(self.lost_data_line, 'filesystem')
+        skeleton = self.config._get_plan_skeleton(parsers)
+        assert [rule.get_effect_name() for rule in skeleton.suspected_rules] == ['lostdata']
+        assert sorted(skeleton.concatenated_parsers) == ['hydra']
+
+        parsers, _ = self.config._find_matching_parsers(self.lost_data_line, 'filesystem')
+        assert self.config._get_plan_skeleton(parsers) is skeleton
+        assert self.config._get_plan_skeleton([]) is not skeleton
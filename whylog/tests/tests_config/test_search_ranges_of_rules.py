@@ -0,0 +1,143 @@
+import os.path
+import shutil
+from datetime import datetime
+from unittest import TestCase
+
+from whylog.config import SettingsFactorySelector
+from whylog.config.investigation_plan import Clue, InvestigationStep, LineSource
+from whylog.config.parsers import RegexParser
+from whylog.config.rule import Rule
+from whylog.tests.consts import TestPaths
+
+
+class TestSearchRangesOfRules(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        SettingsFactorySelector.WHYLOG_DIR = TestPaths.WHYLOG_DIR
+        cls.config = SettingsFactorySelector.get_settings()['config']
+        cls.whylog_dir = SettingsFactorySelector._attach_whylog_dir(os.getcwd())
+
+        cause1_regex = r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) cause1 transaction number: (\d+)$'
+        cause1_line = '2016-04-12 23:39:43 cause1 transaction number: 10101'
+        cls.cause1 = RegexParser("cause1", cause1_line, cause1_regex, [1], 'database', {1: 'date'})
+
+        cause2_regex = r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) cause2 moved resource id: (\d+)$'
+        cause2_line = '2016-04-12 23:40:43 cause2 moved resource id: 1234'
+        cls.cause2 = RegexParser("cause2", cause2_line, cause2_regex, [1], 'apache', {1: 'date'})
+
+        cause3_regex = r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) cause3 request id: (\d+)$'
+        cause3_line = '2016-04-12 23:41:43 cause3 request id: 4321'
+        cls.cause3 = RegexParser("cause3", cause3_line, cause3_regex, [1], 'apache', {1: 'date'})
+
+        effect_regex = r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) effect internal server error$'
+        effect_line = '2016-04-12 23:54:43 effect internal server error'
+        cls.effect = RegexParser("effect", effect_line, effect_regex, [1], 'apache', {1: 'date'})
+
+        cls.effect_time = datetime(2016, 4, 12, 23, 54, 43)
+        line_source = LineSource('localhost', 'node_1.log')
+        cls.effect_clues = {'effect': Clue((cls.effect_time,), effect_line, 40, line_source)}
+
+        cls.ten_second_earlier = datetime(2016, 4, 12, 23, 54, 33)
+        cls.one_hundred_second_earlier = datetime(2016, 4, 12, 23, 53, 3)
+        cls.ten_second_later = datetime(2016, 4, 12, 23, 54, 53)
+
+    @classmethod
+    def time_delta(cls, earlier, later, **params):
+        return {'clues_groups': [[earlier, 1], [later, 1]], 'name': 'time_delta', 'params': params}
+
+    def test_cause_earlier_than_effect(self):
+        constraints = [self.time_delta(1, 0, min_delta=10, max_delta=100)]
+        rule = Rule([self.cause2], self.effect, constraints, Rule.LINKAGE_AND)
+
+        expected_ranges = {
+            'apache': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: self.one_hundred_second_earlier,
+                    InvestigationStep.RIGHT_BOUND: self.ten_second_earlier
+                }
+            }
+        }  # yapf: disable
+        assert self.config._get_search_ranges([rule], self.effect_clues) == expected_ranges
+
+    def test_cause_later_than_effect(self):
+        constraints = [self.time_delta(0, 1, max_delta=10)]
+        rule = Rule([self.cause2], self.effect, constraints, Rule.LINKAGE_AND)
+
+        expected_ranges = {
+            'apache': {
+                'date': {
+                    InvestigationStep.RIGHT_BOUND: self.ten_second_later
+                }
+            }
+        }
+        assert self.config._get_search_ranges([rule], self.effect_clues) == expected_ranges
+
+    def test_constraints_of_one_cause_are_intersected(self):
+        constraints = [
+            self.time_delta(1, 0, max_delta=100),
+            self.time_delta(1, 0, min_delta=10),
+        ]
+        rule = Rule([self.cause2], self.effect, constraints, Rule.LINKAGE_AND)
+
+        expected_ranges = {
+            'apache': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: self.one_hundred_second_earlier,
+                    InvestigationStep.RIGHT_BOUND: self.ten_second_earlier
+                }
+            }
+        }  # yapf: disable
+        assert self.config._get_search_ranges([rule], self.effect_clues) == expected_ranges
+
+    def test_ranges_of_causes_of_log_type_are_joined(self):
+        first_constraints = [self.time_delta(1, 0, min_delta=10, max_delta=100)]
+        first_rule = Rule([self.cause2], self.effect, first_constraints, Rule.LINKAGE_AND)
+        second_constraints = [self.time_delta(0, 1, min_delta=0, max_delta=10)]
+        second_rule = Rule([self.cause3], self.effect, second_constraints, Rule.LINKAGE_AND)
+
+        expected_ranges = {
+            'apache': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: self.one_hundred_second_earlier,
+                    InvestigationStep.RIGHT_BOUND: self.ten_second_later
+                }
+            }
+        }  # yapf: disable
+        ranges = self.config._get_search_ranges([first_rule, second_rule], self.effect_clues)
+        assert ranges == expected_ranges
+
+    def test_log_type_with_unbounded_cause(self):
+        constraints = [self.time_delta(1, 0, max_delta=10), self.time_delta(2, 0, max_delta=10)]
+        rule = Rule(
+            [self.cause1, self.cause2, self.cause3], self.effect, constraints, Rule.LINKAGE_AND
+        )
+
+        expected_ranges = {
+            'database': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: self.ten_second_earlier
+                }
+            }
+        }
+        assert self.config._get_search_ranges([rule], self.effect_clues) == expected_ranges
+
+    def test_no_ranges_without_and_linkage(self):
+        constraints = [self.time_delta(1, 0, max_delta=10)]
+        for linkage in (Rule.LINKAGE_OR, Rule.LINKAGE_NOT):
+            rule = Rule([self.cause2], self.effect, constraints, linkage)
+            assert self.config._get_search_ranges([rule], self.effect_clues) == {}
+
+    def test_no_ranges_without_time_delta_constraints(self):
+        constraints = [
+            {
+                'clues_groups': [[1, 2], [2, 2]],
+                'name': 'identical',
+                'params': {}
+            }
+        ]  # yapf: disable
+        rule = Rule([self.cause1, self.cause2], self.effect, constraints, Rule.LINKAGE_AND)
+        assert self.config._get_search_ranges([rule], self.effect_clues) == {}
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.whylog_dir)
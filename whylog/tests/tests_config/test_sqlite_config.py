@@ -0,0 +1,208 @@
+import os.path
+import shutil
+import tempfile
+from unittest import TestCase
+
+import yaml
+
+from whylog.assistant.const import AssistantType
+from whylog.config import SettingsFactorySelector
+from whylog.config.filename_matchers import WildCardFilenameMatcher
+from whylog.config.investigation_plan import LineSource
+from whylog.config.log_type import LogType
+from whylog.config import sqlite_config
+from whylog.config.exceptions import UnsupportedConfigType
+from whylog.config.sqlite_config import SqliteConfig
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
+from whylog.teacher.user_intent import (
+    LineParamGroup, UserConstraintIntent, UserParserIntent, UserRuleIntent
+)
+
+
+class OldSqliteConnection(object):
+    """
+    Connection of SQLite older than 3.8.8, which returns no rows for unknown data_version pragma
+    """
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self._connection.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._connection.__exit__(exc_type, exc_value, traceback)
+
+    def execute(self, statement, *args):
+        if statement == "PRAGMA data_version":
+            statement = "PRAGMA unknown_pragma"
+        return self._connection.execute(statement, *args)
+
+
+class TestSqliteConfig(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.effect_line = "2016-04-12 23:54:43 Data is missing at comp2. Host name: host2"
+        cause_intent = UserParserIntent(
+            AssistantType.REGEX,
+            "connectionerror",
+            "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) Connection error occurred on (.*)\. Host name: (.*)$",
+            "hydra",
+            [1], {
+                1: LineParamGroup("2016-04-12 23:54:40", "date"),
+                2: LineParamGroup("comp2", "string"),
+                3: LineParamGroup("host1", "string")
+            },
+            "2016-04-12 23:54:40 Connection error occurred on comp2. Host name: host1",
+            line_offset=None,
+            line_resource_location=None
+        )  # yapf: disable
+        effect_intent = UserParserIntent(
+            AssistantType.REGEX,
+            "lostdata",
+            "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) Data is missing at (.*)\. Host name: (.*)$",
+            "filesystem",
+            [1], {
+                1: LineParamGroup("2016-04-12 23:54:43", "date"),
+                2: LineParamGroup("comp2", "string"),
+                3: LineParamGroup("host2", "string")
+            },
+            cls.effect_line,
+            line_offset=None,
+            line_resource_location=None
+        )  # yapf: disable
+        cls.user_intent = UserRuleIntent(
+            1, {
+                0: cause_intent,
+                1: effect_intent
+            }, [UserConstraintIntent("identical", [[0, 2], [1, 2]])]
+        )
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.database_path = os.path.join(self.tmp_dir, 'config.sqlite')
+        self.configs = []
+
+    def tearDown(self):
+        for config in self.configs:
+            config.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _open_config(self):
+        config = SqliteConfig(self.database_path)
+        self.configs.append(config)
+        return config
+
+    def _add_log_types(self, config):
+        super_parser = RegexSuperParser('^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d).*', [1], {1: 'date'})
+        for log_type_name in ['hydra', 'filesystem']:
+            matcher = WildCardFilenameMatcher(
+                'localhost', os.path.join(self.tmp_dir, log_type_name + '.log'), log_type_name,
+                super_parser
+            )
+            config.add_log_type(LogType(log_type_name, [matcher]))
+
+    def _create_investigation_plan(self, config):
+        front_input = FrontInput(
+            0, self.effect_line,
+            LineSource('localhost', os.path.join(self.tmp_dir, 'filesystem.log'))
+        )
+        return config.create_investigation_plan(front_input, config._log_types['filesystem'])
+
+    def test_added_rule_loaded_from_database(self):
+        self._open_config().add_rule(self.user_intent)
+
+        config = self._open_config()
+        assert len(config._rules['lostdata']) == 1
+        added_rule = config._rules['lostdata'][0]
+        assert added_rule.get_effect_name() == 'lostdata'
+        assert [parser.name for parser in added_rule.get_causes_parsers()] == ['connectionerror']
+        assert added_rule.get_causes_parsers()[0].convertions == {
+            1: 'date',
+            2: 'string',
+            3: 'string'
+        }
+        assert [parser.name
+                for parser in config.get_parsers_of_log_type('hydra')] == ['connectionerror']
+        assert config.get_parsers_of_log_type('apache') == []
+
+    def test_definitions_loaded_on_demand(self):
+        self._open_config().add_rule(self.user_intent)
+
+        config = self._open_config()
+        assert config._parsers._values == {}
+        assert config._rules._values == {}
+        config.get_parsers_of_log_type('filesystem')
+        assert sorted(config._parsers._values) == ['lostdata']
+        assert 'connectionerror' in config._parsers
+        assert 'unknown' not in config._parsers
+
+    def test_log_types_loaded_from_database(self):
+        self._add_log_types(self._open_config())
+
+        config = self._open_config()
+        assert sorted(config._log_types) == ['filesystem', 'hydra']
+        matcher = config._log_types['hydra'].filename_matchers[0]
+        assert matcher.path_pattern == os.path.join(self.tmp_dir, 'hydra.log')
+        assert matcher.super_parser.convertions == {1: 'date'}
+
+    def test_rule_added_by_other_config_used_in_investigation(self):
+        self._add_log_types(self._open_config())
+        config = self._open_config()
+        assert self._create_investigation_plan(config).suspected_rules == []
+
+        self._open_config().add_rule(self.user_intent)
+        plan = self._create_investigation_plan(config)
+        assert [rule.get_effect_name() for rule in plan.suspected_rules] == ['lostdata']
+        assert len(plan.investigation_steps_with_log_types) == 1
+
+    def test_rule_added_by_other_config_seen_without_data_version(self):
+        self._add_log_types(self._open_config())
+        config = self._open_config()
+        config._connection = OldSqliteConnection(config._connection)
+        config._data_version = config._get_data_version()
+        assert type(config._data_version) is tuple
+        assert self._create_investigation_plan(config).suspected_rules == []
+
+        self._open_config().add_rule(self.user_intent)
+        plan = self._create_investigation_plan(config)
+        assert [rule.get_effect_name() for rule in plan.suspected_rules] == ['lostdata']
+
+    def test_plan_cache_and_effect_matchers_dropped_by_added_rule(self):
+        config = self._open_config()
+        self._add_log_types(config)
+        config.add_rule(self.user_intent)
+        steps = self._create_investigation_plan(config).investigation_steps_with_log_types
+        cached_steps = self._create_investigation_plan(config).investigation_steps_with_log_types
+        assert cached_steps[0][0]._parser_subset is steps[0][0]._parser_subset
+        assert len(config._plan_cache) == 1
+        assert sorted(config._effect_matchers) == ['filesystem']
+
+        config.add_rule(self.user_intent)
+        assert len(config._plan_cache) == 0
+        assert config._effect_matchers == {}
+
+    def test_sqlite_config_unsupported_without_sqlite3(self):
+        sqlite3 = sqlite_config.sqlite3
+        sqlite_config.sqlite3 = None
+        try:
+            self.assertRaises(UnsupportedConfigType, SqliteConfig, self.database_path)
+        finally:
+            sqlite_config.sqlite3 = sqlite3
+
+    def test_sqlite_config_loaded_from_settings(self):
+        settings_path = os.path.join(self.tmp_dir, 'settings.yaml')
+        settings = {
+            'config_type': 'sqlite',
+            'database_path': self.database_path,
+            'pattern_assistant': 'regex'
+        }
+        with open(settings_path, 'w') as settings_file:
+            yaml.safe_dump(settings, settings_file)
+
+        config = SettingsFactorySelector.load_settings(settings_path)['config']
+        self.configs.append(config)
+        assert type(config) is SqliteConfig
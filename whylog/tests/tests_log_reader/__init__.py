@@ -1,22 +1,40 @@
+import fnmatch
+import itertools
 import os.path
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from functools import partial
 from unittest import TestCase
 
 import six
 import yaml
 from generator import generate, generator
+from nose.plugins.skip import SkipTest
 
 from whylog.config import YamlConfig
 from whylog.config.abstract_config import AbstractConfig
-from whylog.config.investigation_plan import LineSource
+from whylog.config.consts import ParserSubsetType
+from whylog.config.investigation_plan import InvestigationStep, LineSource, ReadSizePolicy
 from whylog.config.parser_name_generator import ParserNameGenerator
 from whylog.constraints.verifier import InvestigationResult
 from whylog.front.utils import FrontInput
 from whylog.log_reader import LogReader
+from whylog.log_reader.async_search import asyncio
+from whylog.log_reader.database_searcher import DatabaseSearcher
+from whylog.log_reader.log_database import LogDatabase
+from whylog.log_reader.search_agent import SearchAgent
 from whylog.tests.tests_log_reader.constants import TestPaths
 from whylog.tests.utils import ConfigPathFactory
 
 path_test_files = ['whylog', 'tests', 'tests_log_reader', 'test_files']
 
+
+class NotExpectedSearcher(object):
+    def __init__(self, file_path, investigation_step, super_parser):
+        raise AssertionError("File %s should not be scanned" % (file_path,))
+
 test_names = (
     '001_most_basic',
     # '002_match_latest',
@@ -100,6 +118,8 @@ class TestBasic(TestCase):
             result_log_file = os.path.join(path, 'node_2.log')
         if test_name == "011_different_entry":
             result_log_file = os.path.join(path, 'node_3.log')
+        if test_name == "014_dated_primary_keys":
+            result_log_file = os.path.join(path, 'node_2.log')
         results_yaml_file = os.path.join(path, 'investigation_results.yaml')
         return input_path, original_log_file, path, result_log_file, results_yaml_file
 
@@ -131,6 +151,183 @@ class TestBasic(TestCase):
         expected_results = self._investigation_results_from_yaml(results_yaml_file, result_log_file)
         self._check_results(results, expected_results)
 
+    def _prepare_investigation(self, test_name, configure=None):
+        """
+        returns whylog config of test, changed by configure(config) when it's given,
+        effect line and expected results of its investigation
+        """
+        input_path, original_log_file, path, result_log_file, results_yaml_file = self._prepare_files_path(
+            test_name
+        )
+        effect_line_offset, line_content = self._gather_effect_line_data(
+            input_path, original_log_file
+        )
+
+        whylog_config = YamlConfig(*ConfigPathFactory.get_path_to_config_files(path))
+        if configure is not None:
+            configure(whylog_config)
+        effect_line = FrontInput(
+            effect_line_offset, line_content,
+            LineSource('localhost', os.path.join(path, self._get_starting_file_name(input_path)))
+        )
+        expected_results = self._investigation_results_from_yaml(results_yaml_file, result_log_file)
+        return whylog_config, effect_line, expected_results
+
+    def _investigate(self, test_name, configure=None, log_reader_factory=LogReader):
+        """
+        returns results of investigation of test effect line by log reader created
+        by log_reader_factory(config) and expected results
+        """
+        whylog_config, effect_line, expected_results = self._prepare_investigation(
+            test_name, configure
+        )
+        results = log_reader_factory(whylog_config).get_causes(effect_line)
+        return results, expected_results
+
+    @generate(*test_names)
+    def test_parallel_investigation(self, test_name):
+        whylog_config, effect_line, expected_results = self._prepare_investigation(test_name)
+        sequential_results = LogReader(whylog_config).get_causes(effect_line)
+
+        with LogReader(whylog_config, workers=2) as log_reader:
+            parallel_results = log_reader.get_causes(effect_line)
+            pool = log_reader._parallel_search._pool
+            # workers are reused by next investigation
+            repeated_results = log_reader.get_causes(effect_line)
+            assert log_reader._parallel_search._pool is pool
+        assert log_reader._parallel_search._pool is None
+
+        sequential_lines = [result.lines for result in sequential_results]
+        for results in (parallel_results, repeated_results):
+            self._check_results(results, expected_results)
+            assert [result.lines for result in results] == sequential_lines
+
+    @generate(*test_names)
+    def test_async_investigation(self, test_name):
+        if asyncio is None:
+            raise SkipTest("asyncio is not available")
+        whylog_config, effect_line, expected_results = self._prepare_investigation(test_name)
+        log_reader = LogReader(whylog_config)
+
+        loop = asyncio.new_event_loop()
+        try:
+            # many investigations can be run concurrently in single loop
+            investigations = [
+                log_reader.get_causes_async(effect_line, loop=loop) for _ in six.moves.range(3)
+            ]
+            all_results = loop.run_until_complete(asyncio.gather(*investigations))
+        finally:
+            loop.close()
+        for results in all_results:
+            self._check_results(results, expected_results)
+
+    @generate(*test_names)
+    def test_bytes_lines_matching(self, test_name):
+        def configure(whylog_config):
+            whylog_config.bytes_lines_matching = True
+
+        self._check_results(*self._investigate(test_name, configure))
+
+    @generate(*test_names)
+    def test_line_by_line_matching(self, test_name):
+        def configure(whylog_config):
+            whylog_config.buffer_scanning = False
+
+        self._check_results(*self._investigate(test_name, configure))
+
+    @generate(*test_names)
+    def test_concatenated_parser_subsets(self, test_name):
+        def configure(whylog_config):
+            whylog_config.parser_subset_type = ParserSubsetType.CONCATENATED
+
+        self._check_results(*self._investigate(test_name, configure))
+
+    @generate(*test_names)
+    def test_clues_retention(self, test_name):
+        def configure(whylog_config):
+            # limit is higher than number of clues in test logs, so no clue is dropped
+            whylog_config.clues_limit = 1000
+
+        results, expected_results = self._investigate(test_name, configure)
+        self._check_results(results, expected_results)
+        assert all(not result.dropped_clues for result in results)
+
+    @generate(*test_names)
+    def test_small_growing_read_sizes(self, test_name):
+        def configure(whylog_config):
+            whylog_config.read_size_policy = ReadSizePolicy(1, 2, 64)
+            whylog_config.log_type_read_size_policies = dict(
+                (log_type.name, ReadSizePolicy(3, 3, 100))
+                for log_type in whylog_config.get_all_log_types()
+            )
+
+        self._check_results(*self._investigate(test_name, configure))
+
+    @generate(*test_names)
+    def test_database_investigation(self, test_name):
+        tmp_dir = tempfile.mkdtemp()
+        database_path = os.path.join(tmp_dir, 'logs.sqlite')
+
+        def create_log_reader(whylog_config):
+            database = LogDatabase(database_path)
+            database.ingest(whylog_config)
+            database.close()
+            # every file is ingested, so files shouldn't be scanned
+            return LogReader(
+                whylog_config,
+                partial(
+                    DatabaseSearcher,
+                    database_path=database_path,
+                    fallback_searcher_class=NotExpectedSearcher
+                )
+            )
+
+        try:
+            results, expected_results = self._investigate(
+                test_name, log_reader_factory=create_log_reader
+            )
+        finally:
+            shutil.rmtree(tmp_dir)
+        self._check_results(results, expected_results)
+
+    @generate(*test_names)
+    def test_remote_investigation(self, test_name):
+        whylog_config, effect_line, expected_results = self._prepare_investigation(test_name)
+        effect_file = effect_line.line_source.path
+        # files of log types are searched by agents on other "hosts", so they shouldn't be scanned
+        log_reader = LogReader(whylog_config, NotExpectedSearcher)
+        agents = [SearchAgent(('127.0.0.1', 0)) for _ in six.moves.range(2)]
+        hosts = ['127.0.0.1:%s' % (agent.server_address[1],) for agent in agents]
+        for agent in agents:
+            thread = threading.Thread(target=agent.serve_forever)
+            thread.daemon = True
+            thread.start()
+        try:
+            effect_host = None
+            # matchers of default log type are shared by configs, so they aren't changed
+            matchers = itertools.chain.from_iterable(
+                log_type.filename_matchers for log_type in whylog_config.get_all_log_types()
+                if log_type is not AbstractConfig.DEFAULT_LOG_TYPE
+            )
+            for matcher_nr, matcher in enumerate(matchers):
+                matcher.host_pattern = hosts[matcher_nr % len(hosts)]
+                if fnmatch.fnmatch(effect_file, matcher.path_pattern):
+                    effect_host = matcher.host_pattern
+            effect_line = FrontInput(
+                effect_line.offset, effect_line.line_content, LineSource(effect_host, effect_file)
+            )
+
+            results = log_reader.get_causes(effect_line)
+        finally:
+            for agent in agents:
+                agent.shutdown()
+                agent.server_close()
+        for result in results:
+            for line in result.lines:
+                assert line.line_source.host in hosts
+                line.line_source = LineSource('localhost', line.line_source.path)
+        self._check_results(results, expected_results)
+
     @generate(*test_names)
     def test_temporary_file_assign_to_logtype(self, test_name):
         input_path, original_log_file, path, result_log_file, results_yaml_file = self._prepare_files_path(
@@ -164,6 +361,66 @@ class TestBasic(TestCase):
         expected_results = self._investigation_results_from_yaml(results_yaml_file, result_log_file)
         self._check_results(results, expected_results)
 
+    def _investigate_with_search_ranges(self, search_ranges):
+        def configure(whylog_config):
+            whylog_config._get_search_ranges = lambda suspected_rules, effect_clues: search_ranges
+
+        return self._investigate('014_dated_primary_keys', configure)
+
+    def test_dated_primary_keys_without_search_ranges(self):
+        results, expected_results = self._investigate_with_search_ranges({})
+        self._check_results(results, expected_results)
+
+    def test_dated_primary_keys_with_search_ranges_of_rules(self):
+        derived_ranges = []
+
+        def configure(whylog_config):
+            get_search_ranges = whylog_config._get_search_ranges
+
+            def record_search_ranges(suspected_rules, effect_clues):
+                derived_ranges.append(get_search_ranges(suspected_rules, effect_clues))
+                return derived_ranges[-1]
+
+            whylog_config._get_search_ranges = record_search_ranges
+
+        results, expected_results = self._investigate('014_dated_primary_keys', configure)
+        self._check_results(results, expected_results)
+        # rule accepts causes at most 5 seconds earlier than effect
+        expected_ranges = {
+            'database': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2020, 1, 1, 10, 0, 0),
+                }
+            }
+        }  # yapf: disable
+        assert derived_ranges == [expected_ranges]
+
+    def test_dated_primary_keys_within_search_ranges(self):
+        # range narrower than files, so files are bisected and scanning stops at its right bound
+        search_ranges = {
+            'database': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2020, 1, 1, 10, 0, 0),
+                    InvestigationStep.RIGHT_BOUND: datetime(2020, 1, 1, 10, 0, 2),
+                }
+            }
+        }  # yapf: disable
+        results, expected_results = self._investigate_with_search_ranges(search_ranges)
+        self._check_results(results, expected_results)
+
+    def test_dated_primary_keys_outside_search_ranges(self):
+        # only earlier cause is in range and it is too far from effect to satisfy constraint
+        search_ranges = {
+            'database': {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2020, 1, 1, 9, 59, 40),
+                    InvestigationStep.RIGHT_BOUND: datetime(2020, 1, 1, 9, 59, 55),
+                }
+            }
+        }  # yapf: disable
+        results, _ = self._investigate_with_search_ranges(search_ranges)
+        assert results == []
+
     @classmethod
     def _prepare_config(cls, path):
         # preparing Whylog structures special for temporary assign file to log type test
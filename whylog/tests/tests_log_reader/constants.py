@@ -15,6 +15,22 @@ class AFewLinesLogParams(object):
         return ('aaa-%d-bbb' % (offset // 10)), (offset // 10) * 10, (offset // 10) * 10 + 9
 
 
+class MultiLineLogParams(object):
+    FILE_NAME = "multi_line_entries.log"
+    LINES_IN_RANGE = [
+        "2015-12-03 12:08:09 Traceback (most recent call last):",
+        "  File \"worker.py\", line 12, in run",
+        "ValueError: broken pipe",
+        "2015-12-03 12:08:10 worker restarted",
+        "    with continuation line",
+    ]
+    LINES_IN_TOLERANCE_OF_ONE_SECOND = [
+        "2015-12-03 12:08:08 request received",
+        "  payload: {\"id\": 1}",
+        "  payload: {\"id\": 2}",
+    ] + LINES_IN_RANGE
+
+
 class TestPaths(object):
     path_test_files = ['whylog', 'tests', 'tests_log_reader', 'test_files']
 
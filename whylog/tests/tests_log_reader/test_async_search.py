@@ -0,0 +1,119 @@
+from collections import defaultdict
+from unittest import TestCase
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from whylog.config.investigation_plan import InvestigationStep, LineSource
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
+from whylog.log_reader import LogReader
+from whylog.log_reader.async_search import AsyncFileScan, asyncio, get_loop
+from whylog.log_reader.exceptions import AsyncioUnavailable
+from whylog.log_reader.searchers import BacktrackSearcher
+from whylog.tests.tests_log_reader.constants import AFewLinesLogParams, TestPaths
+
+
+class LinesCollectingSearcher(BacktrackSearcher):
+    def __init__(self, file_path, loop_ticks):
+        super(LinesCollectingSearcher, self).__init__(
+            file_path, InvestigationStep(None, {}), RegexSuperParser('', [], {})
+        )
+        self._loop_ticks = loop_ticks
+        self.ticks_seen = []
+
+    def create_clue_store(self):
+        return defaultdict(list)
+
+    def collect_clues(self, collector, line, line_offset):
+        self.ticks_seen.append(len(self._loop_ticks))
+        collector['lines'].append((line, line_offset))
+
+
+class FailingSearcher(LinesCollectingSearcher):
+    def __init__(self, file_path):
+        super(FailingSearcher, self).__init__(file_path, [])
+        self.lines_closed = False
+
+    def lines_to_search(self, front_input):
+        try:
+            for line in super(FailingSearcher, self).lines_to_search(front_input):
+                yield line
+        finally:
+            self.lines_closed = True
+
+    def collect_clues(self, collector, line, line_offset):
+        raise ValueError(line)
+
+
+class TestAsyncFileScan(TestCase):
+    def setUp(self):
+        if asyncio is None:
+            raise SkipTest("asyncio is not available")
+        self.file_path = TestPaths.get_file_path(AFewLinesLogParams.FILE_NAME)
+        self.front_input = FrontInput(
+            AFewLinesLogParams.NUMBER_OF_LINES * AFewLinesLogParams.SINGLE_LINE_LENGTH, '',
+            LineSource('localhost', self.file_path)
+        )
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_scan_in_batches_gives_control_to_other_callbacks(self):
+        loop_ticks = []
+
+        def tick():
+            loop_ticks.append(None)
+            if not scanned.done():
+                self.loop.call_soon(tick)
+
+        searcher = LinesCollectingSearcher(self.file_path, loop_ticks)
+        scanned = AsyncFileScan(searcher, self.front_input, self.loop, batch_size=3).start()
+        self.loop.call_soon(tick)
+        clues = self.loop.run_until_complete(scanned)
+
+        assert clues['lines'] == list(searcher.lines_to_search(self.front_input))
+        assert len(clues['lines']) == AFewLinesLogParams.NUMBER_OF_LINES
+        batches_ticks = searcher.ticks_seen[::3]
+        assert len(set(batches_ticks)) == len(batches_ticks)
+
+    def test_running_loop_used_when_loop_not_given(self):
+        got_loop = self.loop.create_future()
+        self.loop.call_soon(lambda: got_loop.set_result(get_loop()))
+
+        assert self.loop.run_until_complete(got_loop) is self.loop
+        assert get_loop(self.loop) is self.loop
+        if hasattr(asyncio, 'get_running_loop'):
+            # loop which isn't running isn't used implicitly
+            self.assertRaises(RuntimeError, get_loop)
+
+    def _wait_for_closed_lines(self, searcher):
+        for _ in range(100):
+            if searcher.lines_closed:
+                return True
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+        return False
+
+    def test_lines_closed_when_scan_fails(self):
+        searcher = FailingSearcher(self.file_path)
+        # scan keeps reference to generator of lines, so it isn't closed by garbage collector
+        scan = AsyncFileScan(searcher, self.front_input, self.loop, batch_size=3)
+        scanned = scan.start()
+
+        self.assertRaises(ValueError, self.loop.run_until_complete, scanned)
+        assert self._wait_for_closed_lines(searcher)
+
+    def test_lines_closed_when_scan_cancelled(self):
+        searcher = FailingSearcher(self.file_path)
+        scan = AsyncFileScan(searcher, self.front_input, self.loop, batch_size=3)
+        scan.start().cancel()
+
+        assert self._wait_for_closed_lines(searcher)
+
+
+class TestWithoutAsyncio(TestCase):
+    def test_clear_error_without_asyncio(self):
+        front_input = FrontInput(0, '', LineSource('localhost', 'node_1.log'))
+        with patch('whylog.log_reader.asyncio', None):
+            self.assertRaises(AsyncioUnavailable, LogReader(None).get_causes_async, front_input)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest import TestCase
+
+import six
+from dateutil.parser import parse as parse_date
+
+from whylog.config.investigation_plan import InvestigationStep, LineSource
+from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parsers import RegexParser
+from whylog.config.super_parser import RegexSuperParser
+from whylog.log_reader.searchers import BacktrackSearcher
+from whylog.tests.tests_log_reader.constants import MultiLineLogParams, TestPaths
+
+
+class TestBufferScanning(TestCase):
+    """
+    Lines with clues found by scanning whole blocks should be the same as found line by line.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.parsers = [
+            RegexParser(
+                "request", "", "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) request received$", [1],
+                "worker", {1: "date"}
+            ),
+            RegexParser("payload", "", "^  payload: (.*)$", [], "worker", {}),
+            RegexParser("error", "", "^ValueError: (.*)$", [], "worker", {}),
+            RegexParser("worker", "", "^(\S+ \S+) worker (\w+)$", [1], "worker", {1: "date"}),
+            RegexParser("plain", "", "^plain (\w+) line$", [], "worker", {}),
+            RegexParser("sign", "", "^(.*) sign$", [], "worker", {}),
+        ]
+        cls.super_parser = RegexSuperParser(
+            '^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+        cls.search_ranges = {
+            'date': {
+                InvestigationStep.LEFT_BOUND: parse_date('2015-12-03 12:08:09'),
+                InvestigationStep.RIGHT_BOUND: parse_date('2015-12-03 12:08:10')
+            }
+        }  # yapf: disable
+
+    def _lines_with_clues(self, searcher, step, lines):
+        if searcher._is_file_ordered_by_search_range():
+            lines = searcher._stop_before_search_range(lines)
+        line_source = LineSource('localhost', searcher._file_path)
+        return [
+            (line, line_offset)
+            for line, line_offset in lines if step.get_clues(line, line_offset, line_source)
+        ]
+
+    def _check_blocks_scanning(
+        self, file_name, search_ranges, tolerances=None, bytes_lines=False, literal_prefilter=True
+    ):
+        file_path = TestPaths.get_file_path(file_name)
+        with open(file_path, 'rb') as log_file:
+            file_size = len(log_file.read())
+        line_by_line_step = InvestigationStep(
+            ConcatenatedRegexParser(self.parsers, bytes_lines, buffer_scanning=False),
+            search_ranges, tolerances
+        )
+        blocks_step = InvestigationStep(
+            ConcatenatedRegexParser(self.parsers, bytes_lines, literal_prefilter), search_ranges,
+            tolerances
+        )
+        assert blocks_step.buffer_scanner is not None
+        line_by_line = BacktrackSearcher(file_path, line_by_line_step, self.super_parser)
+        blocks = BacktrackSearcher(file_path, blocks_step, self.super_parser)
+        for offset in six.moves.range(0, file_size + 1, 5):
+            expected = self._lines_with_clues(
+                line_by_line, line_by_line_step,
+                line_by_line._reverse_from_offset(offset, decode=not bytes_lines)
+            )
+            for buf_size in (1, 2, 3, 7, 20, 50, 100, 200, 1000):
+                lines = blocks._scan_blocks(blocks_step.buffer_scanner, offset, 0, buf_size)
+                assert self._lines_with_clues(blocks, blocks_step, lines) == expected
+
+    def test_unordered_file(self):
+        self._check_blocks_scanning(MultiLineLogParams.FILE_NAME, {})
+
+    def test_scan_stops_before_search_range(self):
+        self._check_blocks_scanning(MultiLineLogParams.FILE_NAME, self.search_ranges)
+        self._check_blocks_scanning(
+            MultiLineLogParams.FILE_NAME, self.search_ranges, {'date': timedelta(seconds=1)}
+        )
+
+    def test_without_literal_prefilter(self):
+        self._check_blocks_scanning(
+            MultiLineLogParams.FILE_NAME, self.search_ranges, literal_prefilter=False
+        )
+
+    def test_bytes_lines(self):
+        self._check_blocks_scanning(
+            MultiLineLogParams.FILE_NAME, self.search_ranges, bytes_lines=True
+        )
+
+    def test_non_ascii_lines(self):
+        self._check_blocks_scanning('non_ascii_lines.log', {})
+        self._check_blocks_scanning('non_ascii_lines.log', {}, bytes_lines=True)
@@ -0,0 +1,172 @@
+import pickle
+import random
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from dateutil.tz import tzoffset
+
+from whylog.config.investigation_plan import Clue, ClueRetention, LineSource
+from whylog.config.parsers import RegexParser
+from whylog.log_reader.clue_store import ClueStore
+
+
+class LinesDict(object):
+    def __init__(self, lines):
+        self.lines = lines
+
+    def load_line(self, file_path, offset):
+        return self.lines[(file_path, offset)]
+
+
+class TestClueStore(TestCase):
+    def setUp(self):
+        self.parser = RegexParser(
+            "lost_data", "", "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)?(?:\+\d\d:\d\d)?) "
+            "Data lost at (\w+)\. Loss = (.*) GB$", [1], "database", {
+                1: "date",
+                3: "float"
+            }
+        )
+        self.sources = [
+            LineSource('localhost', 'node_1.log'),
+            LineSource('localhost', 'node_2.log')
+        ]
+        self.lines = {}
+
+    def _add_clues(self, store, dates, source_nr, bytes_lines=False):
+        line_source = self.sources[source_nr]
+        for offset, date in enumerate(dates):
+            line = "%s Data lost at alfa%s. Loss = %s.5 GB" % (date, offset % 3, offset)
+            self.lines[(line_source.path, offset)] = line
+            if bytes_lines:
+                groups = self.parser.get_bytes_regex_params(line.encode('utf-8'))
+            else:
+                groups = self.parser.get_regex_params(line)
+            store.add(self.parser, groups, bytes_lines, offset, line_source)
+
+    def _expected_clues(self, dates, source_nr):
+        line_source = self.sources[source_nr]
+        return [
+            Clue(
+                (date, "alfa%s" % (offset % 3,), offset + 0.5),
+                self.lines[(line_source.path, offset)], offset, line_source
+            ) for offset, date in enumerate(dates)
+        ]
+
+    def test_clues_are_kept_in_columns(self):
+        dates = [datetime(2015, 12, 3, 12, 11, second, second * 1000) for second in range(20)]
+        for bytes_lines in (False, True):
+            store = ClueStore(LinesDict(self.lines))
+            self._add_clues(store, dates, 0, bytes_lines)
+
+            clues = store['lost_data']
+            assert len(clues) == 20
+            assert clues._key_types
+            assert list(clues) == self._expected_clues(dates, 0)
+            assert clues[-1] == clues[19]
+            self.assertRaises(IndexError, clues.__getitem__, 20)
+
+    def test_not_encodable_primary_keys(self):
+        zoned_date = datetime(2015, 12, 3, 12, 11, 2, tzinfo=tzoffset(None, 3600))
+        dates = [datetime(2015, 12, 3, 12, 11, 1)] * 3 + [zoned_date] * 2
+        store = ClueStore(LinesDict(self.lines))
+        self._add_clues(store, dates, 0)
+
+        clues = store['lost_data']
+        assert not clues._key_types
+        assert list(clues) == self._expected_clues(dates, 0)
+
+    def test_merged_clues_are_in_order_of_files(self):
+        first_dates = [datetime(2015, 12, 3, 12, 11, second) for second in range(5)]
+        second_dates = [datetime(2015, 12, 3, 12, 12, second) for second in range(7)]
+        first_store = ClueStore(LinesDict(self.lines))
+        self._add_clues(first_store, first_dates, 0)
+        second_store = ClueStore(LinesDict(self.lines))
+        self._add_clues(second_store, second_dates, 1)
+
+        collector = ClueStore()
+        collector.merge(first_store)
+        collector.merge(second_store)
+        collector.merge({'other_parser': []})
+
+        assert collector['lost_data'] == (
+            self._expected_clues(first_dates, 0) + self._expected_clues(second_dates, 1)
+        )
+        assert collector['other_parser'] == []
+
+    def test_pickled_store(self):
+        dates = [datetime(2015, 12, 3, 12, 11, second) for second in range(5)]
+        store = ClueStore(LinesDict(self.lines))
+        self._add_clues(store, dates, 1)
+
+        unpickled = pickle.loads(pickle.dumps(store, pickle.HIGHEST_PROTOCOL))
+
+        assert unpickled == store
+        assert unpickled['lost_data'] == self._expected_clues(dates, 1)
+
+    def _nearest_clues(self, clues, effect_date, limit):
+        nearest = sorted(
+            enumerate(clues),
+            key=lambda numbered_clue:
+            (abs(numbered_clue[1].regex_parameters[0] - effect_date), numbered_clue[0])
+        )[:limit]
+        return [clue for _, clue in sorted(nearest, key=lambda numbered_clue: numbered_clue[0])]
+
+    def test_only_clues_nearest_to_effect_are_kept(self):
+        effect_date = datetime(2015, 12, 3, 12, 11)
+        generator = random.Random(7)
+        for limit in (0, 1, 2, 5, 30):
+            retention = ClueRetention({'date': effect_date}, limit)
+            first_dates = [
+                effect_date + timedelta(seconds=generator.randint(-60, 60)) for _ in range(40)
+            ]
+            second_dates = [
+                effect_date + timedelta(seconds=generator.randint(-60, 60)) for _ in range(25)
+            ]
+            first_store = ClueStore(LinesDict(self.lines), retention)
+            self._add_clues(first_store, first_dates, 0)
+            second_store = ClueStore(LinesDict(self.lines), retention)
+            self._add_clues(second_store, second_dates, 1)
+
+            assert list(
+                first_store['lost_data']
+            ) == self._nearest_clues(self._expected_clues(first_dates, 0), effect_date, limit)
+            assert first_store.get_dropped_count('lost_data') == 40 - min(limit, 40)
+            collector = ClueStore()
+            collector.merge(first_store)
+            collector.merge(second_store)
+            assert list(collector['lost_data']) == self._nearest_clues(
+                self._expected_clues(first_dates, 0) + self._expected_clues(second_dates, 1),
+                effect_date, limit
+            )
+            assert collector.get_dropped_count('lost_data') == 65 - min(limit, 65)
+            assert collector.get_dropped_count('other_parser') == 0
+
+    def test_limited_clues_merged_with_not_limited(self):
+        effect_date = datetime(2015, 12, 3, 12, 11)
+        first_dates = [effect_date + timedelta(seconds=second) for second in (-50, 40, -3, 20)]
+        second_dates = [effect_date + timedelta(seconds=second) for second in (-1, 30, 2, -60)]
+        first_store = ClueStore(LinesDict(self.lines), ClueRetention({'date': effect_date}, 3))
+        self._add_clues(first_store, first_dates, 0)
+        second_store = ClueStore(LinesDict(self.lines))
+        self._add_clues(second_store, second_dates, 1)
+
+        collector = ClueStore()
+        collector.merge(first_store)
+        collector.merge(second_store)
+        assert list(collector['lost_data']) == self._nearest_clues(
+            self._expected_clues(first_dates, 0) + self._expected_clues(second_dates, 1),
+            effect_date, 3
+        )
+        assert collector.get_dropped_count('lost_data') == 5
+
+    def test_limits_of_single_parsers(self):
+        dates = [datetime(2015, 12, 3, 12, 11, second) for second in range(10)]
+        for retention, kept_count in (
+            (ClueRetention({'date': dates[0]}, 3, {'lost_data': 5}), 5),
+            (ClueRetention({'date': dates[0]}, 3, {'other_parser': 5}), 3),
+            (ClueRetention({'int': 0}, 3), 10),
+        ):
+            store = ClueStore(LinesDict(self.lines), retention)
+            self._add_clues(store, dates, 0)
+            assert list(store['lost_data']) == self._expected_clues(dates, 0)[:kept_count]
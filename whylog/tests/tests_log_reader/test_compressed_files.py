@@ -0,0 +1,132 @@
+import bz2
+import gzip
+import os.path
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from mock import patch
+
+from whylog.config.investigation_plan import InvestigationStep
+from whylog.config.super_parser import RegexSuperParser
+from whylog.log_reader.compressed_files import (
+    CompressedFilesCache, CompressionFormats, GzipAccessIndex, GzipRandomAccessFile, LogFileOpener,
+    lzma
+)
+from whylog.log_reader.reverse_reader import ReverseLineReader
+from whylog.log_reader.searchers import BacktrackSearcher, IndexSearcher
+from whylog.tests.tests_log_reader.constants import MultiLineLogParams, TestPaths
+
+
+class TestCompressedFiles(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_path = TestPaths.get_file_path(MultiLineLogParams.FILE_NAME)
+        with open(self.log_path, 'rb') as log_file:
+            self.content = log_file.read()
+        self.super_parser = RegexSuperParser(
+            '^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+        self.step = InvestigationStep(
+            None, {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, 9),
+                    InvestigationStep.RIGHT_BOUND: datetime(2015, 12, 3, 12, 8, 10)
+                }
+            }
+        )  # yapf: disable
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _compress(self, open_function, extension, members=1):
+        compressed_path = os.path.join(self.tmp_dir, MultiLineLogParams.FILE_NAME + extension)
+        member_size = len(self.content) // members + 1
+        with open(compressed_path, 'wb') as compressed_file:
+            for member_begin in range(0, len(self.content), member_size):
+                member_path = compressed_path + '.member'
+                member = open_function(member_path, 'wb')
+                member.write(self.content[member_begin:member_begin + member_size])
+                member.close()
+                with open(member_path, 'rb') as member_file:
+                    compressed_file.write(member_file.read())
+        return compressed_path
+
+    def _compressed_copies(self):
+        copies = [self._compress(gzip.open, '.gz'), self._compress(bz2.BZ2File, '.bz2')]
+        if lzma is not None:
+            copies.append(self._compress(lzma.open, '.xz'))
+        return copies
+
+    def test_detect_compression_format(self):
+        assert CompressionFormats.detect(self.log_path) is None
+        assert CompressionFormats.detect(
+            self._compress(gzip.open, '.gz')
+        ) == CompressionFormats.GZIP
+        assert CompressionFormats.detect(
+            self._compress(bz2.BZ2File, '.bz2')
+        ) == CompressionFormats.BZIP2
+
+    def test_gzip_random_access_between_access_points(self):
+        compressed_path = self._compress(gzip.open, '.gz', members=3)
+        access_index = GzipAccessIndex(compressed_path, spacing=1)
+        assert access_index.size == len(self.content)
+        opened_file = GzipRandomAccessFile(access_index)
+        for offset in range(0, len(self.content), 7):
+            opened_file.seek(offset)
+            assert opened_file.read(50) == self.content[offset:offset + 50]
+        opened_file.seek(0)
+        assert opened_file.readline() == self.content[:self.content.index(b'\n') + 1]
+
+    def test_reverse_reading_compressed_files(self):
+        expected = list(ReverseLineReader(self.log_path, 16).reverse_lines(len(self.content)))
+        for compressed_path in self._compressed_copies():
+            reader = ReverseLineReader(compressed_path, 16)
+            assert list(reader.reverse_lines(len(self.content))) == expected
+
+    def test_bisecting_compressed_files(self):
+        expected = BacktrackSearcher(self.log_path, self.step,
+                                     self.super_parser)._deduce_offsets_range()
+        for compressed_path in self._compressed_copies():
+            for searcher_class in (BacktrackSearcher, IndexSearcher):
+                searcher = searcher_class(compressed_path, self.step, self.super_parser)
+                assert searcher._deduce_offsets_range() == expected
+            assert not os.path.exists(compressed_path + '.whylog_index')
+
+    def test_opened_compressed_file_has_decompressed_content(self):
+        for compressed_path in self._compressed_copies():
+            assert LogFileOpener.is_compressed(compressed_path)
+            with LogFileOpener.open_file(compressed_path) as opened_file:
+                assert opened_file.read() == self.content
+
+    def test_spilled_file_removed_when_file_changes(self):
+        cache = CompressedFilesCache()
+        compressed_path = self._compress(bz2.BZ2File, '.bz2')
+        spilled_path = cache.get(compressed_path)
+        assert cache.get(compressed_path) == spilled_path
+
+        with open(compressed_path, 'ab') as compressed_file:
+            compressed_file.write(bz2.compress(b'2015-12-03 12:08:12 appended\n'))
+        changed_spilled_path = cache.get(compressed_path)
+        assert changed_spilled_path != spilled_path
+        assert not os.path.exists(spilled_path)
+        cache.remove_spilled_files()
+        assert not os.path.exists(changed_spilled_path)
+
+    def test_least_recently_used_file_dropped(self):
+        cache = CompressedFilesCache(max_files=1)
+        compressed_path = self._compress(bz2.BZ2File, '.bz2')
+        spilled_path = cache.get(compressed_path)
+
+        assert cache.detect(self.log_path) is None
+        assert not os.path.exists(spilled_path)
+
+    def test_compression_format_detected_once(self):
+        cache = CompressedFilesCache()
+        compressed_path = self._compress(gzip.open, '.gz')
+        with patch.object(CompressionFormats, 'detect', wraps=CompressionFormats.detect) as detect:
+            for _ in range(3):
+                assert cache.detect(compressed_path) == CompressionFormats.GZIP
+            cache.get(compressed_path)
+        detect.assert_called_once_with(compressed_path)
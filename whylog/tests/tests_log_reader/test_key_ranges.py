@@ -0,0 +1,121 @@
+import os.path
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from whylog.config.investigation_plan import InvestigationStep, LineSource
+from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parsers import RegexParser
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
+from whylog.log_reader.key_ranges import KeyRangeCache
+from whylog.log_reader.searchers import BacktrackSearcher
+
+
+class CountingSearcher(BacktrackSearcher):
+    opened_files = []
+
+    def _deduce_offsets_range(self):
+        self.opened_files.append(self._file_path)
+        return super(CountingSearcher, self)._deduce_offsets_range()
+
+
+class NotPruningSearcher(BacktrackSearcher):
+    def _is_file_outside_search_range(self):
+        return False
+
+
+class TestKeyRanges(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.super_parser = RegexSuperParser(
+            '^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+        self.parser = RegexParser(
+            "request", "", "^(\S+ \S+) request (\d+)$", [1], "worker", {1: "date"}
+        )
+        # rotated files, the oldest one has the highest number
+        self.log_paths = []
+        for file_nr, hour in enumerate([12, 11, 10]):
+            lines = ['  headless line']
+            lines += [
+                '2015-12-03 %s:%02d:00 request %s' % (hour, minute, minute) for minute in range(60)
+            ]
+            lines += ['  trailing line']
+            self.log_paths.append(self._write_log('app.log.%s' % (file_nr,), lines))
+        CountingSearcher.opened_files = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_log(self, file_name, lines):
+        path = os.path.join(self.tmp_dir, file_name)
+        with open(path, 'w') as log_file:
+            log_file.write(''.join(line + '\n' for line in lines))
+        return path
+
+    def _create_step(self, left_bound, right_bound):
+        return InvestigationStep(
+            ConcatenatedRegexParser([self.parser]), {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, *left_bound),
+                    InvestigationStep.RIGHT_BOUND: datetime(2015, 12, 3, *right_bound)
+                }
+            }
+        )  # yapf: disable
+
+    def _search(self, searcher_class, step):
+        front_input = FrontInput(0, '', LineSource('localhost', 'effect.log'))
+        found = []
+        for path in self.log_paths:
+            clues = searcher_class(path, step, self.super_parser).search(front_input)
+            found.extend(clue.regex_parameters for clue in clues.get('request', []))
+        return found
+
+    def test_range_of_file_is_found(self):
+        key_range = KeyRangeCache().get_range(self.log_paths[1], self.super_parser)
+
+        assert key_range.first_key == datetime(2015, 12, 3, 11, 0, 0)
+        assert key_range.last_key == datetime(2015, 12, 3, 11, 59, 0)
+
+        empty_path = self._write_log('empty.log', [])
+        key_range = KeyRangeCache().get_range(empty_path, self.super_parser)
+        assert key_range.first_key is None
+        assert key_range.intersects(datetime(2015, 12, 3), datetime(2015, 12, 3))
+
+    def test_files_outside_search_range_are_not_opened(self):
+        step = self._create_step((11, 30), (11, 40))
+
+        found = self._search(CountingSearcher, step)
+
+        assert CountingSearcher.opened_files == [self.log_paths[1]]
+        assert found == self._search(NotPruningSearcher, step)
+        assert len(found) == 11
+
+    def test_pruned_search_finds_the_same_clues(self):
+        for left_bound, right_bound in [
+            ((9, 0), (9, 59)), ((10, 59), (11, 0)), ((11, 59, 30), (12, 0)), ((12, 30), (13, 0)),
+            ((13, 0), (14, 0)), ((9, 0), (14, 0))
+        ]:
+            step = self._create_step(left_bound, right_bound)
+            assert self._search(BacktrackSearcher, step) == self._search(NotPruningSearcher, step)
+
+    def test_range_found_again_when_file_is_modified(self):
+        cache = KeyRangeCache()
+        key_range = cache.get_range(self.log_paths[0], self.super_parser)
+        assert cache.get_range(self.log_paths[0], self.super_parser) is key_range
+
+        with open(self.log_paths[0], 'a') as log_file:
+            log_file.write('2015-12-03 13:00:00 request 0\n')
+        key_range = cache.get_range(self.log_paths[0], self.super_parser)
+        assert key_range.last_key == datetime(2015, 12, 3, 13, 0, 0)
+
+    def test_least_recently_used_range_dropped(self):
+        cache = KeyRangeCache(max_files=2)
+        key_ranges = [cache.get_range(path, self.super_parser) for path in self.log_paths[:2]]
+        assert cache.get_range(self.log_paths[0], self.super_parser) is key_ranges[0]
+
+        cache.get_range(self.log_paths[2], self.super_parser)
+        assert cache.get_range(self.log_paths[0], self.super_parser) is key_ranges[0]
+        assert cache.get_range(self.log_paths[1], self.super_parser) is not key_ranges[1]
@@ -0,0 +1,188 @@
+import os.path
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import TestCase
+
+from dateutil.parser import parse as parse_date
+
+from whylog.config.investigation_plan import InvestigationStep, LineSource
+from whylog.config.parser_subset import ConcatenatedRegexParser
+from whylog.config.parsers import RegexParser
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
+from whylog.log_reader import log_database
+from whylog.log_reader.database_searcher import DatabaseSearcher
+from whylog.log_reader.exceptions import LogDatabaseUnavailable
+from whylog.log_reader.log_database import LogDatabase
+from whylog.log_reader.searchers import BacktrackSearcher
+from whylog.tests.tests_log_reader.constants import MultiLineLogParams, TestPaths
+
+
+class CountingSearcher(BacktrackSearcher):
+    searched_files = []
+
+    def search(self, original_front_input):
+        self.searched_files.append(self._file_path)
+        return super(CountingSearcher, self).search(original_front_input)
+
+
+class TestLogDatabase(TestCase):
+    """
+    Clues found in database should be the same as found by scanning log file.
+    """
+    def setUp(self):
+        self.parsers = [
+            RegexParser(
+                "request", "", "^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) request received$", [1],
+                "worker", {1: "date"}
+            ),
+            RegexParser("payload", "", "^  payload: (.*)$", [], "worker", {}),
+            RegexParser("error", "", "^ValueError: (.*)$", [], "worker", {}),
+            RegexParser("worker", "", "^(\S+ \S+) worker (\w+)$", [1], "worker", {1: "date"}),
+        ]
+        self.super_parser = RegexSuperParser(
+            '^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.tmp_dir, MultiLineLogParams.FILE_NAME)
+        with open(TestPaths.get_file_path(MultiLineLogParams.FILE_NAME), 'rb') as log_file:
+            content = log_file.read()
+        with open(self.log_path, 'wb') as log_file:
+            # the first line has no primary key
+            log_file.write(b'  payload: {"id": 0}\n' + content)
+        self.database_path = os.path.join(self.tmp_dir, 'logs.sqlite')
+        CountingSearcher.searched_files = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _ingest(self, parsers=None, host='localhost'):
+        database = LogDatabase(self.database_path)
+        try:
+            return database.ingest_file(
+                'worker', host, self.log_path, self.super_parser,
+                ConcatenatedRegexParser(parsers or self.parsers)
+            )
+        finally:
+            database.close()
+
+    def _steps(self):
+        parser_subset = ConcatenatedRegexParser(self.parsers[1:])
+        yield InvestigationStep(parser_subset, {})
+        for left, right in (
+            ('2015-12-03 12:08:09', '2015-12-03 12:08:10'),
+            ('2015-12-03 12:08:00', '2015-12-03 12:08:07'),
+            ('2015-12-03 12:08:11', '2015-12-03 12:09:00'),
+        ):
+            search_ranges = {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: parse_date(left),
+                    InvestigationStep.RIGHT_BOUND: parse_date(right)
+                }
+            }  # yapf: disable
+            yield InvestigationStep(parser_subset, search_ranges)
+            yield InvestigationStep(parser_subset, search_ranges, {'date': timedelta(seconds=1)})
+
+    def _front_inputs(self):
+        yield FrontInput(0, '', LineSource('localhost', 'other.log'))
+        # effect lines are in searched file
+        offset = 0
+        with open(self.log_path, 'rb') as log_file:
+            for line in log_file:
+                yield FrontInput(offset, '', LineSource('localhost', self.log_path))
+                offset += len(line)
+        yield FrontInput(offset, '', LineSource('localhost', self.log_path))
+
+    def _check_clues_as_in_file(self):
+        for step in self._steps():
+            for front_input in self._front_inputs():
+                expected = BacktrackSearcher(self.log_path, step,
+                                             self.super_parser).search(front_input)
+                searcher = DatabaseSearcher(
+                    self.log_path, step, self.super_parser, self.database_path, CountingSearcher
+                )
+                assert searcher.search(front_input) == expected
+        assert not CountingSearcher.searched_files
+
+    def test_clues_found_in_database(self):
+        assert self._ingest() == 10
+        self._check_clues_as_in_file()
+        assert self._ingest() == 0
+
+    def test_appended_file_is_ingested_from_the_last_line(self):
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(b'2015-12-03 12:08:16 worker')
+        self._ingest()
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(b' started\n  payload: {"id": 4}\n')
+
+        assert self._ingest() == 2
+        self._check_clues_as_in_file()
+
+    def test_appended_lines_are_scanned_without_ingestion(self):
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(b'2015-12-03 12:08:16 worker')
+        self._ingest()
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(
+                b' started\n  payload: {"id": 4}\n2015-12-03 12:08:17 request received\n'
+                b'  payload: {"id": 5}\n'
+            )
+
+        self._check_clues_as_in_file()
+
+    def test_files_not_ingested_are_scanned(self):
+        step = InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        front_input = FrontInput(0, '', LineSource('localhost', 'other.log'))
+        searcher = DatabaseSearcher(
+            self.log_path, step, self.super_parser, self.database_path, CountingSearcher
+        )
+        searcher.search(front_input)
+        self._ingest(self.parsers[1:])
+        searcher.search(front_input)
+        self._ingest()
+        with open(self.log_path, 'ab') as log_file:
+            log_file.write(b'2015-12-03 12:08:16 worker started\n')
+        # only lines appended after ingestion are scanned
+        clues = searcher.search(front_input)
+
+        assert CountingSearcher.searched_files == [self.log_path] * 2
+        assert len(clues['worker']) == 4
+
+        with open(self.log_path, 'wb') as log_file:
+            log_file.write(b'2015-12-03 12:08:17 worker started\n')
+        clues = searcher.search(front_input)
+
+        assert CountingSearcher.searched_files == [self.log_path] * 3
+        assert len(clues['worker']) == 1
+
+    def test_clues_have_host_of_ingested_file(self):
+        self._ingest(host='node1')
+        step = InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        front_input = FrontInput(0, '', LineSource('localhost', 'other.log'))
+        searcher = DatabaseSearcher(
+            self.log_path, step, self.super_parser, self.database_path, CountingSearcher
+        )
+        clues = searcher.search(front_input)
+
+        assert not CountingSearcher.searched_files
+        assert set(clue.line_source.host for clue in clues['worker']) == set(['node1'])
+
+    def test_files_scanned_without_sqlite3(self):
+        self._ingest()
+        step = InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        front_input = FrontInput(0, '', LineSource('localhost', 'other.log'))
+        searcher = DatabaseSearcher(
+            self.log_path, step, self.super_parser, self.database_path, CountingSearcher
+        )
+        sqlite3 = log_database.sqlite3
+        log_database.sqlite3 = None
+        try:
+            self.assertRaises(LogDatabaseUnavailable, LogDatabase, self.database_path)
+            clues = searcher.search(front_input)
+        finally:
+            log_database.sqlite3 = sqlite3
+
+        assert CountingSearcher.searched_files == [self.log_path]
+        assert len(clues['worker']) == 3
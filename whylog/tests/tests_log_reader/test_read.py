@@ -3,9 +3,14 @@ from unittest import TestCase
 
 import six
 
+from whylog.config.investigation_plan import InvestigationStep, LineSource
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
 from whylog.log_reader.read_utils import ReadUtils
 from whylog.log_reader.searchers import BacktrackSearcher
-from whylog.tests.tests_log_reader.constants import AFewLinesLogParams, TestPaths
+from whylog.tests.tests_log_reader.constants import (
+    AFewLinesLogParams, MultiLineLogParams, TestPaths
+)
 from whylog.tests.tests_log_reader.file_reader import (
     DataGeneratorLogSource, OperationCountingFileWrapper
 )
@@ -27,6 +32,7 @@ class TestLogsReading(TestCase):
                 datetime_format="%c"
             )
         )  # yapf: disable
+        cls.super_parser = RegexSuperParser('^(.*?) r+$', [1], {1: 'date'})
         cls.repetitions = 6
         cls.file_with_repeated_lines = OperationCountingFileWrapper(
             DataGeneratorLogSource(
@@ -57,36 +63,48 @@ class TestLogsReading(TestCase):
             read_line = ReadUtils._read_entire_line(fh, 99, 10)
             assert read_line == ('aaa-9-bbb', 90, 99)
 
+    @classmethod
+    def _create_backtracker(cls, left_bound, right_bound, super_parser=None):
+        investigation_step = InvestigationStep(
+            None, {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: left_bound,
+                    InvestigationStep.RIGHT_BOUND: right_bound
+                }
+            }
+        )  # yapf: disable
+        return BacktrackSearcher("", investigation_step, super_parser or cls.super_parser)
+
     def test_bisect_line_finding(self):
         secs = 3
         date = datetime(year=2000, month=1, day=1, second=secs)
 
-        backtracker = BacktrackSearcher("", None, None)
-        offset = backtracker._find_left(self.opened_file, date, {})
+        backtracker = self._create_backtracker(date, datetime.max)
+        offset = backtracker._find_left(self.opened_file)
 
         assert offset == secs * self.line_padding
         assert self.opened_file._seek_count < 35
 
     def test_bisect_first_line_of_file(self):
-        backtracker = BacktrackSearcher("", None, None)
-        offset = backtracker._find_left(self.opened_file, datetime.min, {})
+        backtracker = self._create_backtracker(datetime.min, datetime.max)
+        offset = backtracker._find_left(self.opened_file)
 
         assert offset == 0
         assert self.opened_file._seek_count < 35
 
     def test_bisect_last_line_of_file(self):
-        backtracker = BacktrackSearcher("", None, None)
-        offset = backtracker._find_right(self.opened_file, datetime.max, {})
+        backtracker = self._create_backtracker(datetime.min, datetime.max)
+        offset = backtracker._find_right(self.opened_file)
 
-        assert offset == (self.number_of_lines - 1) * self.line_padding
+        assert offset == self.number_of_lines * self.line_padding
         assert self.opened_file._seek_count < 35
 
     def test_bisect_left_when_lines_are_repeated(self):
         secs = 3
         date = datetime(year=2000, month=1, day=1, second=secs)
 
-        backtracker = BacktrackSearcher("", None, None)
-        offset = backtracker._find_left(self.file_with_repeated_lines, date, {})
+        backtracker = self._create_backtracker(date, datetime.max)
+        offset = backtracker._find_left(self.file_with_repeated_lines)
 
         line_no = secs * self.repetitions
         assert offset == line_no * self.line_padding
@@ -96,13 +114,66 @@ class TestLogsReading(TestCase):
         secs = 3
         date = datetime(year=2000, month=1, day=1, second=secs)
 
-        backtracker = BacktrackSearcher("", None, None)
-        offset = backtracker._find_right(self.file_with_repeated_lines, date, {})
+        backtracker = self._create_backtracker(datetime.min, date)
+        offset = backtracker._find_right(self.file_with_repeated_lines)
 
-        line_no = (secs + 1) * self.repetitions - 1
+        line_no = (secs + 1) * self.repetitions
         assert offset == line_no * self.line_padding
         assert self.file_with_repeated_lines._seek_count < 35
 
+    def test_bisect_skips_lines_without_primary_key(self):
+        super_parser = RegexSuperParser(r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'})
+        backtracker = self._create_backtracker(
+            datetime(2015, 12, 3, 12, 8, 9), datetime(2015, 12, 3, 12, 8, 10), super_parser
+        )
+        with open(TestPaths.get_file_path(MultiLineLogParams.FILE_NAME), 'rb') as fh:
+            left, right = backtracker._find_offsets_range(fh)
+            fh.seek(left)
+            lines = fh.read(right - left).decode('utf-8').splitlines()
+
+        assert lines == MultiLineLogParams.LINES_IN_RANGE
+
+    def test_whole_file_when_search_range_is_undefined(self):
+        backtracker = BacktrackSearcher("", InvestigationStep(None, {}), self.super_parser)
+        offsets_range = backtracker._find_offsets_range(self.opened_file)
+
+        assert offsets_range == (0, self.number_of_lines * self.line_padding)
+
+    def _scan_effect_file(self, tolerances=None):
+        file_path = TestPaths.get_file_path(MultiLineLogParams.FILE_NAME)
+        investigation_step = InvestigationStep(
+            None, {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, 9),
+                    InvestigationStep.RIGHT_BOUND: datetime(2015, 12, 3, 12, 8, 10)
+                }
+            }, tolerances
+        )  # yapf: disable
+        super_parser = RegexSuperParser(r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'})
+        backtracker = BacktrackSearcher(file_path, investigation_step, super_parser)
+        with open(file_path) as fh:
+            effect_offset = fh.read().index('2015-12-03 12:08:11')
+        effect_line = FrontInput(
+            effect_offset, '2015-12-03 12:08:11 request received',
+            LineSource('localhost', file_path)
+        )
+        return [line for line, _ in backtracker.lines_to_search(effect_line)]
+
+    def test_backward_scan_stops_before_search_range(self):
+        assert self._scan_effect_file() == list(reversed(MultiLineLogParams.LINES_IN_RANGE))
+
+    def test_backward_scan_stops_after_tolerance(self):
+        lines = self._scan_effect_file({'date': timedelta(seconds=1)})
+
+        assert lines == list(reversed(MultiLineLogParams.LINES_IN_TOLERANCE_OF_ONE_SECOND))
+
+    def test_load_line_by_offset(self):
+        file_path = TestPaths.get_file_path(MultiLineLogParams.FILE_NAME)
+        with open(file_path) as fh:
+            offset = fh.read().index(MultiLineLogParams.LINES_IN_RANGE[1])
+
+        assert ReadUtils.load_line(file_path, offset) == MultiLineLogParams.LINES_IN_RANGE[1]
+
     def tearDown(self):
         self.opened_file.reset_stats()
         self.file_with_repeated_lines.reset_stats()
@@ -0,0 +1,146 @@
+from unittest import TestCase
+
+import six
+
+from whylog.config.investigation_plan import ReadSizePolicy
+from whylog.log_reader import compressed_files
+from whylog.log_reader.read_ahead import ReadAhead
+from whylog.log_reader.reverse_reader import ReverseLineReader
+from whylog.tests.tests_log_reader.constants import TestPaths
+
+
+class RecordingReadAhead(ReadAhead):
+    def __init__(self, file_path):
+        super(RecordingReadAhead, self).__init__(file_path)
+        self.requested = []
+
+    def prefetch(self, begin, end):
+        self.requested.append((begin, end))
+        super(RecordingReadAhead, self).prefetch(begin, end)
+
+
+class RecordingReverseLineReader(ReverseLineReader):
+    def _start_read_ahead(self, end, lower_offset, block_size):
+        read_ahead = super(RecordingReverseLineReader,
+                           self)._start_read_ahead(end, lower_offset, block_size)
+        self.read_ahead = None
+        if read_ahead is not None:
+            read_ahead.close()
+            self.read_ahead = RecordingReadAhead(self._file_path)
+        return self.read_ahead
+
+
+class TestReverseLineReader(TestCase):
+    FILE_NAME = 'non_ascii_lines.log'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.file_path = TestPaths.get_file_path(cls.FILE_NAME)
+        with open(cls.file_path, 'rb') as fh:
+            cls.content = fh.read()
+
+    def _expected_lines(self, offset):
+        expected = []
+        line_offset = 0
+        for line in self.content[:offset].split(b'\n'):
+            if line:
+                expected.append((line, line_offset))
+            line_offset += len(line) + 1
+        return list(reversed(expected))
+
+    def test_byte_offsets_of_non_ascii_lines(self):
+        reader = ReverseLineReader(self.file_path)
+        lines = list(reader.reverse_lines(len(self.content)))
+        assert lines == self._expected_lines(len(self.content))
+        for line, line_offset in lines:
+            assert self.content[line_offset:line_offset + len(line)] == line
+
+    def test_block_smaller_than_lines(self):
+        for block_size in six.moves.range(1, 8):
+            reader = ReverseLineReader(self.file_path, block_size)
+            for offset in six.moves.range(len(self.content) + 1):
+                assert list(reader.reverse_lines(offset)) == self._expected_lines(offset)
+
+    def test_lower_offset(self):
+        reader = ReverseLineReader(self.file_path, 3)
+        lower_offset = self.content.index(b'plain')
+        lines = list(reader.reverse_lines(len(self.content), lower_offset))
+        assert lines == self._expected_lines(len(self.content))[:-1]
+
+    def test_decode_line(self):
+        reader = ReverseLineReader(self.file_path)
+        lines = [ReverseLineReader.decode_line(line) for line, _ in reader.reverse_lines(100)]
+        assert lines[1] == b'\xe2\x82\xac uro sign'.decode('utf-8')
+
+    def test_blocks_of_whole_lines(self):
+        for block_size in six.moves.range(1, 12):
+            reader = ReverseLineReader(self.file_path, block_size)
+            for offset in six.moves.range(len(self.content) + 1):
+                blocks = list(reader.reverse_blocks(offset))
+                assert b''.join(block for block, _ in reversed(blocks)) == self.content[:offset]
+                for block, block_offset in blocks:
+                    assert block_offset == 0 or self.content[block_offset - 1:block_offset] == b'\n'
+
+    def test_preceding_blocks_are_prefetched(self):
+        reader = RecordingReverseLineReader(self.file_path, 10)
+        lower_offset = 5
+        not_prefetching_reader = ReverseLineReader(self.file_path, 10, read_ahead=False)
+        lines = list(reader.reverse_lines(len(self.content), lower_offset))
+        assert lines == list(not_prefetching_reader.reverse_lines(len(self.content), lower_offset))
+        requested = reader.read_ahead.requested
+        assert requested[0][1] == len(self.content) - 10
+        assert requested[-1][0] == lower_offset
+        for (begin, _), (_, end) in zip(requested, requested[1:]):
+            assert end == begin
+
+        list(reader.reverse_blocks(len(self.content)))
+        assert reader.read_ahead.requested[-1][0] == 0
+
+    def test_growing_blocks(self):
+        for initial_size, max_size in [(1, 1), (1, 16), (3, 5), (8, 1000)]:
+            policy = ReadSizePolicy(initial_size, 2, max_size)
+            reader = ReverseLineReader(self.file_path, read_size_policy=policy)
+            for offset in six.moves.range(len(self.content) + 1):
+                assert list(reader.reverse_lines(offset)) == self._expected_lines(offset)
+                blocks = list(reader.reverse_blocks(offset))
+                assert b''.join(block for block, _ in reversed(blocks)) == self.content[:offset]
+
+    def test_prefetched_blocks_grow(self):
+        reader = RecordingReverseLineReader(
+            self.file_path, read_size_policy=ReadSizePolicy(2, 2, 16)
+        )
+        list(reader.reverse_lines(len(self.content)))
+        sizes = [end - begin for begin, end in reader.read_ahead.requested]
+        assert sizes[:4] == [4, 8, 16, 16]
+
+    def test_read_ahead_is_skipped_for_single_block(self):
+        reader = RecordingReverseLineReader(self.file_path)
+        list(reader.reverse_lines(len(self.content)))
+        assert reader.read_ahead is None
+
+    def test_read_ahead_closes_file(self):
+        read_ahead = ReadAhead(self.file_path, chunk_size=3)
+        read_ahead.prefetch(0, len(self.content))
+        read_ahead.close()
+        read_ahead._thread.join(5)
+        assert read_ahead._opened_file.closed
+
+
+class TestReverseLineReaderWithoutMmap(TestReverseLineReader):
+    """
+    Runs tests of ReverseLineReader reading files by seek and read, like where mmap is missing
+    """
+    def setUp(self):
+        self.mmap = compressed_files.mmap
+        compressed_files.mmap = None
+
+    def tearDown(self):
+        compressed_files.mmap = self.mmap
+
+    def test_file_read_without_mmap(self):
+        mapped = compressed_files.LogFileOpener.open_map(self.file_path)
+        try:
+            assert type(mapped) is compressed_files.ReadFileMap
+            assert mapped[0:len(self.content)] == self.content
+        finally:
+            mapped.close()
@@ -0,0 +1,172 @@
+import json
+import os.path
+import threading
+from datetime import timedelta
+from unittest import TestCase
+
+from dateutil.parser import parse as parse_date
+
+from whylog.config.investigation_plan import (
+    ClueRetention, InvestigationStep, InvestigationStepFactory, LineSource, ReadSizePolicy
+)
+from whylog.config.parser_subset import ConcatenatedRegexParser, RegexSetParser
+from whylog.config.parsers import RegexParser
+from whylog.config.super_parser import RegexSuperParser
+from whylog.front.utils import FrontInput
+from whylog.log_reader.exceptions import SearchAgentError
+from whylog.log_reader.search_agent import RemoteSearch, SearchAgent, SearchAgentClient
+from whylog.log_reader.searchers import BacktrackSearcher
+from whylog.tests.tests_log_reader.constants import MultiLineLogParams, TestPaths
+
+
+class WaitingSearcher(BacktrackSearcher):
+    """
+    searcher of the first agent waits until the second agent starts searching
+    """
+    second_agent_searching = threading.Event()
+
+    def lines_to_search(self, original_front_input):
+        assert self.second_agent_searching.wait(5)
+        return super(WaitingSearcher, self).lines_to_search(original_front_input)
+
+
+class NotifyingSearcher(BacktrackSearcher):
+    def lines_to_search(self, original_front_input):
+        WaitingSearcher.second_agent_searching.set()
+        return super(NotifyingSearcher, self).lines_to_search(original_front_input)
+
+
+class FailingSearcher(BacktrackSearcher):
+    def lines_to_search(self, original_front_input):
+        raise ValueError("cannot read %s" % (self._file_path,))
+
+
+class TestSearchAgent(TestCase):
+    def setUp(self):
+        self.parsers = [
+            RegexParser(
+                "request", "", r"^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) request received$", [1],
+                "worker", {1: "date"}
+            ),
+            RegexParser("payload", "", "^  payload: (.*)$", [], "worker", {}),
+            RegexParser("error", "", "^ValueError: (.*)$", [], "worker", {}),
+            RegexParser("worker", "", r"^(\S+ \S+) worker (\w+)$", [1], "worker", {1: "date"}),
+        ]
+        self.super_parser = RegexSuperParser(
+            r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+        self.log_path = TestPaths.get_file_path(MultiLineLogParams.FILE_NAME)
+        self.agents = []
+        WaitingSearcher.second_agent_searching.clear()
+
+    def tearDown(self):
+        for agent in self.agents:
+            agent.shutdown()
+            agent.server_close()
+
+    def _start_agent(self, searcher_class=BacktrackSearcher):
+        agent = SearchAgent(('127.0.0.1', 0), searcher_class)
+        thread = threading.Thread(target=agent.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.agents.append(agent)
+        return '127.0.0.1:%s' % (agent.server_address[1],)
+
+    def _steps(self):
+        search_ranges = {
+            'date': {
+                InvestigationStep.LEFT_BOUND: parse_date('2015-12-03 12:08:09'),
+                InvestigationStep.RIGHT_BOUND: parse_date('2015-12-03 12:08:10')
+            }
+        }  # yapf: disable
+        yield InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        yield InvestigationStep(ConcatenatedRegexParser(self.parsers), search_ranges)
+        yield InvestigationStep(
+            ConcatenatedRegexParser(self.parsers, bytes_lines=True), search_ranges,
+            {'date': timedelta(seconds=1)}
+        )
+        retention = ClueRetention({'date': parse_date('2015-12-03 12:08:10')}, 1)
+        yield InvestigationStep(ConcatenatedRegexParser(self.parsers), {}, None, retention)
+        yield InvestigationStep(
+            ConcatenatedRegexParser(self.parsers), search_ranges, None, None,
+            ReadSizePolicy(16, 2, 1024)
+        )
+        yield InvestigationStep(RegexSetParser(self.parsers, bytes_lines=True), search_ranges)
+
+    @classmethod
+    def _get_clues_data(cls, clues):
+        return dict(
+            (
+                parser_name, [
+                    (
+                        tuple(clue.regex_parameters), clue.line_prefix_content, clue.line_offset,
+                        clue.line_source.path
+                    ) for clue in parser_clues
+                ]
+            ) for parser_name, parser_clues in clues.items()
+        )
+
+    def test_investigation_step_serialization(self):
+        for step in self._steps():
+            serialized = json.loads(json.dumps(step.serialize()))
+            loaded_step = InvestigationStepFactory.from_dao(serialized)
+
+            assert loaded_step.serialize() == step.serialize()
+            assert type(loaded_step._parser_subset) is type(step._parser_subset)
+            assert loaded_step.get_bounds('date') == step.get_bounds('date')
+            assert [parser.convertions for parser in loaded_step.get_parsers()] == [
+                parser.convertions for parser in self.parsers
+            ]
+
+    def test_clues_found_by_agent_are_as_in_file(self):
+        host = self._start_agent()
+        effect_offset = os.path.getsize(self.log_path) // 2
+        for step in self._steps():
+            for front_input in [
+                FrontInput(0, '', LineSource('localhost', 'other.log')),
+                FrontInput(effect_offset, '', LineSource(host, self.log_path)),
+            ]:
+                clues = SearchAgentClient(host).search(
+                    step, self.log_path, self.super_parser, front_input
+                )
+                if front_input.line_source.host == host:
+                    front_input = FrontInput(
+                        effect_offset, '', LineSource('localhost', self.log_path)
+                    )
+                expected = BacktrackSearcher(self.log_path, step,
+                                             self.super_parser).search(front_input)
+                assert self._get_clues_data(clues) == self._get_clues_data(expected)
+                assert all(
+                    clue.line_source == LineSource(host, self.log_path)
+                    for parser_clues in clues.values() for clue in parser_clues
+                )
+
+    def test_agents_are_queried_concurrently(self):
+        hosts = [self._start_agent(WaitingSearcher), self._start_agent(NotifyingSearcher)]
+        step = InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        front_input = FrontInput(0, '', LineSource('localhost', self.log_path))
+        requests = [(host, step, self.log_path, self.super_parser, front_input) for host in hosts]
+
+        clues_from_hosts = RemoteSearch(requests).start().wait()
+
+        assert [clues['worker'][0].line_source.host for clues in clues_from_hosts] == hosts
+        assert len(RemoteSearch(requests).search()['worker']) == 6
+
+    def test_agent_errors_are_raised(self):
+        host = self._start_agent(FailingSearcher)
+        step = InvestigationStep(ConcatenatedRegexParser(self.parsers), {})
+        front_input = FrontInput(0, '', LineSource('localhost', self.log_path))
+        client = SearchAgentClient(host)
+
+        try:
+            client.search(step, self.log_path, self.super_parser, front_input)
+        except SearchAgentError as error:
+            assert error.message == "cannot read %s" % (self.log_path,)
+        else:
+            raise AssertionError("SearchAgentError not raised")
+        agent = self.agents.pop()
+        agent.shutdown()
+        agent.server_close()
+        self.assertRaises(
+            SearchAgentError, client.search, step, self.log_path, self.super_parser, front_input
+        )
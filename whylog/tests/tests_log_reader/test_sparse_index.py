@@ -0,0 +1,119 @@
+import os.path
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from whylog.config.investigation_plan import InvestigationStep
+from whylog.config.super_parser import RegexSuperParser
+from whylog.log_reader.searchers import BacktrackSearcher, IndexSearcher
+from whylog.log_reader.sparse_index import FileIdentity, IndexMaintainer, SparseIndex
+from whylog.tests.tests_log_reader.constants import MultiLineLogParams, TestPaths
+
+
+class TestSparseIndex(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.tmp_dir, MultiLineLogParams.FILE_NAME)
+        shutil.copy(TestPaths.get_file_path(MultiLineLogParams.FILE_NAME), self.log_path)
+        self.super_parser = RegexSuperParser(
+            r'^(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d) ', [1], {1: 'date'}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _create_step(self, left_second, right_second):
+        return InvestigationStep(
+            None, {
+                'date': {
+                    InvestigationStep.LEFT_BOUND: datetime(2015, 12, 3, 12, 8, left_second),
+                    InvestigationStep.RIGHT_BOUND: datetime(2015, 12, 3, 12, 8, right_second)
+                }
+            }
+        )  # yapf: disable
+
+    def _offsets_range(self, searcher_class, step):
+        searcher = searcher_class(self.log_path, step, self.super_parser)
+        return searcher._deduce_offsets_range()
+
+    def test_index_searcher_finds_the_same_range_as_bisection(self):
+        for left_second in range(4, 17):
+            for right_second in range(left_second, 17):
+                step = self._create_step(left_second, right_second)
+                assert self._offsets_range(IndexSearcher, step) == self._offsets_range(
+                    BacktrackSearcher, step
+                )
+
+    def test_index_is_stored_next_to_log_file(self):
+        self._offsets_range(IndexSearcher, self._create_step(9, 10))
+
+        index = SparseIndex.load(self.log_path)
+        assert index is not None
+        assert index.identity.is_same_file(FileIdentity.of_file(self.log_path))
+        assert index.indexed_size == os.path.getsize(self.log_path)
+        assert list(index.offsets) == [0]
+
+    def test_dense_index_narrows_range(self):
+        index = SparseIndex.build(self.log_path, self.super_parser, sample_spacing=1)
+        left, right = index.find_offsets_range(
+            datetime(2015, 12, 3, 12, 8, 9), datetime(2015, 12, 3, 12, 8, 10)
+        )
+        with open(self.log_path, 'rb') as fh:
+            content = fh.read()
+        lines = content[left:right].decode('utf-8').splitlines()
+        # range starts with the last sampled line preceding the search range
+        assert lines[0].startswith('2015-12-03 12:08:08')
+        assert lines[-len(MultiLineLogParams.LINES_IN_RANGE):] == MultiLineLogParams.LINES_IN_RANGE
+
+    def _get_index(self, maintainer):
+        return maintainer.get_fresh_index(self.log_path, self.super_parser)
+
+    def _append_to_log(self, content):
+        with open(self.log_path, 'a') as log_file:
+            log_file.write(content)
+
+    def test_index_is_extended_when_file_grows(self):
+        SparseIndex.build(self.log_path, self.super_parser, sample_spacing=1).save(self.log_path)
+        maintainer = IndexMaintainer()
+        index = self._get_index(maintainer)
+        indexed_offsets = list(index.offsets)
+        self._append_to_log('2015-12-03 12:08:20 late entry\n2015-12-03 12:08:21 next entry\n')
+
+        extended_index = self._get_index(maintainer)
+        assert extended_index is index
+        assert list(index.offsets)[:len(indexed_offsets)] == indexed_offsets
+        assert len(index.offsets) == len(indexed_offsets) + 2
+        assert index.indexed_size == os.path.getsize(self.log_path)
+        assert SparseIndex.load(self.log_path).indexed_size == index.indexed_size
+
+    def test_index_is_rebuilt_when_file_was_truncated(self):
+        maintainer = IndexMaintainer()
+        self._get_index(maintainer)
+        with open(self.log_path, 'w') as log_file:
+            log_file.write('2015-12-03 12:08:20 entry after truncation\n')
+
+        index = self._get_index(maintainer)
+        assert list(index.offsets) == [0]
+        assert index.indexed_size == os.path.getsize(self.log_path)
+
+    def test_index_is_rebuilt_when_file_was_replaced(self):
+        self._get_index(IndexMaintainer())
+        rotated_path = self.log_path + '.1'
+        os.rename(self.log_path, rotated_path)
+        shutil.copy(rotated_path, self.log_path)
+        self._append_to_log('2015-12-03 12:08:20 late entry\n')
+
+        index = SparseIndex.load(self.log_path)
+        assert not index.identity.is_same_file(FileIdentity.of_file(self.log_path))
+        index = self._get_index(IndexMaintainer())
+        assert index.identity.is_same_file(FileIdentity.of_file(self.log_path))
+
+    def test_searcher_uses_appended_lines(self):
+        self._offsets_range(IndexSearcher, self._create_step(9, 10))
+        self._append_to_log('2015-12-03 12:08:20 late entry\n')
+
+        step = self._create_step(20, 21)
+        assert self._offsets_range(IndexSearcher, step) == self._offsets_range(
+            BacktrackSearcher, step
+        )